@@ -0,0 +1,320 @@
+import argparse
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from agent.feedback import OracleFeedback, compute_reward
+from agent.intent_parser import TaskIntentIndex, parse_intent
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+from agent.simulation import optimal_accuracy, run_simulation
+from agent.task_source import TASK_FILE, load_tasks
+
+# header words: sequence (odd while publishing), version, states, name bytes, actions, state capacity, name capacity
+_HEADER = 7
+
+
+class SlowOracle(OracleFeedback):
+    """``OracleFeedback`` that takes ``think`` seconds per answer, standing in for a slow environment or user"""
+
+    def __init__(self, actions, think=0.0, **kwargs):
+        super().__init__(actions, **kwargs)
+        self.think = think
+
+    def __call__(self, task, intent, action):
+        if self.think:
+            time.sleep(self.think)
+        return super().__call__(task, intent, action)
+
+
+class SharedQSnapshot:
+    """Read-only Q-table view that one learner publishes to actor processes through shared memory.
+
+    One block holds a small header, ``state_capacity`` value rows and the
+    state names (NUL-separated UTF-8, append-only like ``QTable`` ids).
+    Publishing is a seqlock: the learner makes the sequence number odd,
+    copies the rows and makes it even again; a reader whose lookup
+    overlapped a publish simply retries. Actors therefore read rows in
+    place, with no pickling or lock. States interned past the capacity are
+    not published; actors see them as unknown (all-zero rows).
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray(_HEADER, dtype=np.int64, buffer=shm.buf)
+        n_actions, self.state_capacity, names_capacity = (int(v) for v in self.header[4:7])
+        offset = _HEADER * 8
+        self.values = np.ndarray((self.state_capacity, n_actions), dtype=np.float64, buffer=shm.buf, offset=offset)
+        self.names = np.ndarray(names_capacity, dtype=np.uint8, buffer=shm.buf, offset=offset + self.values.nbytes)
+        self.state_index = {}  # reader side: state -> row, synced by sync_states
+        self._names_read = 0
+        self._published = 0  # learner side: states whose names are written
+        self.retries = 0
+
+    @classmethod
+    def create(cls, n_actions, state_capacity=1 << 16, names_capacity=4 << 20):
+        size = _HEADER * 8 + state_capacity * n_actions * 8 + names_capacity
+        snapshot = cls.__new__(cls)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        np.ndarray(_HEADER, dtype=np.int64, buffer=shm.buf)[:] = [0, 0, 0, 0, n_actions, state_capacity,
+                                                                  names_capacity]
+        snapshot.__init__(shm, owner=True)
+        return snapshot
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def version(self):
+        return int(self.header[1])
+
+    def publish(self, table):
+        """Copy ``table``'s rows (and any new state names) into the block; returns the new version"""
+        header = self.header
+        names_end = int(header[3])
+        new_names = b"".join(state.encode("utf-8") + b"\0" for state in table.states[self._published:])
+        count = self._published + len(table.states[self._published:])
+        if count > self.state_capacity or names_end + len(new_names) > len(self.names):
+            count, new_names = self._published, b""  # full: keep publishing the states that fit
+        header[0] += 1
+        self.names[names_end:names_end + len(new_names)] = np.frombuffer(new_names, dtype=np.uint8)
+        self.values[:count] = table.values[:count]
+        header[2], header[3] = count, names_end + len(new_names)
+        header[1] += 1
+        header[0] += 1
+        self._published = count
+        return int(header[1])
+
+    def sync_states(self):
+        """Index state names published since the last call (reader side)"""
+        while True:
+            seq = int(self.header[0])
+            count, names_end = int(self.header[2]), int(self.header[3])
+            if seq % 2 == 0 and int(self.header[0]) == seq:
+                break
+        if count > len(self.state_index):
+            fresh = self.names[self._names_read:names_end].tobytes().decode("utf-8").split("\0")[:-1]
+            for state in fresh:
+                self.state_index[state] = len(self.state_index)
+            self._names_read = names_end
+
+    def state_ids(self, states):
+        """Row of each state, or -1 for states the learner has not published yet"""
+        index = self.state_index
+        return np.fromiter((index.get(s, -1) for s in states), dtype=np.int64, count=len(states))
+
+    def best_action_ids(self, sids):
+        """(greedy action id per state id, snapshot version) from one consistent read; unknown states give 0"""
+        rows = np.maximum(sids, 0)
+        while True:
+            seq = int(self.header[0])
+            if seq % 2 == 0:
+                best = np.argmax(self.values[rows], axis=1)
+                version = int(self.header[1])
+                if int(self.header[0]) == seq:
+                    break
+            self.retries += 1
+        best[sids < 0] = 0
+        return best, version
+
+    def close(self):
+        self.header = self.values = self.names = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def run_actor(actor_id, snapshot_name, actions, tasks, first_index, episodes, transitions, start, epsilon=0.2,
+              batch_size=64, think=0.0, noise=0.0, seed=None):
+    """Actor process: act on ``tasks`` for ``episodes`` passes and send the transitions to the learner.
+
+    Actions are epsilon-greedy over the shared snapshot, one consistent
+    read per mini-batch; feedback comes from a ``SlowOracle``. Each batch goes
+    out as ``("batch", actor, states, action ids, rewards, log rows,
+    snapshot version)``, each finished pass as ``("episode", actor,
+    episode, total reward)`` and the end as ``("done", actor, stats)``.
+    """
+    snapshot = SharedQSnapshot.attach(snapshot_name)
+    provider = SlowOracle(actions, think, noise=noise, seed=seed)
+    rng = np.random.default_rng(seed)
+    intents = [parse_intent(task) for task in tasks]
+    start.wait(timeout=60)
+    began = time.perf_counter()
+    sent = 0
+    try:
+        for episode in range(1, episodes + 1):
+            total = 0
+            for lo in range(0, len(tasks), batch_size):
+                batch = intents[lo:lo + batch_size]
+                snapshot.sync_states()
+                aids, version = snapshot.best_action_ids(snapshot.state_ids(batch))
+                draws = rng.random((2, len(batch)))
+                explore = draws[0] < epsilon
+                aids[explore] = (draws[1][explore] * len(actions)).astype(np.int64)
+                rewards, log = [], []
+                for i, (intent, aid) in enumerate(zip(batch, aids.tolist())):
+                    task_index = first_index + lo + i + 1
+                    feedback, correction = provider(tasks[lo + i], intent, actions[aid])
+                    reward, feedback_text, suggestion = compute_reward(feedback, correction)
+                    rewards.append(reward)
+                    log.append((f"{episode}-{task_index}", feedback_text, suggestion))
+                transitions.put(("batch", actor_id, batch, aids, rewards, log, version))
+                total += sum(rewards)
+                sent += len(batch)
+            transitions.put(("episode", actor_id, episode, total))
+        transitions.put(("done", actor_id, {"transitions": sent, "seconds": time.perf_counter() - began,
+                                            "retries": snapshot.retries}))
+    finally:
+        snapshot.close()
+
+
+def run_learner(agent, snapshot, transitions, actors, publish_every=1024, publish_interval=0.05, task_logger=None,
+                processes=()):
+    """Learner loop: apply actor batches with ``update_batch_ids`` and publish snapshots.
+
+    A snapshot goes out after ``publish_every`` new transitions or once
+    ``publish_interval`` seconds have passed with any pending, whichever
+    comes first.
+
+    Returns per-episode total rewards (summed over the actors' shards), the
+    transitions applied, publishes, the mean number of versions a batch's
+    snapshot was behind when it was applied, and each actor's stats.
+    """
+    done, episode_totals = {}, {}
+    applied = pending = publishes = lag = batches = 0
+    published_at = time.perf_counter()
+    while len(done) < actors:
+        try:
+            message = transitions.get(timeout=1.0)
+        except queue.Empty:
+            crashed = [p for p in processes if p.exitcode not in (None, 0)]
+            if crashed:
+                raise RuntimeError(f"actor process exited with code {crashed[0].exitcode}")
+            continue
+        kind, actor = message[0], message[1]
+        if kind == "done":
+            done[actor] = message[2]
+        elif kind == "episode":
+            _, _, episode, total = message
+            episode_totals.setdefault(episode, {})[actor] = total
+            if len(episode_totals[episode]) == actors and task_logger is not None:
+                task_logger.log_total_reward(episode, sum(episode_totals[episode].values()))
+        else:
+            _, _, states, aids, rewards, log, version = message
+            sids = agent.q.state_ids(states)
+            agent.update_batch_ids(sids, aids, np.asarray(rewards, dtype=np.float64), sids)
+            if task_logger is not None:
+                for state, aid, reward, (task_id, feedback_text, suggestion) in zip(states, aids.tolist(), rewards,
+                                                                                   log):
+                    task_logger.log_episode(task_id, state, agent.q.actions[aid], reward, feedback_text, suggestion)
+            lag += snapshot.version - version
+            batches += 1
+            applied += len(states)
+            pending += len(states)
+            if pending >= publish_every or time.perf_counter() - published_at >= publish_interval:
+                snapshot.publish(agent.q)
+                publishes += 1
+                pending = 0
+                published_at = time.perf_counter()
+    snapshot.publish(agent.q)
+    rewards = np.array([sum(totals.values()) for _, totals in sorted(episode_totals.items())])
+    return {"rewards": rewards, "transitions": applied, "publishes": publishes + 1,
+            "mean_lag": lag / batches if batches else 0.0, "actors": done}
+
+def run_actor_learner(agent, tasks, actors=2, episodes=10, batch_size=64, publish_every=1024, publish_interval=0.05,
+                      think=0.0, noise=0.0, task_logger=None, seed=0):
+    """Train ``agent`` with ``actors`` actor processes sharing ``tasks`` and this process as the learner.
+
+    Actor ``i`` works through the ``i``-th contiguous slice of ``tasks``,
+    so together one episode covers every task once, as in
+    ``run_simulation``. Updates are applied per received mini-batch
+    (``update_batch`` semantics) and actors act on a snapshot up to
+    ``publish_every`` transitions or ``publish_interval`` seconds old. Returns ``run_simulation``-style
+    results plus learner statistics.
+    """
+    shards = np.array_split(np.arange(len(tasks)), actors)
+    ctx = mp.get_context("spawn")  # the learner may own logger threads, which fork would not copy safely
+    transitions = ctx.Queue(maxsize=64 * actors)  # backpressure: actors wait when the learner falls behind
+    start = ctx.Barrier(actors + 1)  # spawn start-up is not part of the measurement
+    snapshot = SharedQSnapshot.create(len(agent.q.actions))
+    snapshot.publish(agent.q)
+    processes = [ctx.Process(target=run_actor, name=f"actor-{i}", daemon=True,
+                             args=(i, snapshot.name, list(agent.q.actions), [tasks[j] for j in shard],
+                                   int(shard[0]) if len(shard) else 0, episodes, transitions, start,
+                                   agent.epsilon, batch_size, think, noise, seed + i))
+                 for i, shard in enumerate(shards)]
+    try:
+        for p in processes:
+            p.start()
+        start.wait(timeout=60)
+        began = time.perf_counter()
+        result = run_learner(agent, snapshot, transitions, actors, publish_every, publish_interval, task_logger,
+                             processes)
+        elapsed = time.perf_counter() - began
+        for p in processes:
+            p.join()
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+        snapshot.close()
+
+    index = TaskIntentIndex(tasks, agent.q)
+    oracle = OracleFeedback(agent.q.actions)
+    labels = [oracle.label(task) for task in tasks]
+    label_ids = np.array([agent.q.action_id(label) if label else -1 for label in labels])
+    greedy = np.argmax(agent.q.values[index.state_ids], axis=1)
+    result.update({
+        "episodes": episodes,
+        "tasks": len(tasks),
+        "seconds": elapsed,
+        "per_sec": result["transitions"] / elapsed,
+        "accuracy": float(np.mean((label_ids < 0) | (greedy == label_ids))),
+        "optimal_accuracy": optimal_accuracy(index.intents, labels),
+    })
+    return result
+
+def scaling(tasks, actor_counts=(1, 2, 4), episodes=20, think=0.0, batch_size=64, publish_every=1024):
+    """Single-process baseline, then the actor/learner split for each actor count"""
+    agent = QLearningAgent(DEFAULT_ACTIONS, q_path="", seed=0)
+    baseline = run_simulation(agent, tasks, SlowOracle(DEFAULT_ACTIONS, think, seed=0), episodes, seed=0)
+    rows = [{"actors": 0, "per_sec": episodes * len(tasks) / baseline["seconds"], "seconds": baseline["seconds"],
+             "accuracy": float(baseline["accuracy"][-1]), "mean_lag": 0.0, "retries": 0}]
+    for n in actor_counts:
+        agent = QLearningAgent(DEFAULT_ACTIONS, q_path="", seed=0)
+        r = run_actor_learner(agent, tasks, n, episodes, batch_size, publish_every, think=think)
+        rows.append({"actors": n, "per_sec": r["per_sec"], "seconds": r["seconds"], "accuracy": r["accuracy"],
+                     "mean_lag": r["mean_lag"], "retries": sum(a["retries"] for a in r["actors"].values())})
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Actor/learner scaling: N actor processes, one learner, shared snapshot")
+    parser.add_argument("--tasks", default=TASK_FILE)
+    parser.add_argument("--repeat", type=int, default=200, help="replicate the task file this many times")
+    parser.add_argument("--episodes", type=int, default=5)
+    parser.add_argument("--actors", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--think-ms", type=float, default=0.0, help="simulated environment/user latency per task")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--publish-every", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    tasks = load_tasks(args.tasks) * args.repeat
+    print(f"🧵 {len(tasks):,} tasks x {args.episodes} episodes, {args.think_ms} ms per task, "
+          f"{mp.cpu_count()} CPUs")
+    print(f"{'actors':>7} {'transitions/s':>14} {'seconds':>8} {'speedup':>8} {'accuracy':>9} {'lag':>6} {'retries':>8}")
+    rows = scaling(tasks, args.actors, args.episodes, args.think_ms / 1000, args.batch_size, args.publish_every)
+    for r in rows:
+        print(f"{r['actors'] or 'single':>7} {r['per_sec']:>14,.0f} {r['seconds']:>8.2f} "
+              f"{r['per_sec'] / rows[0]['per_sec']:>7.2f}x {r['accuracy']:>9.1%} {r['mean_lag']:>6.2f} {r['retries']:>8}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
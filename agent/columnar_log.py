@@ -0,0 +1,512 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from agent.logger import TASK_LOG_HEADER
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+COLUMNAR_LOG_DIR = os.path.join("data", "task_log_columns")
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+MERGE_FANOUT = 16  # same-tier segments merged into one
+RETIRE_AFTER = 60.0  # seconds a merged-away segment stays on disk for readers of an older manifest
+
+# (CSV header, file key, storage kind) for every task-log column
+COLUMNS = [
+    ("Task ID", "task_id", "str"),
+    ("Parsed Intent", "intent", "category"),
+    ("Action Taken", "action", "category"),
+    ("Reward Assigned", "reward", "float32"),
+    ("Timestamp", "timestamp", "datetime"),
+    ("Agent Confidence", "confidence", "float32"),
+    ("User Feedback", "feedback", "category"),
+    ("Suggested Correction", "suggestion", "str"),
+]
+COLUMN_KINDS = {name: kind for name, _, kind in COLUMNS}
+COLUMN_KEYS = {name: key for name, key, _ in COLUMNS}
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _atomic_write(path, write):
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    write(tmp)
+    os.replace(tmp, path)
+
+def _read_manifest(root):
+    path = os.path.join(root, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _to_datetime(value):
+    try:
+        return np.datetime64(value, "s")
+    except (TypeError, ValueError):
+        return np.datetime64("NaT")
+
+
+class ColumnarLogSink:
+    """Typed, columnar, append-only store for task-log rows.
+
+    Every ``flush`` publishes its rows as a new immutable segment, so a
+    write costs only the rows written. Whenever the log ends in
+    ``MERGE_FANOUT`` segments of the same tier, they are merged into one
+    segment of the next tier (at most ``segment_rows`` rows), which keeps
+    the segment count logarithmic while each row is rewritten only a few
+    times. Each segment is one ``.npy`` file per column (memory-mappable)
+    or, with ``format="parquet"`` and pyarrow installed, a single Parquet
+    file. Categorical columns (intent, action, feedback) are stored as
+    int32 codes into append-only ``dict-*.jsonl`` dictionaries.
+
+    Several writers, in one process or many, may share a directory: a
+    flush holds an exclusive ``flock`` on ``.lock`` while it re-reads the
+    manifest and dictionaries, writes its segment and publishes the new
+    manifest. Column files are written before the manifest, so readers
+    only ever see complete rows, and merged-away segments are deleted
+    ``RETIRE_AFTER`` seconds later, once readers of an older manifest are done.
+
+    The manifest also keeps the task-log CSV's watermark, the ``(inode,
+    size)`` the CSV had once it held exactly the stored rows, and the row
+    each rotated CSV segment ended at, so readers can tell in O(1) whether
+    the copy is in step with the CSV, and retention can drop the rows of
+    pruned segments (``rotated``/``drop_archived``, see ``agent.log_archive``).
+    """
+
+    def __init__(self, root=COLUMNAR_LOG_DIR, segment_rows=65536, format="npy"):
+        if format == "parquet" and not parquet_available():
+            raise ImportError("pyarrow is required for the parquet columnar log format")
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._thread_lock = threading.Lock()
+        with self._locked():
+            manifest = _read_manifest(root)
+            if manifest is None:
+                manifest = {"version": FORMAT_VERSION, "format": format, "segment_rows": segment_rows,
+                            "segments": [], "dictionaries": {}, "watermark": None, "archived": {}, "base_row": 0}
+                _atomic_write(os.path.join(root, MANIFEST_NAME), lambda tmp: _write_json(tmp, manifest))
+        self.manifest = manifest
+        self.format = manifest["format"]
+        self.segment_rows = manifest["segment_rows"]
+        self.dictionaries = {key: {} for _, key, kind in COLUMNS if kind == "category"}
+        self._dictionary_ends = {key: 0 for key in self.dictionaries}  # bytes of each dict file indexed so far
+        self._pending = {name: [] for name, _, _ in COLUMNS}
+        self._pending_rows = 0
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock, open(os.path.join(self.root, ".lock"), "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def write_rows(self, rows):
+        """Append rows laid out like ``TASK_LOG_HEADER`` (as written to the CSV)"""
+        rows = list(rows)
+        if rows:
+            columns = zip(*(list(row) + [""] * (len(TASK_LOG_HEADER) - len(row)) for row in rows))
+            self.write_columns(dict(zip(TASK_LOG_HEADER, columns)))
+
+    def write_columns(self, columns):
+        """Append equally long column sequences keyed by CSV header name"""
+        n = max((len(values) for values in columns.values()), default=0)
+        for name, _, _ in COLUMNS:
+            self._pending[name].extend(columns.get(name, [""] * n))
+        self._pending_rows += n
+        if self._pending_rows >= self.segment_rows:
+            self.flush()
+
+    def _convert(self, key, kind, values):
+        values = ["" if v is None else v for v in values]
+        if kind == "category":
+            return np.fromiter((self._encode(key, str(v)) for v in values), dtype=np.int32, count=len(values))
+        if kind == "float32":
+            try:
+                return np.asarray(values, dtype=np.float32)
+            except ValueError:
+                return np.array([_to_float(v) for v in values], dtype=np.float32)
+        if kind == "datetime":
+            try:
+                return np.asarray(values, dtype="datetime64[s]")
+            except ValueError:
+                return np.array([_to_datetime(v) for v in values], dtype="datetime64[s]")
+        return np.asarray([str(v) for v in values], dtype=str)
+
+    def _encode(self, key, value):
+        codes = self.dictionaries[key]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self._new_values[key].append(value)
+        return code
+
+    def _sync_dictionaries(self):
+        """Index dictionary entries other writers published, dropping any a crashed writer left unpublished"""
+        self._new_values = {key: [] for key in self.dictionaries}
+        for key, codes in self.dictionaries.items():
+            count = self.manifest["dictionaries"].get(key, 0)
+            path = os.path.join(self.root, f"dict-{key}.jsonl")
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                f.seek(self._dictionary_ends[key])
+                while len(codes) < count:
+                    line = f.readline()
+                    if not line:
+                        break
+                    codes.setdefault(json.loads(line), len(codes))
+                self._dictionary_ends[key] = f.tell()
+            if os.path.getsize(path) > self._dictionary_ends[key]:
+                os.truncate(path, self._dictionary_ends[key])
+
+    def _write_dictionaries(self):
+        for key, values in self._new_values.items():
+            if values:
+                path = os.path.join(self.root, f"dict-{key}.jsonl")
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(v) + "\n" for v in values))
+                self._dictionary_ends[key] = os.path.getsize(path)
+                values.clear()
+
+    def flush(self, watermark=None):
+        """Publish pending rows as new segments (``segment_rows`` at most each), then merge full tiers.
+
+        ``watermark`` is the CSV's ``(inode, size)`` once it holds the same
+        rows (``BufferedCSVWriter`` passes it while still holding the CSV's
+        lock); without one the copy is marked out of step.
+        """
+        if not self._pending_rows and watermark is None:
+            return
+        pending, n = self._pending, self._pending_rows
+        self._pending = {name: [] for name, _, _ in COLUMNS}
+        self._pending_rows = 0
+        with self._locked():
+            self.manifest = _read_manifest(self.root)
+            if n:
+                self._sync_dictionaries()
+                for lo in range(0, n, self.segment_rows):
+                    arrays = {key: self._convert(key, kind, pending[name][lo:lo + self.segment_rows])
+                              for name, key, kind in COLUMNS}
+                    self._add_segment(arrays, tier=0)
+                self._write_dictionaries()
+                self.manifest["dictionaries"] = {key: len(codes) for key, codes in self.dictionaries.items()}
+                self._merge_tail()
+                self._delete_retired()
+            self.manifest["watermark"] = list(watermark) if watermark else None
+            self._publish()
+
+    def rotated(self, segment, watermark):
+        """Record that the CSV file at ``watermark`` was rotated into archive ``segment`` (and no live file is left)"""
+        with self._locked():
+            self.manifest = _read_manifest(self.root)
+            if self.manifest.get("watermark") == list(watermark):
+                self._mark_archived(segment)
+                self.manifest["watermark"] = [None, 0]
+            else:
+                self.manifest["watermark"] = None
+            self._publish()
+
+    def drop_archived(self, segments):
+        """Drop the stored rows of pruned archive ``segments``, whole column segments at a time; returns the rows"""
+        with self._locked():
+            self.manifest = _read_manifest(self.root)
+            archived = self.manifest.setdefault("archived", {})
+            ends = [archived.pop(segment) for segment in segments if segment in archived]
+            if not ends:
+                return 0
+            base = first = self.manifest.get("base_row", 0)
+            stored = self.manifest["segments"]
+            while stored and base + stored[0]["rows"] <= max(ends):
+                segment = stored.pop(0)
+                base += segment["rows"]
+                self.manifest.setdefault("retired", []).append([segment["name"], time.time()])
+            self.manifest["base_row"] = base
+            self._delete_retired()
+            self._publish()
+            return base - first
+
+    def _mark_archived(self, segment):
+        manifest = self.manifest
+        end = manifest.get("base_row", 0) + sum(s["rows"] for s in manifest["segments"])
+        manifest.setdefault("archived", {})[segment] = end
+
+    def _publish(self):
+        _atomic_write(os.path.join(self.root, MANIFEST_NAME), self._write_manifest)
+
+    def _add_segment(self, arrays, tier):
+        manifest = self.manifest
+        number = manifest.get("next_segment", len(manifest["segments"]))
+        manifest["next_segment"] = number + 1
+        segment = {"name": f"seg-{number:06d}", "rows": len(next(iter(arrays.values()))), "tier": tier}
+        if self.format == "parquet":
+            self._write_parquet(segment["name"], arrays)
+        else:
+            seg_dir = os.path.join(self.root, segment["name"])
+            os.makedirs(seg_dir, exist_ok=True)
+            for key, values in arrays.items():
+                _save_npy(os.path.join(seg_dir, f"{key}.npy"), values)
+        manifest["segments"].append(segment)
+
+    def _merge_tail(self):
+        """Merge the last ``MERGE_FANOUT`` segments while they share a tier and fit in ``segment_rows``"""
+        segments = self.manifest["segments"]
+        while len(segments) >= MERGE_FANOUT:
+            tail = segments[-MERGE_FANOUT:]
+            tier = tail[0].get("tier", 0)
+            if any(s.get("tier", 0) != tier for s in tail) or sum(s["rows"] for s in tail) > self.segment_rows:
+                break
+            names = [name for name, _, _ in COLUMNS]
+            parts = [_read_segment(self.root, self.format, s, names, 0, s["rows"]) for s in tail]
+            del segments[-MERGE_FANOUT:]
+            self._add_segment({COLUMN_KEYS[name]: np.concatenate([part[name] for part in parts]) for name in names},
+                              tier + 1)
+            self.manifest.setdefault("retired", []).extend([s["name"], time.time()] for s in tail)
+
+    def _delete_retired(self):
+        keep = []
+        for name, retired_at in self.manifest.get("retired", []):
+            if time.time() - retired_at < RETIRE_AFTER:
+                keep.append([name, retired_at])
+            elif self.format == "parquet":
+                os.remove(os.path.join(self.root, f"{name}.parquet"))
+            else:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        self.manifest["retired"] = keep
+
+    def _write_parquet(self, name, arrays):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({key: pa.array(values) for key, values in arrays.items()})
+        pq.write_table(table, os.path.join(self.root, f"{name}.parquet"))
+
+    def _write_manifest(self, tmp):
+        _write_json(tmp, self.manifest)
+
+    def close(self):
+        self.flush()
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def _save_npy(path, values):
+    with open(path, "wb") as f:
+        np.save(f, values)
+
+def _load_dictionary(root, key, count, truncate=False):
+    """First ``count`` entries of a dictionary; ``truncate`` drops unpublished ones"""
+    path = os.path.join(root, f"dict-{key}.jsonl")
+    values = []
+    if not os.path.isfile(path):
+        return values
+    with open(path, "rb") as f:
+        while len(values) < count:
+            line = f.readline()
+            if not line:
+                break
+            values.append(json.loads(line))
+        end = f.tell()
+    if truncate and os.path.getsize(path) > end:
+        os.truncate(path, end)
+    return values
+
+def _read_segment(root, fmt, segment, columns, lo, hi):
+    """Read rows [lo, hi) of the requested columns from one segment"""
+    keys = [COLUMN_KEYS[name] for name in columns]
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(os.path.join(root, f"{segment['name']}.parquet"), columns=keys)
+        table = table.slice(lo, hi - lo)
+        return {name: table.column(key).to_numpy() for name, key in zip(columns, keys)}
+    seg_dir = os.path.join(root, segment["name"])
+    return {name: np.array(np.load(os.path.join(seg_dir, f"{key}.npy"), mmap_mode="r")[lo:hi])
+            for name, key in zip(columns, keys)}
+
+
+class ColumnarLogReader:
+    """Read selected columns and row ranges from a ``ColumnarLogSink`` directory"""
+
+    def __init__(self, root=COLUMNAR_LOG_DIR):
+        self.root = root
+        self.manifest = _read_manifest(root)
+        if self.manifest is None:
+            raise FileNotFoundError(f"No columnar task log in {root}")
+        self.base_row = self.manifest.get("base_row", 0)  # rows dropped by retention before the first stored one
+        self.archived = self.manifest.get("archived", {})  # rotated CSV segment -> row it ended at
+        self._dictionaries = {}
+
+    def __len__(self):
+        return sum(segment["rows"] for segment in self.manifest["segments"])
+
+    def in_step_with(self, csv_path):
+        """True if the stored rows end exactly where the CSV at ``csv_path`` does (an O(1) watermark check)"""
+        watermark = self.manifest.get("watermark")
+        if not watermark:
+            return False
+        try:
+            stat = os.stat(csv_path)
+        except FileNotFoundError:
+            return watermark[0] is None
+        return watermark == [stat.st_ino, stat.st_size]
+
+    def categories(self, name):
+        """Decoded dictionary for a categorical column (codes index into it)"""
+        return self._categories(COLUMN_KEYS[name])
+
+    def _categories(self, key):
+        if key not in self._dictionaries:
+            count = self.manifest["dictionaries"].get(key, 0)
+            self._dictionaries[key] = _load_dictionary(self.root, key, count)
+        return self._dictionaries[key]
+
+    def read_arrays(self, columns=None, start=0, stop=None):
+        """Raw column arrays for rows [start, stop); categorical columns stay as codes"""
+        columns = list(columns or [name for name, _, _ in COLUMNS])
+        total = len(self)
+        start, stop, _ = slice(start, stop).indices(total)
+        parts = {name: [] for name in columns}
+        offset = 0
+        for segment in self.manifest["segments"]:
+            seg_lo, seg_hi = offset, offset + segment["rows"]
+            offset = seg_hi
+            if seg_hi <= start or seg_lo >= stop:
+                continue
+            lo, hi = max(start, seg_lo) - seg_lo, min(stop, seg_hi) - seg_lo
+            for name, values in _read_segment(self.root, self.manifest["format"], segment, columns, lo, hi).items():
+                parts[name].append(values)
+        return {name: np.concatenate(chunks) if chunks else np.array([]) for name, chunks in parts.items()}
+
+    def iter_segments(self, columns=None, start=0):
+        """Yield raw column arrays one segment at a time from row ``start``, for bounded-memory scans"""
+        columns = list(columns or [name for name, _, _ in COLUMNS])
+        offset = 0
+        for segment in self.manifest["segments"]:
+            lo = max(start - offset, 0)
+            offset += segment["rows"]
+            if lo < segment["rows"]:
+                yield _read_segment(self.root, self.manifest["format"], segment, columns, lo, segment["rows"])
+
+    def read(self, columns=None, start=0, stop=None):
+        """DataFrame with the CSV column names for rows [start, stop)"""
+        import pandas as pd
+
+        arrays = self.read_arrays(columns, start, stop)
+        data = {}
+        for name, values in arrays.items():
+            if COLUMN_KINDS[name] == "category":
+                categories = self._categories(COLUMN_KEYS[name])
+                data[name] = pd.Categorical.from_codes(values.astype(np.int32), categories=categories)
+            else:
+                data[name] = values
+        return pd.DataFrame(data, columns=list(arrays))
+
+    def tail(self, n=5, columns=None):
+        """Last ``n`` rows, touching only the segments that hold them"""
+        total = len(self)
+        return self.read(columns, max(total - n, 0), total)
+
+def columnar_dir_for(log_path):
+    """Columnar directory of a task-log CSV: ``<name>_columns/`` next to it (``COLUMNAR_LOG_DIR`` for the default log)"""
+    return os.path.join(os.path.dirname(log_path), os.path.splitext(os.path.basename(log_path))[0] + "_columns")
+
+def is_initialized(root=COLUMNAR_LOG_DIR):
+    """True once ``python -m agent.columnar_log init`` (or a sink) has created ``root``"""
+    return os.path.isfile(os.path.join(root, MANIFEST_NAME))
+
+def open_reader(root=COLUMNAR_LOG_DIR):
+    """Reader for ``root`` if a columnar log has been initialized there, else None"""
+    if not is_initialized(root):
+        return None
+    return ColumnarLogReader(root)
+
+def import_csv(csv_path, root=COLUMNAR_LOG_DIR, format="npy", chunksize=100_000):
+    """Backfill a columnar log from an existing task-log CSV, oldest archived segments first.
+
+    Segments already pruned from the archive are recorded as ending before
+    the first row (the summary keeps their aggregates); the live CSV is read
+    under its ``flock``, so the recorded watermark matches the rows imported.
+    """
+    import pandas as pd
+    from agent.log_archive import load_summary, segments
+
+    def copy(source):
+        count = 0
+        for chunk in pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunksize):
+            sink.write_columns({name: chunk[name].tolist() for name in chunk.columns if name in TASK_LOG_HEADER})
+            count += len(chunk)
+        return count
+
+    def mark_archived(names):
+        with sink._locked():
+            sink.manifest = _read_manifest(root)
+            for name in names:
+                sink._mark_archived(name)
+            sink._publish()
+
+    sink = ColumnarLogSink(root, format=format)
+    archived = segments(csv_path)
+    mark_archived(name for name in load_summary(csv_path)[1] if name not in archived)
+    rows = 0
+    for segment, segment_file in archived.items():
+        rows += copy(segment_file)
+        sink.flush()
+        mark_archived([segment])
+    try:
+        f = open(csv_path, "rb")
+    except FileNotFoundError:
+        sink.flush(watermark=(None, 0))
+        return rows
+    with f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        rows += copy(csv_path)
+        stat = os.fstat(f.fileno())
+        sink.flush(watermark=(stat.st_ino, stat.st_size))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the columnar task log")
+    parser.add_argument("command", choices=["init", "info"])
+    parser.add_argument("--csv", default=os.path.join("data", "task_log.csv"), help="task log CSV to backfill from")
+    parser.add_argument("--root", default=COLUMNAR_LOG_DIR)
+    parser.add_argument("--format", choices=["npy", "parquet"], default="npy")
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        if _read_manifest(args.root) is not None:
+            print(f"⚠️  Columnar log already initialized in {args.root}")
+            return 1
+        rows = import_csv(args.csv, args.root, args.format)
+        print(f"✅ Columnar log initialized in {args.root} ({rows:,} rows imported)")
+    else:
+        reader = ColumnarLogReader(args.root)
+        print(f"📦 {args.root}: {len(reader):,} rows in {len(reader.manifest['segments'])} "
+              f"{reader.manifest['format']} segment(s), {'in' if reader.in_step_with(args.csv) else 'out of'} "
+              f"step with {args.csv}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,11 @@
+from agent.intent_parser import OBJECT_INTENTS, VERB_INTENTS, tokenize
+
+POSITIVE_INPUTS = ("1", "y", "yes", "👍", "correct", "good", "right")
+NEGATIVE_INPUTS = ("2", "n", "no", "👎", "incorrect", "wrong", "bad")
+
+# Words that name an action without spelling it out, for the oracle's labels: the intent parser's own mappings
+ACTION_KEYWORDS = {**VERB_INTENTS, **OBJECT_INTENTS}
+
 def get_feedback():
     """Enhanced feedback system with clear 👍/👎 interface and real-time feedback loop"""
     print("\n" + "="*50)
@@ -12,12 +20,12 @@ def get_feedback():
         fb = input("Your feedback: ").strip().lower()
         
         # Positive feedback options
-        if fb in ("1", "y", "yes", "👍", "correct", "good", "right"):
+        if fb in POSITIVE_INPUTS:
             print("✅ Positive feedback recorded!")
             return "👍", None
         
         # Negative feedback options
-        elif fb in ("2", "n", "no", "👎", "incorrect", "wrong", "bad"):
+        elif fb in NEGATIVE_INPUTS:
             print("❌ Negative feedback recorded.")
             correction = input("💡 Suggest the correct action (optional): ").strip() or None
             if correction:
@@ -47,3 +55,112 @@ def get_confidence_score():
                 print("⚠️  Please enter a number between 1-10")
         except ValueError:
             print("⚠️  Please enter a valid number")
+
+def compute_reward(feedback, correction=None):
+    """Map 👍/👎 feedback to (reward, feedback text, suggestion) using the enhanced reward formula"""
+    if feedback == "👍":
+        return 2, "👍 Correct", ""
+    if feedback == "👎":
+        # Bonus reward if user provides correction
+        return (-1 if correction else -2), "👎 Incorrect", correction or "No suggestion provided"
+    return 0, "Neutral", "No feedback given"
+
+
+class FeedbackProvider:
+    """Source of feedback on the action the agent chose for a task.
+
+    Calling a provider with ``(task, intent, action)`` returns the same
+    ``(feedback, correction)`` pair as ``get_feedback``. ``interactive``
+    tells the caller whether a human is waiting on the other end.
+    """
+
+    interactive = False
+
+    def __call__(self, task, intent, action):
+        raise NotImplementedError
+
+
+class InteractiveFeedback(FeedbackProvider):
+    """Ask the user at the terminal (the classic CLI behaviour)"""
+
+    interactive = True
+
+    def __call__(self, task, intent, action):
+        return get_feedback()
+
+
+class ScriptedFeedback(FeedbackProvider):
+    """Replay feedback from a file, one answer per line.
+
+    Each line is a 👍/👎 answer in any form ``get_feedback`` accepts,
+    optionally followed by a correction (``👎 mute`` or ``n,mute``). Blank
+    lines and ``#`` comments are skipped; the script repeats when it runs out.
+    """
+
+    def __init__(self, path):
+        self.answers = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    self.answers.append(self.parse(line))
+        if not self.answers:
+            raise ValueError(f"{path} contains no feedback")
+        self.position = 0
+
+    @staticmethod
+    def parse(line):
+        answer, _, correction = line.replace(",", " ", 1).partition(" ")
+        answer = answer.lower()
+        if answer in POSITIVE_INPUTS:
+            return "👍", None
+        if answer in NEGATIVE_INPUTS:
+            return "👎", correction.strip() or None
+        raise ValueError(f"unrecognised feedback line: {line!r}")
+
+    def __call__(self, task, intent, action):
+        answer = self.answers[self.position % len(self.answers)]
+        self.position += 1
+        return answer
+
+
+def expected_action(task, actions):
+    """Best-guess correct action for a task: the first word naming an action, else None"""
+    for word in tokenize(task):
+        if word in actions:
+            return word
+        if ACTION_KEYWORDS.get(word) in actions:
+            return ACTION_KEYWORDS[word]
+    return None
+
+
+class OracleFeedback(FeedbackProvider):
+    """Simulated user who knows the correct action for every task.
+
+    Labels come from ``labels`` (task -> action) or ``expected_action``;
+    tasks without a label accept any action. ``noise`` is the chance of a
+    flipped answer, and wrong actions are corrected when ``corrections`` is set.
+    """
+
+    def __init__(self, actions, labels=None, noise=0.0, corrections=True, seed=None):
+        import random
+
+        self.actions = list(actions)
+        self.labels = dict(labels or {})
+        self.noise = noise
+        self.corrections = corrections
+        self.rng = random.Random(seed)
+
+    def label(self, task):
+        if task not in self.labels:
+            self.labels[task] = expected_action(task, self.actions)
+        return self.labels[task]
+
+    def __call__(self, task, intent, action):
+        expected = self.label(task)
+        correct = expected is None or action == expected
+        if self.noise and self.rng.random() < self.noise:
+            correct = not correct
+        if correct:
+            return "👍", None
+        return "👎", (expected if self.corrections else None)
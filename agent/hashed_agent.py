@@ -0,0 +1,280 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from agent.feedback import OracleFeedback, compute_reward
+from agent.intent_parser import tokenize
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+
+DEFAULT_FEATURES = 2 ** 16
+FEATURE_CACHE_SIZE = 65536
+
+
+def n_features_for(memory_mb, n_actions, itemsize=8):
+    """Largest power-of-two feature count whose weight matrix fits in ``memory_mb``"""
+    budget = int(memory_mb * 2 ** 20) // (n_actions * itemsize)
+    if budget < 1:
+        raise ValueError(f"{memory_mb} MB cannot hold even one feature for {n_actions} actions")
+    return 1 << (budget.bit_length() - 1)
+
+@lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def hashed_features(text, n_features):
+    """(indices, values) of the signed, hashed feature vector of a state text, memoized by text.
+
+    Features are a bias, the whole normalized text, every word and every
+    word bigram. Each is hashed with CRC-32 into ``n_features`` buckets
+    (a power of two) and signed by the top hash bit, so colliding features
+    tend to cancel instead of piling up. Values are scaled to unit length,
+    which makes one update move Q by ``alpha`` times the TD error, as in
+    the exact table.
+    """
+    words = tokenize(text)
+    names = ["bias", "=" + " ".join(words)] + words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    buckets = {}
+    for name in names:
+        h = zlib.crc32(name.encode("utf-8"))
+        index = h & (n_features - 1)
+        buckets[index] = buckets.get(index, 0.0) + (1.0 if h >> 31 else -1.0)
+    indices = np.fromiter(buckets, dtype=np.int64, count=len(buckets))
+    values = np.fromiter(buckets.values(), dtype=np.float64, count=len(buckets))
+    norm = np.sqrt(values @ values)
+    values = values / norm if norm else values
+    indices.flags.writeable = values.flags.writeable = False
+    return indices, values
+
+
+class HashedQLearningAgent:
+    """Q-learning with a linear Q-function over hashed text features, in fixed memory.
+
+    For state spaces that are unbounded (raw task texts):
+    ``Q(s, a) = x(s) . W[:, a]`` with ``x(s)`` from ``hashed_features`` and
+    ``W`` an ``n_features x n_actions`` array that never grows.
+    ``max_memory_mb`` picks the largest ``n_features`` that fits. Similar
+    texts share word features, so learning generalizes to texts never seen
+    before; unrelated states may collide, which is the price of the cap.
+
+    It has ``QLearningAgent``'s select/update/top-k/confidence/save methods
+    and runs ``run_simulation`` (``python -m agent.main --headless --agent
+    hashed``), but no exact table: code that reads ``agent.q`` (the
+    actor/learner split, ``SharedQLearningAgent``, replay) gets an
+    ``AttributeError`` saying so.
+    """
+
+    def __init__(self, actions, alpha=0.2, gamma=0.9, epsilon=0.2, n_features=DEFAULT_FEATURES, max_memory_mb=None,
+                 q_path="data/q_hashed.npz", seed=None):
+        self.actions = list(actions)
+        self.action_index = {action: i for i, action in enumerate(self.actions)}
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        if max_memory_mb is not None:
+            n_features = n_features_for(max_memory_mb, len(self.actions))
+        if n_features & (n_features - 1) or not 0 < n_features <= 2 ** 30:
+            raise ValueError("n_features must be a power of two up to 2**30")
+        self.n_features = n_features
+        self.weights = np.zeros((n_features, len(self.actions)))
+        self.q_path = q_path
+        self.rng = np.random.default_rng(seed)
+        self.load_q_table(q_path)
+
+    @property
+    def q(self):
+        raise AttributeError("HashedQLearningAgent has no exact Q-table (.q); use its select/update/q_values methods")
+
+    @property
+    def nbytes(self):
+        return self.weights.nbytes
+
+    def features(self, state):
+        return hashed_features(state, self.n_features)
+
+    def q_values(self, state):
+        """Q-value of every action for one state, as an array"""
+        indices, values = self.features(state)
+        return values @ self.weights[indices]
+
+    def q_matrix(self, states):
+        """(len(states), n_actions) Q-values of many states in one sparse product"""
+        indices, values, starts = self._batch_features(states)
+        return np.add.reduceat(self.weights[indices] * values[:, None], starts, axis=0)
+
+    def _batch_features(self, states):
+        features = [self.features(state) for state in states]
+        lengths = np.fromiter((len(i) for i, _ in features), dtype=np.int64, count=len(features))
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        indices = np.concatenate([i for i, _ in features])
+        values = np.concatenate([v for _, v in features])
+        return indices, values, starts
+
+    def select_action(self, state):
+        if random.random() < self.epsilon:
+            return random.choice(self.actions)
+        return self.actions[int(np.argmax(self.q_values(state)))]
+
+    def update_q_table(self, state, action, reward, next_state):
+        indices, values = self.features(state)
+        aid = self.action_index[action]
+        q = values @ self.weights[indices, aid]
+        next_max = self.q_values(next_state).max()
+        self.weights[indices, aid] += self.alpha * (reward + self.gamma * next_max - q) * values
+
+    def select_actions(self, states):
+        """Epsilon-greedy actions for a batch of states, drawn like ``QLearningAgent.select_actions``"""
+        draws = self.rng.random((2, len(states)))
+        chosen = np.argmax(self.q_matrix(states), axis=1)
+        explore = draws[0] < self.epsilon
+        chosen[explore] = (draws[1][explore] * len(self.actions)).astype(np.int64)
+        return [self.actions[aid] for aid in chosen.tolist()]
+
+    def update_batch(self, states, actions, rewards, next_states):
+        """Sparse, vectorized Q-learning updates for a batch of transitions.
+
+        TD targets use the weights before the batch. Each weight cell moves
+        by ``alpha`` times the mean of the gradients that touch it, so a
+        batch repeating one state moves it once, as ``update_batch`` does
+        for the exact table. Returns the per-transition TD errors.
+        """
+        aids = np.fromiter((self.action_index[a] for a in actions), dtype=np.int64, count=len(actions))
+        indices, values, starts = self._batch_features(states)
+        rows = np.repeat(np.arange(len(states)), np.diff(np.append(starts, len(indices))))
+        q = np.add.reduceat(self.weights[indices, aids[rows]] * values, starts)
+        td = np.asarray(rewards, dtype=np.float64) + self.gamma * self.q_matrix(next_states).max(axis=1) - q
+        cells, inverse, counts = np.unique(indices * len(self.actions) + aids[rows], return_inverse=True,
+                                           return_counts=True)
+        step = np.bincount(inverse, weights=td[rows] * values, minlength=len(cells)) / counts
+        self.weights.reshape(-1)[cells] += self.alpha * step
+        return td
+
+    def top_actions(self, state, k=2):
+        """Get top k actions for a given state, sorted by Q-value"""
+        q = self.q_values(state)
+        return [(self.actions[aid], float(q[aid])) for aid in np.argsort(-q, kind="stable")[:k]]
+
+    def get_next_best_action(self, state):
+        """Get the next best action suggestion (second highest Q-value)"""
+        top_actions = self.top_actions(state, k=2)
+        return top_actions[-1][0] if top_actions else random.choice(self.actions)
+
+    def get_action_confidence(self, state, action):
+        """Get confidence score for a specific state-action pair"""
+        q = self.q_values(state)
+        max_q, min_q = float(q.max()), float(q.min())
+        if max_q == min_q:
+            return 0.5
+        action_q = float(q[self.action_index[action]]) if action in self.action_index else 0
+        return round((action_q - min_q) / (max_q - min_q), 2)
+
+    def save_q_table(self, path=None):
+        """Atomically write the weights (a fixed size, whatever the number of states seen)"""
+        path = path or self.q_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez(tmp, weights=self.weights, actions=np.array(self.actions))
+        os.replace(tmp, path)
+
+    def checkpoint(self, path=None):
+        self.save_q_table(path)
+
+    def load_q_table(self, path=None):
+        """Load saved weights; columns are matched by action name and a differing feature count is refused"""
+        path = path or self.q_path
+        if not path or not os.path.exists(path):
+            return
+        with np.load(path) as saved:
+            weights, actions = saved["weights"], saved["actions"].tolist()
+        if weights.shape[0] != self.n_features:
+            raise ValueError(f"{path} has {weights.shape[0]} features, this agent uses {self.n_features}")
+        for column, action in enumerate(actions):
+            if action in self.action_index:
+                self.weights[:, self.action_index[action]] = weights[:, column]
+
+def table_nbytes(agent):
+    """Approximate memory of an exact ``QLearningAgent``'s table: values plus the state index"""
+    q = agent.q
+    return q.values.nbytes + sys.getsizeof(q.state_index) + sys.getsizeof(q.states) \
+        + sum(sys.getsizeof(state) for state in q.states)
+
+def free_text_tasks(n, unique=0.8, seed=0):
+    """Task texts from verb/object templates where a ``unique`` share name one-off items (files, tracks, ids)"""
+    rng = random.Random(seed)
+    verbs = ["Open", "Check", "Mute", "Unmute", "Play", "Close", "Take", "Set", "Launch", "Start"]
+    objects = ["calendar", "gmail", "audio", "screenshot", "dnd", "music", "report", "browser", "video", "podcast",
+               "timer", "notes", "slack", "zoom call", "playlist"]
+    tasks = []
+    for _ in range(n):
+        task = f"{rng.choice(verbs)} {rng.choice(objects)}"
+        if rng.random() < unique:
+            task += f" {rng.choice(['file', 'track', 'item', 'ticket'])}_{rng.randrange(10 ** 7)}"
+        tasks.append(task)
+    return tasks
+
+def compare(n_tasks=50_000, n_features=DEFAULT_FEATURES, held_out=2_000, seed=0):
+    """Online learning on free-text tasks with an exact table vs a hashed agent.
+
+    Both see the same stream (most texts occur once) and an oracle user.
+    Reports memory, on-disk size, steps/sec, online greedy accuracy over
+    the last fifth of the stream and greedy accuracy on unseen texts.
+    """
+    tasks = free_text_tasks(n_tasks + held_out, seed=seed)
+    stream, unseen = tasks[:n_tasks], tasks[n_tasks:]
+    provider = OracleFeedback(DEFAULT_ACTIONS)
+    agents = {
+        "exact table": QLearningAgent(DEFAULT_ACTIONS, q_path="", seed=seed),
+        f"hashed (2^{n_features.bit_length() - 1})": HashedQLearningAgent(DEFAULT_ACTIONS, n_features=n_features,
+                                                                         q_path="", seed=seed),
+    }
+    directory = tempfile.mkdtemp(prefix="rl-hashed-")
+    results = []
+    try:
+        for name, agent in agents.items():
+            random.seed(seed)
+            correct = np.zeros(n_tasks, dtype=bool)
+            start = time.perf_counter()
+            for i, task in enumerate(stream):
+                label = provider.label(task)
+                correct[i] = label is None or agent.top_actions(task, 1)[0][0] == label
+                action = agent.select_action(task)
+                reward, _, _ = compute_reward(*provider(task, task, action))
+                agent.update_q_table(task, action, reward, task)
+            elapsed = time.perf_counter() - start
+
+            nbytes = table_nbytes(agent) if isinstance(agent, QLearningAgent) else agent.nbytes
+            path = os.path.join(directory, "exact.qsnap" if isinstance(agent, QLearningAgent) else "hashed.npz")
+            agent.save_q_table(path)
+            labels = [provider.label(task) for task in unseen]
+            generalization = np.mean([label is None or agent.top_actions(task, 1)[0][0] == label
+                                      for task, label in zip(unseen, labels)])
+            results.append({"agent": name, "memory_mb": nbytes / 2 ** 20, "file_mb": os.path.getsize(path) / 2 ** 20,
+                            "steps_per_sec": n_tasks / elapsed, "online_accuracy": correct[-n_tasks // 5:].mean(),
+                            "unseen_accuracy": generalization})
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the exact Q-table with the hashed linear agent")
+    parser.add_argument("--tasks", type=int, default=50_000, help="length of the free-text training stream")
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES, help="hashed feature count (power of two)")
+    parser.add_argument("--max-memory-mb", type=float, help="derive --features from a memory cap instead")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    n_features = n_features_for(args.max_memory_mb, len(DEFAULT_ACTIONS)) if args.max_memory_mb else args.features
+    print(f"{'agent':<16} {'memory':>9} {'on disk':>9} {'steps/s':>9} {'online acc':>11} {'unseen acc':>11}")
+    for r in compare(args.tasks, n_features, seed=args.seed):
+        print(f"{r['agent']:<16} {r['memory_mb']:>7.2f}MB {r['file_mb']:>7.2f}MB {r['steps_per_sec']:>9,.0f} "
+              f"{r['online_accuracy']:>11.1%} {r['unseen_accuracy']:>11.1%}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,232 @@
+import bisect
+import cProfile
+import functools
+import importlib
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Hot paths wrapped by ``enable()``: (module, attribute path, metric label)
+HOT_PATHS = [
+    ("agent.q_learning", "QLearningAgent.select_action", "select_action"),
+    ("agent.q_learning", "QLearningAgent.update_q_table", "update_q_table"),
+    ("agent.q_learning", "QLearningAgent.update_batch", "update_batch"),
+    ("agent.q_learning", "QLearningAgent.checkpoint", "checkpoint"),
+    ("agent.shared_agent", "SharedQLearningAgent.select_action", "select_action"),
+    ("agent.shared_agent", "SharedQLearningAgent.update_q_table", "update_q_table"),
+    ("agent.logger", "TaskLogger.log_episode", "log_episode"),
+    ("agent.logger", "BufferedCSVWriter.flush", "log_flush"),
+    ("agent.visualizer", "plot_rewards", "plot_rewards"),
+    ("agent.visualizer", "create_performance_dashboard", "create_performance_dashboard"),
+]
+# Latency bucket upper bounds in seconds (1 µs .. 10 s, three per decade)
+BUCKETS = [float(f"{m}e{e}") for e in range(-6, 1) for m in (1, 2.5, 5)] + [10.0]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout"""
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + [float("inf")], self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Thread-safe named counters and latency histograms"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: {
+                        "count": h.count,
+                        "sum_seconds": h.sum,
+                        "mean_seconds": h.sum / h.count if h.count else 0.0,
+                        "p50_seconds": h.quantile(0.5),
+                        "p99_seconds": h.quantile(0.99),
+                        "buckets": dict(zip([str(b) for b in h.bounds] + ["+Inf"], h.counts)),
+                    }
+                    for name, h in self.histograms.items()
+                },
+            }
+
+    def to_prometheus(self, prefix="rl_agent"):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            if self.counters:
+                lines.append(f"# TYPE {prefix}_events_total counter")
+                for name, value in sorted(self.counters.items()):
+                    lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+            if self.histograms:
+                lines.append(f"# TYPE {prefix}_call_seconds histogram")
+                for name, h in sorted(self.histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.bounds + ["+Inf"], h.counts):
+                        cumulative += count
+                        lines.append(f'{prefix}_call_seconds_bucket{{fn="{name}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{prefix}_call_seconds_sum{{fn="{name}"}} {h.sum:.9f}')
+                    lines.append(f'{prefix}_call_seconds_count{{fn="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the metrics atomically; ``.json`` paths get JSON, anything else Prometheus text"""
+        text = json.dumps(self.to_dict(), indent=2) if path.endswith(".json") else self.to_prometheus()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def summary(self):
+        """One line per instrumented function (calls, total, mean and p99), then one per counter"""
+        snapshot = self.to_dict()
+        rows = []
+        for name, h in sorted(snapshot["histograms"].items(), key=lambda kv: -kv[1]["sum_seconds"]):
+            rows.append(f"   {name:<28} {h['count']:>9,} calls  {h['sum_seconds']:>8.3f}s total  "
+                        f"{h['mean_seconds'] * 1e6:>9.1f} µs mean  p99 ≤ {h['p99_seconds'] * 1e6:,.0f} µs")
+        for name, value in sorted(snapshot["counters"].items()):
+            rows.append(f"   {name:<28} {value:>9,}")
+        return "\n".join(rows)
+
+
+metrics = Metrics()
+_originals = {}
+
+def timed(name, func, registry=metrics):
+    """``func`` wrapped to count its calls and record their latency under ``name``"""
+    clock = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registry.observe(name, clock() - start)
+
+    return wrapper
+
+def _resolve(module_name, path):
+    owner = importlib.import_module(module_name)
+    *parents, attr = path.split(".")
+    for parent in parents:
+        owner = getattr(owner, parent)
+    return owner, attr
+
+def enable(hot_paths=HOT_PATHS):
+    """Wrap the hot paths with timers.
+
+    Instrumentation works by patching, so while it is disabled the agent
+    runs its original, unwrapped functions and pays nothing. Module-level
+    functions are also rebound in ``agent.*`` (and ``__main__``) modules
+    that imported them by name.
+    """
+    for module_name, path, name in hot_paths:
+        if (module_name, path) in _originals:
+            continue
+        owner, attr = _resolve(module_name, path)
+        original = owner.__dict__[attr]
+        wrapper = timed(name, original)
+        setattr(owner, attr, wrapper)
+        rebound = []
+        if isinstance(owner, type(sys)):
+            for module in list(sys.modules.values()):
+                if getattr(module, "__name__", "").startswith(("agent.", "__main__")) and module is not owner \
+                        and getattr(module, attr, None) is original:
+                    setattr(module, attr, wrapper)
+                    rebound.append(module)
+        _originals[(module_name, path)] = (owner, attr, original, rebound)
+
+def disable():
+    """Restore every patched function"""
+    for owner, attr, original, rebound in _originals.values():
+        setattr(owner, attr, original)
+        for module in rebound:
+            setattr(module, attr, original)
+    _originals.clear()
+
+def is_enabled():
+    return bool(_originals)
+
+@contextmanager
+def profile(output_path=None, top=20):
+    """cProfile the block; dump stats to ``output_path`` and print the ``top`` functions by cumulative time"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if output_path:
+            profiler.dump_stats(output_path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        print(out.getvalue())
+
+@contextmanager
+def trace_memory(top=10):
+    """tracemalloc the block and print the ``top`` allocation sites still holding memory"""
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        print(f"🧠 Traced memory: {current / 1e6:.1f} MB current, {peak / 1e6:.1f} MB peak")
+        for stat in after.compare_to(before, "lineno")[:top]:
+            print(f"   {stat}")
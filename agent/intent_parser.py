@@ -0,0 +1,180 @@
+import argparse
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
+# Verbs that mean the same thing as a canonical intent
+VERB_INTENTS = {
+    "check": "open", "launch": "open", "show": "open", "view": "open", "start": "open",
+    "quit": "close", "exit": "close", "stop": "close",
+    "silence": "mute",
+    "resume": "play", "listen": "play", "watch": "play",
+    "capture": "screenshot",
+}
+# Verbs too generic to be an intent on their own; the object decides when it names one
+LIGHT_VERBS = {"take", "set", "turn", "do", "enable", "activate"}
+OBJECT_INTENTS = {"screenshot": "screenshot", "photo": "screenshot", "dnd": "set_dnd", "disturb": "set_dnd"}
+
+INTENT_CACHE_SIZE = 65536
+_WORD = re.compile(r"[a-z0-9_']+")
+
+
+def tokenize(text):
+    """Lower-cased words of a text, split the way ``parse_intent`` splits tasks"""
+    return _WORD.findall(text.lower())
+
+@lru_cache(maxsize=INTENT_CACHE_SIZE)
+def parse_intent(task):
+    """Normalized intent (the agent's state) for a raw task text, memoized by text.
+
+    The first word is the intent, mapped through ``VERB_INTENTS``; for light
+    verbs such as "take" or "set" the first object word found in
+    ``OBJECT_INTENTS`` wins ("Take screenshot" -> "screenshot",
+    "Set DND" -> "set_dnd"). Empty text parses to "".
+    """
+    words = tokenize(task)
+    if not words:
+        return ""
+    verb = words[0]
+    if verb in LIGHT_VERBS:
+        for word in words[1:]:
+            if word in OBJECT_INTENTS:
+                return OBJECT_INTENTS[word]
+        return verb
+    return VERB_INTENTS.get(verb, verb)
+
+
+class TaskIntentIndex:
+    """Intents and Q-table state ids for a task list, computed once at load time.
+
+    ``intents[i]`` and ``state_ids[i]`` belong to task ``i``; state ids
+    are interned in ``table`` (a ``QTable``) when one is given, and stay
+    valid for that table's lifetime. Equal intents share one string, and
+    with ``keep_tasks=False`` the task texts are not kept either, so an
+    index over a streamed task file costs a few bytes per task. ``extend``
+    and ``sync`` add tasks as the file grows.
+    """
+
+    def __init__(self, tasks=(), table=None, keep_tasks=True):
+        self.table = table
+        self.tasks = [] if keep_tasks else None
+        self.intents = []
+        self.state_ids = np.zeros(0, dtype=np.int64) if table is not None else None
+        self._interned = {}
+        self._signature = None
+        self._lock = threading.Lock()
+        self.extend(tasks)
+
+    def __len__(self):
+        return len(self.intents)
+
+    def __getitem__(self, i):
+        return self.intents[i]
+
+    def extend(self, tasks):
+        """Parse and append more tasks; returns how many were added"""
+        added = []
+        for task in tasks:
+            intent = parse_intent(task)
+            added.append(self._interned.setdefault(intent, intent))
+            if self.tasks is not None:
+                self.tasks.append(task)
+        self.intents.extend(added)
+        if self.table is not None and added:
+            self.state_ids = np.concatenate([self.state_ids, self.table.state_ids(added)])
+        return len(added)
+
+    def sync(self, source):
+        """Catch up with an indexed ``TaskSource``, parsing only the tasks added since the last sync.
+
+        Starts over when the source's files were replaced or shrank. Safe
+        to call from several threads.
+        """
+        with self._lock:
+            signature = [index.inode for index in source.indexes]
+            count = len(source)
+            if signature != self._signature or count < len(self):
+                # Rebuilt aside and swapped in, so readers never see a half-built index
+                fresh = TaskIntentIndex(islice(source.tasks(), count), self.table, self.tasks is not None)
+                self.tasks, self.intents, self.state_ids, self._interned = (
+                    fresh.tasks, fresh.intents, fresh.state_ids, fresh._interned)
+                self._signature = signature
+                return count
+            return self.extend(islice(source.tasks(start=len(self)), count - len(self)))
+
+    def unique_intents(self):
+        return list(self._interned)
+
+def synthetic_tasks(n, seed=0, distinct=False):
+    """Task texts drawn from verb/object templates, with the repetition of a real log.
+
+    With ``distinct`` every text gets its own suffix (as file names and
+    times make real tasks unique), so the texts outnumber the parse cache.
+    """
+    rng = random.Random(seed)
+    if distinct:
+        return [f"{task} #{k}" for k, task in enumerate(synthetic_tasks(n, seed))]
+    verbs = ["Open", "Check", "Mute", "Unmute", "Play", "Close", "Take", "Set", "Screenshot", "Launch", "Watch"]
+    objects = ["calendar", "Gmail", "audio", "screenshot", "DND", "music", "report.docx", "browser", "video",
+               "podcast", "timer for 30 minutes", "file manager", "notifications", "desktop", "alarm"]
+    return [f"{rng.choice(verbs)} {rng.choice(objects)}" for _ in range(n)]
+
+def benchmark(n_tasks=100_000, episodes=10, seed=0, distinct=False):
+    """Seconds to look up every task's intent, by task number, for ``episodes`` passes, three ways.
+
+    Each way stores the intent of task ``i`` into the same output slot, as
+    the CLI and web app do before choosing an action; the index timing
+    includes building it.
+    """
+    tasks = synthetic_tasks(n_tasks, seed, distinct)
+    out = [None] * n_tasks
+    timings = {}
+
+    start = time.perf_counter()
+    for _ in range(episodes):
+        for i, task in enumerate(tasks):
+            out[i] = task.lower().split()[0]
+    timings["split per task"] = time.perf_counter() - start
+    naive_states = len(set(out))
+
+    parse_intent.cache_clear()
+    start = time.perf_counter()
+    for _ in range(episodes):
+        for i, task in enumerate(tasks):
+            out[i] = parse_intent(task)
+    timings["lru parse per task"] = time.perf_counter() - start
+
+    parse_intent.cache_clear()
+    start = time.perf_counter()
+    index = TaskIntentIndex(tasks, keep_tasks=False)
+    for _ in range(episodes):
+        for i in range(n_tasks):
+            out[i] = index[i]
+    timings["index built once"] = time.perf_counter() - start
+
+    return timings, naive_states, len(index.unique_intents())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark intent parsing over a synthetic task corpus")
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--distinct", action="store_true",
+                        help=f"make every task text unique (more texts than the {INTENT_CACHE_SIZE:,}-entry parse cache)")
+    args = parser.parse_args(argv)
+
+    timings, naive_states, states = benchmark(args.tasks, args.episodes, distinct=args.distinct)
+    lookups = args.tasks * args.episodes
+    kind = "distinct" if args.distinct else "repeating"
+    print(f"🧩 {args.tasks:,} {kind} tasks x {args.episodes} episodes ({lookups:,} intent lookups)")
+    for name, seconds in timings.items():
+        print(f"   {name:<20} {seconds:>7.3f}s  {lookups / seconds / 1e6:>6.1f}M lookups/sec")
+    print(f"📉 Distinct states: {naive_states} with first-word intents, {states} normalized")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
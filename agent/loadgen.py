@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+from agent.task_source import load_tasks
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 client connection"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host, port, unix_path=None):
+        if unix_path:
+            return cls(*await asyncio.open_unix_connection(unix_path))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def post(self, path, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+async def _client(conn, tasks, deadline, latencies, errors, rng):
+    while time.perf_counter() < deadline:
+        task = rng.choice(tasks)
+        start = time.perf_counter()
+        status, selected = await conn.post("/select", {"task": task})
+        latencies["select"].append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+            continue
+        feedback = "👍" if rng.random() < 0.6 else "👎"
+        start = time.perf_counter()
+        status, _ = await conn.post("/feedback", {"intent": selected["intent"], "action": selected["action"],
+                                                  "feedback": feedback})
+        latencies["feedback"].append(time.perf_counter() - start)
+        if status != 202:
+            errors.append(status)
+
+async def run_load(tasks, host="127.0.0.1", port=8765, unix_path=None, concurrency=32, duration=10.0, seed=0):
+    """Drive the feedback server with ``concurrency`` keep-alive clients for ``duration`` seconds"""
+    conns = [await _Connection.open(host, port, unix_path) for _ in range(concurrency)]
+    latencies = {"select": [], "feedback": []}
+    errors = []
+    start = time.perf_counter()
+    deadline = start + duration
+    try:
+        await asyncio.gather(*(_client(conn, tasks, deadline, latencies, errors, random.Random(seed + i))
+                               for i, conn in enumerate(conns)))
+    finally:
+        for conn in conns:
+            conn.close()
+    elapsed = time.perf_counter() - start
+
+    report = {"concurrency": concurrency, "seconds": elapsed, "errors": len(errors)}
+    total = 0
+    for endpoint, samples in latencies.items():
+        samples = np.asarray(samples) * 1000
+        total += samples.size
+        report[endpoint] = {
+            "requests": int(samples.size),
+            "p50_ms": float(np.percentile(samples, 50)) if samples.size else None,
+            "p99_ms": float(np.percentile(samples, 99)) if samples.size else None,
+        }
+    report["requests_per_sec"] = total / elapsed
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for agent.server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--tasks", default="data/task_log.txt", help="task file to draw requests from")
+    args = parser.parse_args(argv)
+
+    tasks = load_tasks(args.tasks)
+    report = asyncio.run(run_load(tasks, args.host, args.port, args.unix, args.concurrency, args.duration))
+
+    print(f"🚀 {report['requests_per_sec']:,.0f} requests/sec over {report['seconds']:.1f}s "
+          f"with {report['concurrency']} clients ({report['errors']} errors)")
+    for endpoint in ("select", "feedback"):
+        r = report[endpoint]
+        if r["requests"]:
+            print(f"   /{endpoint:<9} {r['requests']:>8,} requests   p50 {r['p50_ms']:.2f} ms   p99 {r['p99_ms']:.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,389 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+
+from agent.columnar_log import ColumnarLogSink, columnar_dir_for, is_initialized
+from agent.log_stats import IncrementalLogCache, LogAggregate, aggregate_columnar, aggregate_log
+from agent.logger import TASK_LOG_HEADER, BufferedCSVWriter
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+TASK_LOG = os.path.join("data", "task_log.csv")
+EPISODE_LOG = os.path.join("data", "episode_log.txt")
+DEFAULT_MAX_BYTES = 64 << 20
+DEFAULT_MAX_AGE = timedelta(days=1)
+DEFAULT_KEEP = timedelta(days=30)
+_STAMP = "%Y%m%dT%H%M%S%f"
+
+
+def archive_dir_for(path):
+    """Archive directory of a live log: ``archive/`` next to it"""
+    return os.path.join(os.path.dirname(path) or ".", "archive")
+
+def summary_path(path, archive_dir=None):
+    return os.path.join(archive_dir or archive_dir_for(path), os.path.basename(path) + ".summary.json")
+
+def segments(path, archive_dir=None):
+    """{segment name: file} of the archived segments of ``path``, oldest first.
+
+    A segment is named ``<log name>.<timestamp>`` and stored gzip-compressed
+    as ``<name>.gz``; a plain file is one rotated but not yet compressed.
+    """
+    archive_dir = archive_dir or archive_dir_for(path)
+    pattern = re.compile(re.escape(os.path.basename(path)) + r"\.(\d{8}T\d{12})(\.gz)?$")
+    found = {}
+    try:
+        names = os.listdir(archive_dir)
+    except FileNotFoundError:
+        return found
+    for name in sorted(names):
+        match = pattern.match(name)
+        if match:
+            segment = name[:-3] if match.group(2) else name
+            # a leftover plain file next to its finished .gz lost the race with compress(); the .gz wins
+            if match.group(2) or segment not in found:
+                found[segment] = os.path.join(archive_dir, name)
+    return dict(sorted(found.items()))
+
+def segment_time(segment):
+    return datetime.strptime(segment.rsplit(".", 1)[1], _STAMP)
+
+def first_timestamp(path):
+    """Timestamp of the first data row of a log with a ``Timestamp`` column, or None"""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header, row = next(reader, None), next(reader, None)
+    if not header or not row or "Timestamp" not in header:
+        return None
+    try:
+        return datetime.fromisoformat(row[header.index("Timestamp")])
+    except (IndexError, ValueError):
+        return None
+
+def is_due(path, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE, now=None):
+    """True when the live log has rows and is over ``max_bytes`` or its first row is older than ``max_age``"""
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return False
+    with open(path, "rb") as f:
+        if len(f.readline()) >= size:  # header only
+            return False
+    if max_bytes and size >= max_bytes:
+        return True
+    if max_age:
+        started = first_timestamp(path)
+        return started is not None and (now or datetime.now()) - started >= max_age
+    return False
+
+def rotate(path, archive_dir=None, now=None):
+    """Move the live log into the archive; returns the segment's file.
+
+    The rename happens under the same ``flock`` ``BufferedCSVWriter`` takes
+    for each flush, and writers check the inode under that lock, so no row
+    lands in the segment afterwards: the next flush creates a new live file
+    (with its header) at ``path``. The log's columnar copy, if any, records
+    the row the segment ends at under the same lock.
+    """
+    archive_dir = archive_dir or archive_dir_for(path)
+    os.makedirs(archive_dir, exist_ok=True)
+    target = os.path.join(archive_dir, f"{os.path.basename(path)}.{(now or datetime.now()).strftime(_STAMP)}")
+    with open(path, "rb") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        os.rename(path, target)
+        if is_initialized(columnar_dir_for(path)):
+            stat = os.fstat(f.fileno())
+            ColumnarLogSink(columnar_dir_for(path)).rotated(os.path.basename(target), (stat.st_ino, stat.st_size))
+    return target
+
+def compress(segment_file):
+    """Gzip a rotated segment in place (``<file>.gz``, written atomically); returns the new file"""
+    target = segment_file + ".gz"
+    with open(segment_file, "rb") as src, gzip.open(target + ".tmp", "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(target + ".tmp", target)
+    os.remove(segment_file)
+    return target
+
+def _open_segment(segment_file):
+    return gzip.open(segment_file, "rb") if segment_file.endswith(".gz") else open(segment_file, "rb")
+
+def aggregate_segment(segment_file, max_points=2000, block_size=4 << 20):
+    """``LogAggregate`` of one archived task-log segment, streamed block by block"""
+    aggregate = LogAggregate(max_points=max_points)
+    with _open_segment(segment_file) as f:
+        f.readline()  # header
+        carry = b""
+        while True:
+            block = f.read(block_size)
+            data = carry + block
+            end = data.rfind(b"\n") + 1 if block else len(data)
+            if end:
+                aggregate.add_rows(list(csv.reader(io.StringIO(data[:end].decode("utf-8"), newline=""))))
+            carry = data[end:]
+            if not block:
+                break
+    return aggregate
+
+def load_summary(path, archive_dir=None):
+    """(aggregate, compacted segment names) of the rows already rolled into the summary"""
+    try:
+        with open(summary_path(path, archive_dir)) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return LogAggregate(), []
+    return LogAggregate.from_dict(data["aggregate"]), data["segments"]
+
+def compact(path, archive_dir=None):
+    """Roll every archived task-log segment not yet compacted into the summary tables.
+
+    The summary (per-intent reward sums and counts, per-action and
+    per-feedback counts, the bucketed reward series and the last rows) is
+    rewritten atomically together with the list of segments it covers, so
+    running the job twice, or crashing halfway, never counts a row twice.
+    Returns the number of segments added.
+    """
+    aggregate, compacted = load_summary(path, archive_dir)
+    pending = [(name, f) for name, f in segments(path, archive_dir).items() if name not in set(compacted)]
+    if not pending:
+        return 0
+    for name, segment_file in pending:
+        aggregate.merge(aggregate_segment(segment_file, aggregate.rewards.max_points))
+        compacted.append(name)
+    target = summary_path(path, archive_dir)
+    with open(target + ".tmp", "w") as f:
+        json.dump({"segments": compacted, "aggregate": aggregate.to_dict()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(target + ".tmp", target)
+    return len(pending)
+
+def prune(path, archive_dir=None, keep=DEFAULT_KEEP, now=None, compacted_only=True):
+    """Delete archived segments older than ``keep``; only compacted ones unless ``compacted_only`` is False.
+
+    Their rows are dropped from the log's columnar copy too, if it has one.
+    """
+    _, compacted = load_summary(path, archive_dir) if compacted_only else (None, None)
+    cutoff = (now or datetime.now()) - keep
+    removed = []
+    for name, segment_file in segments(path, archive_dir).items():
+        if segment_time(name) < cutoff and (compacted is None or name in compacted):
+            os.remove(segment_file)
+            removed.append(name)
+    if removed and is_initialized(columnar_dir_for(path)):
+        ColumnarLogSink(columnar_dir_for(path)).drop_archived(removed)
+    return len(removed)
+
+def maintain(path, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE, keep=DEFAULT_KEEP, summarize=True,
+             archive_dir=None, now=None):
+    """Rotate ``path`` if due, compress rotated segments, compact them (task logs) and apply retention"""
+    report = {"rotated": None, "compressed": 0, "compacted": 0, "pruned": 0}
+    if is_due(path, max_bytes, max_age, now):
+        report["rotated"] = rotate(path, archive_dir, now)
+    for segment_file in segments(path, archive_dir).values():
+        if not segment_file.endswith(".gz"):
+            compress(segment_file)
+            report["compressed"] += 1
+    if summarize:
+        report["compacted"] = compact(path, archive_dir)
+    if keep is not None:
+        report["pruned"] = prune(path, archive_dir, keep, now, compacted_only=summarize)
+    return report
+
+
+class ArchivedLogCache:
+    """``IncrementalLogCache`` of the live task log, merged with its archive.
+
+    Rows rolled into the summary cost one small JSON read when the summary
+    changes; segments rotated but not compacted yet are aggregated once
+    each; the live segment is parsed incrementally. Dashboard refreshes are
+    therefore bounded by the live segment, however long the log's history.
+    Exposes the same ``refresh``/``aggregate``/``recent_frame`` interface.
+    """
+
+    def __init__(self, path, archive_dir=None, recent_rows=5):
+        self.path = path
+        self.archive_dir = archive_dir or archive_dir_for(path)
+        self.live = IncrementalLogCache(path, recent_rows)
+        self._lock = threading.Lock()
+        self._summary = None
+        self._summary_signature = None
+        self._compacted = []
+        self._pending = {}  # segment name -> LogAggregate of segments not compacted yet
+        self._merged = None
+        self._merged_live = None  # (live aggregate, its row count) that _merged includes
+
+    @property
+    def header(self):
+        return self.live.header
+
+    def refresh(self):
+        """Pick up a new summary, newly rotated segments and appended rows; returns rows added to the live view"""
+        with self._lock:
+            changed = self._refresh_summary()
+            pending = {name: f for name, f in segments(self.path, self.archive_dir).items()
+                       if name not in set(self._compacted)}
+            for name in set(self._pending) - set(pending):
+                del self._pending[name]
+                changed = True
+            for name, segment_file in pending.items():
+                if name not in self._pending:
+                    try:
+                        self._pending[name] = aggregate_segment(segment_file)
+                    except FileNotFoundError:  # compressed or compacted meanwhile; next refresh sees it
+                        continue
+                    changed = True
+            added = self.live.refresh()
+            if changed:
+                self._merged = None
+            return added
+
+    def _refresh_summary(self):
+        target = summary_path(self.path, self.archive_dir)
+        try:
+            st = os.stat(target)
+            signature = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._summary_signature:
+            return False
+        self._summary_signature = signature
+        self._summary, self._compacted = load_summary(self.path, self.archive_dir)
+        self._summary = self._summary.to_dict()
+        return True
+
+    @property
+    def aggregate(self):
+        """Summary, then pending segments in rotation order, then the live segment"""
+        with self._lock:
+            live = (self.live.aggregate, self.live.aggregate.rows)
+            if self._merged is None or self._merged_live[0] is not live[0] or self._merged_live[1] != live[1]:
+                merged = LogAggregate.from_dict(self._summary) if self._summary else LogAggregate()
+                for name in sorted(self._pending):
+                    merged.merge(self._pending[name])
+                self._merged = merged.merge(live[0])
+                self._merged_live = live
+            return self._merged
+
+    def recent_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(list(self.aggregate.recent), columns=self.header[:len(TASK_LOG_HEADER)])
+
+def aggregate_archived(path, archive_dir=None, workers=1, max_points=2000):
+    """``aggregate_log`` of the live task log merged with its summary and uncompacted segments"""
+    aggregate, compacted = load_summary(path, archive_dir)
+    for name, segment_file in segments(path, archive_dir).items():
+        if name not in compacted:
+            aggregate.merge(aggregate_segment(segment_file, max_points))
+    if os.path.exists(path):
+        aggregate.merge(aggregate_log(path, workers, max_points))
+    return aggregate
+
+def aggregate_columnar_archived(path, reader, archive_dir=None):
+    """``aggregate_archived`` with the rows after the summary read from a ``ColumnarLogReader``.
+
+    Returns None (read the CSV instead) unless ``reader`` is in step with
+    the live log and still holds every row the summary does not cover.
+    """
+    if not reader.in_step_with(path):
+        return None
+    aggregate, compacted = load_summary(path, archive_dir)
+    start = reader.archived.get(compacted[-1]) if compacted else 0
+    if start is None or start < reader.base_row:
+        return None
+    aggregate.merge(aggregate_columnar(reader, aggregate.rewards.max_points, start - reader.base_row))
+    return aggregate
+
+def has_archive(path, archive_dir=None):
+    return os.path.exists(summary_path(path, archive_dir)) or bool(segments(path, archive_dir))
+
+def _write_log(path, rows, started, step):
+    with BufferedCSVWriter(path, TASK_LOG_HEADER, max_rows=10_000) as writer:
+        for i in range(rows):
+            stamp = (started + i * step).isoformat(timespec="seconds")
+            writer.write([i, f"intent{i % 50}", f"action{i % 7}", (i % 5) - 2, stamp, 0.9, "👍", ""])
+
+def simulate(directory, days=60, rows_per_day=20_000, max_bytes=DEFAULT_MAX_BYTES, keep=timedelta(days=7)):
+    """Write ``days`` of task-log rows with a daily ``maintain`` run; returns dashboard refresh timings"""
+    path = os.path.join(directory, "task_log.csv")
+    started = datetime(2026, 1, 1)
+    step = timedelta(days=1) / rows_per_day
+    for day in range(days):
+        _write_log(path, rows_per_day, started + day * timedelta(days=1), step)
+        maintain(path, max_bytes, DEFAULT_MAX_AGE, keep, now=started + (day + 1) * timedelta(days=1))
+    _write_log(path, rows_per_day // 2, started + days * timedelta(days=1), step)
+
+    timings = {}
+    begin = time.perf_counter()
+    cache = ArchivedLogCache(path)
+    cache.refresh()
+    rows = cache.aggregate.rows
+    timings["cold refresh"] = time.perf_counter() - begin
+    _write_log(path, 100, started + days * timedelta(days=1), step)
+    begin = time.perf_counter()
+    cache.refresh()
+    cache.aggregate
+    timings["warm refresh (+100 rows)"] = time.perf_counter() - begin
+    begin = time.perf_counter()
+    aggregate_archived(path)
+    timings["aggregate_archived"] = time.perf_counter() - begin
+    on_disk = sum(os.path.getsize(os.path.join(root, name))
+                  for root, _, names in os.walk(directory) for name in names)
+    return {"rows": rows + 100, "live_bytes": os.path.getsize(path), "disk_bytes": on_disk,
+            "segments": len(segments(path)), "timings": timings}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rotate, compress, compact and prune the task and episode logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("maintain", help="one maintenance pass (run it from cron, or with --watch)")
+    run.add_argument("--task-log", default=TASK_LOG)
+    run.add_argument("--episode-log", default=EPISODE_LOG)
+    run.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / (1 << 20), help="rotate above this size")
+    run.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE / timedelta(hours=1),
+                     help="rotate once the oldest live row is this old")
+    run.add_argument("--keep-days", type=float, default=DEFAULT_KEEP.days,
+                     help="delete compressed segments older than this (the summary is kept)")
+    run.add_argument("--watch", type=float, metavar="SECONDS", help="repeat every SECONDS instead of exiting")
+    sim = sub.add_parser("simulate", help="months of logging with daily maintenance, then time the dashboard reads")
+    sim.add_argument("--days", type=int, default=60)
+    sim.add_argument("--rows-per-day", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    if args.command == "simulate":
+        import tempfile
+
+        with tempfile.TemporaryDirectory(prefix="rl-logs-") as directory:
+            r = simulate(directory, args.days, args.rows_per_day)
+        print(f"🗄️  {r['rows']:,} rows over {args.days} days: {r['segments']} archived segments kept, "
+              f"{r['live_bytes'] / 1e6:.1f} MB live, {r['disk_bytes'] / 1e6:.1f} MB on disk")
+        for name, seconds in r["timings"].items():
+            print(f"   {name:<26} {seconds * 1000:>8.1f} ms")
+        return 0
+
+    while True:
+        max_bytes, max_age = int(args.max_mb * (1 << 20)), timedelta(hours=args.max_age_hours)
+        keep = timedelta(days=args.keep_days)
+        for path, summarize in ((args.task_log, True), (args.episode_log, False)):
+            r = maintain(path, max_bytes, max_age, keep, summarize)
+            if r["rotated"] or r["compressed"] or r["compacted"] or r["pruned"]:
+                print(f"🗄️  {path}: rotated={os.path.basename(r['rotated'] or '-')} compressed={r['compressed']} "
+                      f"compacted={r['compacted']} pruned={r['pruned']}")
+        if not args.watch:
+            return 0
+        time.sleep(args.watch)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,341 @@
+import csv
+import io
+import operator
+import os
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from agent.logger import TASK_LOG_HEADER
+
+
+_INTENT, _ACTION, _REWARD, _FEEDBACK = (operator.itemgetter(i) for i in (1, 2, 3, 6))
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+def _factorize(values):
+    """(codes, labels) for a sequence of hashable values, in first-seen order"""
+    labels = list(dict.fromkeys(values))
+    lookup = {v: i for i, v in enumerate(labels)}
+    return np.fromiter(map(lookup.__getitem__, values), dtype=np.int64, count=len(values)), labels
+
+
+class RewardSeries:
+    """Reward-per-task series kept as at most ``max_points`` bucket means.
+
+    Buckets hold ``width`` consecutive rewards; when there are too many,
+    neighbouring pairs are merged and ``width`` doubles, so memory is
+    bounded however long the log is.
+    """
+
+    def __init__(self, max_points=2000):
+        self.max_points = max_points
+        self.width = 1
+        self.sums = []
+        self.counts = []
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def add(self, reward):
+        if self.counts and self.counts[-1] < self.width:
+            self.sums[-1] += reward
+            self.counts[-1] += 1
+        else:
+            self.sums.append(reward)
+            self.counts.append(1)
+            if len(self.counts) > self.max_points:
+                self._compact()
+
+    def add_many(self, rewards):
+        """Vectorized ``add`` for an array of rewards"""
+        rewards = np.asarray(rewards, dtype=np.float64)
+        while rewards.size:
+            if self.counts and self.counts[-1] < self.width:
+                take = min(self.width - self.counts[-1], rewards.size)
+                self.sums[-1] += float(rewards[:take].sum())
+                self.counts[-1] += take
+                rewards = rewards[take:]
+                continue
+            room = (self.max_points - len(self.counts) + 1) * self.width
+            head, rewards = rewards[:room], rewards[room:]
+            starts = np.arange(0, head.size, self.width)
+            self.sums.extend(np.add.reduceat(head, starts).tolist())
+            self.counts.extend(np.minimum(self.width, head.size - starts).tolist())
+            while len(self.counts) > self.max_points:
+                self._compact()
+
+    def _compact(self):
+        self.sums = [sum(self.sums[i:i + 2]) for i in range(0, len(self.sums), 2)]
+        self.counts = [sum(self.counts[i:i + 2]) for i in range(0, len(self.counts), 2)]
+        self.width *= 2
+
+    def extend(self, other):
+        """Append a series covering the rows that follow this one"""
+        self.sums.extend(other.sums)
+        self.counts.extend(other.counts)
+        self.width = max(self.width, other.width)
+        while len(self.counts) > self.max_points:
+            self._compact()
+
+    def to_dict(self):
+        return {"max_points": self.max_points, "width": self.width, "sums": list(self.sums),
+                "counts": list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        series = cls(data["max_points"])
+        series.width, series.sums, series.counts = data["width"], list(data["sums"]), list(data["counts"])
+        return series
+
+    def points(self):
+        """(task positions, mean rewards) for plotting, one point per bucket"""
+        counts = np.asarray(self.counts, dtype=np.float64)
+        starts = np.cumsum(counts) - counts
+        return starts + (counts - 1) / 2, np.asarray(self.sums) / np.maximum(counts, 1)
+
+
+class LogAggregate:
+    """Running reward-per-intent, action and feedback aggregates over task-log rows"""
+
+    def __init__(self, recent_rows=5, max_points=2000):
+        self.rows = 0
+        self.intent_reward_sum = Counter()
+        self.intent_count = Counter()
+        self.action_counts = Counter()
+        self.feedback_counts = Counter()
+        self.rewards = RewardSeries(max_points)
+        self.recent = deque(maxlen=recent_rows)
+
+    def add_row(self, row):
+        """Fold one row (a list in ``TASK_LOG_HEADER`` order) into the aggregates"""
+        intent, action, reward, feedback = row[1], row[2], row[3], row[6]
+        try:
+            reward = float(reward)
+        except ValueError:
+            reward = None
+        self.rows += 1
+        if reward is not None:
+            self.intent_reward_sum[intent] += reward
+            self.intent_count[intent] += 1
+            self.rewards.add(reward)
+        self.action_counts[action] += 1
+        self.feedback_counts[feedback] += 1
+        self.recent.append(row)
+
+    def add_rows(self, rows):
+        """Batched ``add_row``: counts go through ``Counter.update`` in C"""
+        rows = [row for row in rows if len(row) >= len(TASK_LOG_HEADER)]
+        if not rows:
+            return
+        intents = list(map(_INTENT, rows))
+        rewards = list(map(_REWARD, rows))
+        try:
+            values = np.asarray(rewards, dtype=np.float64)
+        except ValueError:
+            values = np.array([_to_float(r) for r in rewards])
+        valid = ~np.isnan(values)
+        codes, labels = _factorize(intents)
+        counts = np.bincount(codes[valid], minlength=len(labels))
+        sums = np.bincount(codes[valid], weights=values[valid], minlength=len(labels))
+        self.intent_count.update({labels[i]: int(counts[i]) for i in np.flatnonzero(counts)})
+        self.intent_reward_sum.update({labels[i]: float(sums[i]) for i in np.flatnonzero(sums)})
+        self.action_counts.update(map(_ACTION, rows))
+        self.feedback_counts.update(map(_FEEDBACK, rows))
+        self.rewards.add_many(values[valid])
+        self.rows += len(rows)
+        self.recent.extend(rows[-self.recent.maxlen:] if self.recent.maxlen else rows)
+
+    def add_coded(self, intents, actions, rewards, feedbacks, categories):
+        """Fold a block of categorical codes (as stored by the columnar log) in one pass"""
+        valid = ~np.isnan(rewards)
+        for name, codes, target in (("Parsed Intent", intents[valid], self.intent_count),
+                                    ("Action Taken", actions, self.action_counts),
+                                    ("User Feedback", feedbacks, self.feedback_counts)):
+            labels = categories[name]
+            counts = np.bincount(codes, minlength=len(labels))
+            target.update({labels[i]: int(counts[i]) for i in np.flatnonzero(counts)})
+        labels = categories["Parsed Intent"]
+        sums = np.bincount(intents[valid], weights=rewards[valid], minlength=len(labels))
+        self.intent_reward_sum.update({labels[i]: float(sums[i]) for i in np.flatnonzero(sums)})
+        self.rewards.add_many(rewards[valid])
+        self.rows += len(actions)
+
+    def merge(self, other):
+        """Fold in the aggregate of the rows that follow this one"""
+        self.rows += other.rows
+        self.intent_reward_sum.update(other.intent_reward_sum)
+        self.intent_count.update(other.intent_count)
+        self.action_counts.update(other.action_counts)
+        self.feedback_counts.update(other.feedback_counts)
+        self.rewards.extend(other.rewards)
+        self.recent.extend(other.recent)
+        return self
+
+    def to_dict(self):
+        """JSON-serializable form, e.g. for the compacted summary of archived logs"""
+        return {
+            "rows": self.rows,
+            "intent_reward_sum": dict(self.intent_reward_sum),
+            "intent_count": dict(self.intent_count),
+            "action_counts": dict(self.action_counts),
+            "feedback_counts": dict(self.feedback_counts),
+            "rewards": self.rewards.to_dict(),
+            "recent_rows": self.recent.maxlen,
+            "recent": list(self.recent),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregate = cls(data["recent_rows"], data["rewards"]["max_points"])
+        aggregate.rows = data["rows"]
+        aggregate.intent_reward_sum.update(data["intent_reward_sum"])
+        aggregate.intent_count.update(data["intent_count"])
+        aggregate.action_counts.update(data["action_counts"])
+        aggregate.feedback_counts.update(data["feedback_counts"])
+        aggregate.rewards = RewardSeries.from_dict(data["rewards"])
+        aggregate.recent.extend(data["recent"])
+        return aggregate
+
+    def intent_mean_rewards(self):
+        return {intent: self.intent_reward_sum[intent] / count for intent, count in self.intent_count.items()}
+
+
+class IncrementalLogCache:
+    """Task-log aggregates that only parse rows appended since the last refresh.
+
+    The cache remembers the byte offset it has consumed plus the file's
+    inode, size and mtime. ``refresh`` is a single ``stat`` when nothing
+    changed; otherwise it reads from the saved offset, consuming complete
+    lines only. A truncated or replaced (rotated) file resets the cache.
+    """
+
+    def __init__(self, path, recent_rows=5, block_size=4 << 20):
+        self.path = path
+        self.recent_rows = recent_rows
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.header = list(TASK_LOG_HEADER)
+        self._signature = None
+        self.aggregate = LogAggregate(self.recent_rows)
+
+    def refresh(self):
+        """Parse newly appended rows; returns the number of rows added"""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return 0
+            signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+            if signature == self._signature:
+                return 0
+            if self._signature and (st.st_ino != self._signature[0] or st.st_size < self.offset):
+                self._reset()
+            added = self._consume()
+            self._signature = signature
+            return added
+
+    def _consume(self):
+        added = 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            carry = b""
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                data = carry + block
+                end = data.rfind(b"\n") + 1
+                if end:
+                    added += self._parse(data[:end])
+                    self.offset += end
+                carry = data[end:]
+        return added
+
+    def _parse(self, data):
+        reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+        if self.offset == 0:
+            self.header = next(reader, self.header)
+        rows = [row for row in reader if len(row) >= len(TASK_LOG_HEADER)]
+        self.aggregate.add_rows(rows)
+        return len(rows)
+
+    def recent_frame(self):
+        """Last rows as a DataFrame with the log's header"""
+        import pandas as pd
+
+        return pd.DataFrame(list(self.aggregate.recent), columns=self.header[:len(TASK_LOG_HEADER)])
+
+
+def _aggregate_range(path, start, end, max_points, block_size=4 << 20):
+    """Aggregate the complete lines in bytes [start, end) of a task log"""
+    aggregate = LogAggregate(max_points=max_points)
+    with open(path, "rb") as f:
+        f.seek(start)
+        if start == 0:
+            start += len(f.readline())  # header
+        carry = b""
+        while start < end:
+            block = f.read(min(block_size, end - start))
+            if not block:
+                break
+            start += len(block)
+            data = carry + block
+            cut = data.rfind(b"\n") + 1 if start < end else len(data)
+            _add_text(aggregate, data[:cut])
+            carry = data[cut:]
+    return aggregate
+
+def _add_text(aggregate, data):
+    aggregate.add_rows(list(csv.reader(io.StringIO(data.decode("utf-8"), newline=""))))
+
+def _split_ranges(path, parts):
+    """Split a file into ``parts`` byte ranges that start at line boundaries"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+
+def aggregate_log(path, workers=1, max_points=2000):
+    """Single-pass, bounded-memory dashboard aggregates for a task-log CSV.
+
+    With ``workers > 1`` the file is split into newline-aligned byte ranges
+    that are aggregated in separate processes and merged in file order.
+    Rows must not contain embedded newlines (the task logger never writes
+    them).
+    """
+    if workers <= 1:
+        return _aggregate_range(path, 0, os.path.getsize(path), max_points)
+    ranges = _split_ranges(path, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        partials = pool.map(_aggregate_range, [path] * len(ranges), *zip(*ranges), [max_points] * len(ranges))
+        aggregate = LogAggregate(max_points=max_points)
+        for partial in partials:
+            aggregate.merge(partial)
+    return aggregate
+
+def aggregate_columnar(reader, max_points=2000, start=0):
+    """Dashboard aggregates of rows ``start`` onwards of a ``ColumnarLogReader``, one segment at a time"""
+    names = ["Parsed Intent", "Action Taken", "Reward Assigned", "User Feedback"]
+    categories = {name: reader.categories(name) for name in names if name != "Reward Assigned"}
+    aggregate = LogAggregate(max_points=max_points)
+    for columns in reader.iter_segments(names, start):
+        aggregate.add_coded(columns["Parsed Intent"], columns["Action Taken"],
+                            columns["Reward Assigned"].astype(np.float64), columns["User Feedback"], categories)
+    return aggregate
@@ -1,8 +1,23 @@
+import atexit
 import csv
+import io
 import os
 import random
+import threading
+import time
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+TASK_LOG_HEADER = [
+    "Task ID", "Parsed Intent", "Action Taken", "Reward Assigned",
+    "Timestamp", "Agent Confidence", "User Feedback", "Suggested Correction"
+]
+EPISODE_LOG_HEADER = ["Episode", "Total Reward", "Timestamp"]
+
 def log_episode(log_path, task_id, intent, action, reward, feedback, suggestion):
     os.makedirs(os.path.dirname(log_path), exist_ok=True)
     file_exists = os.path.isfile(log_path)
@@ -12,10 +27,7 @@ def log_episode(log_path, task_id, intent, action, reward, feedback, suggestion)
     with open(log_path, "a", newline="") as f:
         w = csv.writer(f)
         if not file_exists:
-            w.writerow([
-                "Task ID", "Parsed Intent", "Action Taken", "Reward Assigned",
-                "Timestamp", "Agent Confidence", "User Feedback", "Suggested Correction"
-            ])
+            w.writerow(TASK_LOG_HEADER)
         w.writerow([task_id, intent, action, reward, timestamp, confidence, feedback, suggestion or ""])
 
 def log_total_reward(episode, total_reward, episode_log_path):
@@ -27,5 +39,189 @@ def log_total_reward(episode, total_reward, episode_log_path):
     with open(episode_log_path, "a", newline="") as f:
         w = csv.writer(f)
         if not file_exists:
-            w.writerow(["Episode", "Total Reward", "Timestamp"])
+            w.writerow(EPISODE_LOG_HEADER)
         w.writerow([episode, total_reward, timestamp])
+
+
+class BufferedCSVWriter:
+    """Append CSV rows through an in-memory buffer and one long-lived file descriptor.
+
+    Rows are flushed when ``max_rows`` are pending, when ``flush_interval``
+    seconds have passed (checked on write and by a background thread), on
+    ``close()`` and at interpreter exit. Each flush is a single ``O_APPEND``
+    write under an in-process lock and, where available, an exclusive
+    ``flock``, so several threads or processes can share one log file
+    without interleaving rows or duplicating the header. If the file has
+    been rotated away (see ``agent.log_archive``), the next flush starts a
+    fresh one at ``path``. Flushed rows are
+    also handed to any extra ``sinks`` (objects with ``write_rows`` and
+    ``flush(watermark)``) before the lock is released, together with the
+    file's ``(inode, size)`` once it holds them.
+    """
+
+    def __init__(self, path, header, max_rows=256, flush_interval=2.0, sinks=()):
+        self.path = path
+        self.header = header
+        self.sinks = list(sinks)
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self._rows = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one flush at a time, so batches stay in order
+        self._fd = None
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, name=f"csv-flush:{path}", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+
+    def write(self, row):
+        self.write_rows([row])
+
+    def write_rows(self, rows):
+        with self._lock:
+            self._rows.extend(rows)
+            due = len(self._rows) >= self.max_rows or (
+                self.flush_interval and time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write all pending rows with a single append.
+
+        Flushes are serialized from taking the rows to handing them to the
+        sinks, so batches reach the file (and sinks) in the order they were
+        written even when the background flusher and ``flush()``/``close()``
+        overlap; ``write`` only ever waits for the short buffer lock.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+            buf = io.StringIO()
+            csv.writer(buf).writerows(rows)
+            self._append(buf.getvalue().encode("utf-8"), rows)
+            return len(rows)
+
+    def _open(self):
+        if self._fd is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _rotated(self, fd):
+        """True once ``path`` no longer names the file behind ``fd`` (it was rotated away)"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(fd).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _append(self, payload, rows):
+        with self._io_lock:
+            while True:
+                fd = self._open()
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                if not self._rotated(fd):
+                    break
+                # rotation renames the file under the same lock, so nothing more may land in it
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+                self._fd = None
+            try:
+                if os.fstat(fd).st_size == 0:
+                    header = io.StringIO()
+                    csv.writer(header).writerow(self.header)
+                    payload = header.getvalue().encode("utf-8") + payload
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(fd, view):]
+                if self.sinks:
+                    stat = os.fstat(fd)
+                    for sink in self.sinks:
+                        sink.write_rows(rows)
+                        sink.flush(watermark=(stat.st_ino, stat.st_size))
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️ Failed to flush {self.path}: {e}")
+
+    def close(self):
+        """Flush pending rows and release the file descriptor"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self.flush()
+        with self._io_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TaskLogger:
+    """Long-lived, buffered counterpart of ``log_episode``/``log_total_reward``.
+
+    Task rows are mirrored into a ``ColumnarLogSink`` at ``columnar_dir``;
+    by default that is the log's own columnar directory
+    (``columnar_dir_for``) once it has been initialized, so every logger of
+    a task log keeps its columnar copy complete. Pass ``False`` to disable.
+    """
+
+    def __init__(self, log_path, episode_log_path, max_rows=256, flush_interval=2.0, columnar_dir=None):
+        sinks = []
+        if columnar_dir is None:
+            from agent.columnar_log import columnar_dir_for, is_initialized
+            columnar_dir = columnar_dir_for(log_path) if is_initialized(columnar_dir_for(log_path)) else None
+        if columnar_dir:
+            from agent.columnar_log import ColumnarLogSink
+            sinks.append(ColumnarLogSink(columnar_dir))
+        self.tasks = BufferedCSVWriter(log_path, TASK_LOG_HEADER, max_rows, flush_interval, sinks)
+        self.episodes = BufferedCSVWriter(episode_log_path, EPISODE_LOG_HEADER, max_rows, flush_interval)
+
+    def log_episode(self, task_id, intent, action, reward, feedback, suggestion):
+        confidence = round(random.uniform(0.5, 1.0), 2)
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        self.tasks.write([task_id, intent, action, reward, timestamp, confidence, feedback, suggestion or ""])
+
+    def log_total_reward(self, episode, total_reward):
+        """Log total reward for an episode"""
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        self.episodes.write([episode, total_reward, timestamp])
+
+    def flush(self):
+        self.tasks.flush()
+        self.episodes.flush()
+
+    def close(self):
+        self.tasks.close()
+        self.episodes.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,11 +1,18 @@
 # agent/main.py
 
-from agent.q_learning import QLearningAgent
-from agent.logger import log_episode, log_total_reward
-from agent.feedback import get_feedback, get_confidence_score
-from agent.visualizer import plot_rewards
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+from agent.logger import TaskLogger
+from agent.feedback import InteractiveFeedback, OracleFeedback, ScriptedFeedback, compute_reward
+from agent.intent_parser import TaskIntentIndex
+from agent.replay import PrioritizedReplayBuffer, ReplayBuffer, Replayer
+from agent.simulation import print_report, run_simulation
+from agent.task_source import TASK_FILE, TaskSource, load_tasks
+from agent.visualizer import BackgroundRenderer, plot_rewards
+from agent import instrumentation
+import argparse
 import os
 import time
+from contextlib import ExitStack, nullcontext
 from datetime import datetime
 
 def print_banner():
@@ -26,78 +33,139 @@ def display_task_info(episode, task_index, task, action, next_best=None):
         print(f"💡 Next Best Option: {next_best}")
     print("-"*40)
 
-def main():
-    """Main function to run the RL agent with enhanced logging and feedback"""
+def make_feedback_provider(kind, script=None, actions=DEFAULT_ACTIONS):
+    """Feedback provider for ``--feedback``: interactive prompts, a script file or the oracle"""
+    if kind == "scripted":
+        return ScriptedFeedback(script)
+    if kind == "oracle":
+        return OracleFeedback(actions)
+    return InteractiveFeedback()
+
+def run_headless(num_episodes, provider, actors=0, q_path="", log=False, agent_kind="table"):
+    """Train on the task file with simulated feedback and no prompts, delays or per-task output.
+
+    Like ``agent.simulation``, this starts from a fresh table and writes
+    nothing unless asked: ``q_path`` loads and saves that Q-table, and
+    ``log`` appends every step to the task/episode logs and saves the
+    learning curve. With ``actors`` > 0, that many actor processes pick
+    actions from a shared-memory snapshot and the oracle answers them,
+    while this process is the learner (and the only one writing logs).
+    ``agent_kind="hashed"`` trains the fixed-memory ``HashedQLearningAgent``
+    on the raw task texts instead of the exact table on parsed intents.
+    """
+    task_list = load_tasks(TASK_FILE)
+    if agent_kind == "hashed":
+        from agent.hashed_agent import HashedQLearningAgent
+
+        agent = HashedQLearningAgent(DEFAULT_ACTIONS, q_path=q_path)
+    else:
+        agent = QLearningAgent(actions=DEFAULT_ACTIONS, q_path=q_path)
+    task_logger = TaskLogger(os.path.join("data", "task_log.csv"), os.path.join("data", "episode_log.txt")) \
+        if log else None
+    try:
+        if actors:
+            from agent.actor_learner import run_actor_learner
+
+            result = run_actor_learner(agent, task_list, actors, num_episodes, task_logger=task_logger)
+        else:
+            result = run_simulation(agent, task_list, provider, num_episodes, task_logger,
+                                    states="task" if agent_kind == "hashed" else "intent")
+    finally:
+        if task_logger is not None:
+            task_logger.close()
+    if q_path:
+        agent.save_q_table()
+    if instrumentation.is_enabled():
+        instrumentation.metrics.increment("transitions", result.get("transitions", num_episodes * len(task_list)))
+        if actors:
+            instrumentation.metrics.increment("snapshot_publishes", result["publishes"])
+    if actors:
+        print(f"⚡ {result['transitions']:,} transitions from {actors} actors in {result['seconds']:.2f}s "
+              f"({result['per_sec']:,.0f}/s), {result['publishes']} snapshots published")
+        print(f"🎯 Greedy accuracy {result['accuracy']:.1%} (best reachable {result['optimal_accuracy']:.1%})")
+    else:
+        print_report(result)
+    if log:
+        plot_rewards(result["rewards"], os.path.join("data", "learning_curve.png"))
+    return 0
+
+def run_training(num_episodes, provider, replay=None):
+    """Run the training episodes with per-task output, logging and charts.
+
+    With ``replay`` ("uniform" or "prioritized") every answer also goes
+    into a replay buffer that a background thread keeps learning from
+    while the next answer is awaited; every read of the agent here then
+    holds the replayer's lock.
+    """
     print_banner()
     
     # File paths
     task_log_path = os.path.join("data", "task_log.csv")
     episode_log_path = os.path.join("data", "episode_log.txt")
     chart_path = os.path.join("data", "learning_curve.png")
-    task_file_path = os.path.join("data", "task_log.txt")
+    task_file_path = TASK_FILE
     
-    # Load tasks from file
+    # Initialize agent; task texts are streamed from the file every episode,
+    # but every task's intent is parsed once, up front, into a compact index
+    agent = QLearningAgent(actions=DEFAULT_ACTIONS)
+    task_source = TaskSource(task_file_path)
     try:
-        with open(task_file_path, "r") as f:
-            task_list = [line.strip().split(" - ")[1] for line in f.readlines() if " - " in line]
+        intent_index = TaskIntentIndex(task_source.tasks(), agent.q, keep_tasks=False)
     except FileNotFoundError:
         print(f"⚠️  Task file not found: {task_file_path}")
         return
     
-    print(f"📋 Loaded {len(task_list)} tasks for training")
+    print(f"📋 Loaded {len(intent_index)} tasks for training")
     
-    # Initialize agent
-    agent = QLearningAgent(actions=["open", "mute", "play", "unmute", "close", "screenshot", "set_dnd"])
+    task_logger = TaskLogger(task_log_path, episode_log_path)
     total_rewards = []
+    renderer = BackgroundRenderer()  # charts render off the training thread
+    replayer = None
+    if replay:
+        replayer = Replayer(agent, PrioritizedReplayBuffer() if replay == "prioritized" else ReplayBuffer())
+        replayer.start()
+    
+    # Event counters for --metrics (None when not instrumented)
+    metrics = instrumentation.metrics if instrumentation.is_enabled() else None
     
     # Run episodes
-    num_episodes = 3
     for episode in range(1, num_episodes + 1):
         print(f"\n🏁 Starting Episode {episode}/{num_episodes}")
         print("="*50)
         total_reward = 0
         start_time = time.time()
         
-        for task_index, task in enumerate(task_list, 1):
-            # Parse intent from task
-            parsed_intent = task.lower().split()[0]
-            
-            # Get agent's action and confidence
-            action = agent.select_action(parsed_intent)
-            confidence = agent.get_action_confidence(parsed_intent, action)
-            next_best = agent.get_next_best_action(parsed_intent)
+        for task_index, (task, parsed_intent) in enumerate(zip(task_source.tasks(), intent_index.intents), 1):
+            # Get agent's action and confidence (the replayer thread must not write the table meanwhile)
+            with replayer.lock if replayer is not None else nullcontext():
+                action = agent.select_action(parsed_intent)
+                confidence = agent.get_action_confidence(parsed_intent, action)
+                next_best = agent.get_next_best_action(parsed_intent)
             
             # Display task information
             display_task_info(episode, task_index, task, action, next_best)
             
-            # Get user feedback
-            feedback, correction = get_feedback()
+            # Get user (or simulated user) feedback
+            feedback, correction = provider(task, parsed_intent, action)
             task_id = f"{episode}-{task_index}"
             
             # Enhanced reward logic based on feedback
-            if feedback == "👍":
-                reward = 2
-                feedback_text = "👍 Correct"
-                suggestion = ""
-            elif feedback == "👎":
-                reward = -2
-                feedback_text = "👎 Incorrect"
-                suggestion = correction or "No suggestion provided"
-                # Bonus reward if user provides correction
+            reward, feedback_text, suggestion = compute_reward(feedback, correction)
+            if feedback == "👎" and correction:
+                print(f"🎆 Bonus +1 reward for providing correction!")
+            if metrics:
+                metrics.increment("positive_feedback" if feedback == "👍" else "negative_feedback")
                 if correction:
-                    reward += 1
-                    print(f"🎆 Bonus +1 reward for providing correction!")
-            else:
-                reward = 0
-                feedback_text = "Neutral"
-                suggestion = "No feedback given"
+                    metrics.increment("corrections")
             
-            # Update Q-table
-            agent.update_q_table(parsed_intent, action, reward, parsed_intent)
+            # Update Q-table (and keep the answer for replay)
+            if replayer is not None:
+                replayer.observe(parsed_intent, action, reward, parsed_intent)
+            else:
+                agent.update_q_table(parsed_intent, action, reward, parsed_intent)
             
             # Enhanced structured logging with all required fields
-            log_episode(
-                log_path=task_log_path,
+            task_logger.log_episode(
                 task_id=task_id,
                 intent=parsed_intent,
                 action=action,
@@ -109,22 +177,38 @@ def main():
             total_reward += reward
             print(f"🏆 Episode {episode} Reward so far: {total_reward}")
             
-            # Small delay for better UX
-            time.sleep(0.5)
+            # Small delay for better UX (only when a human is watching)
+            if provider.interactive:
+                time.sleep(0.5)
         
         # Log episode summary
         episode_duration = time.time() - start_time
-        log_total_reward(episode, total_reward, episode_log_path)
+        if metrics:
+            metrics.observe("episode", episode_duration)
+        task_logger.log_total_reward(episode, total_reward)
         total_rewards.append(total_reward)
+        with replayer.lock if replayer is not None else nullcontext():
+            compacted = agent.checkpoint()  # persist only the states updated this episode
+        if metrics and compacted:
+            metrics.increment("checkpoint_compactions")
+        renderer.submit(plot_rewards, chart_path, list(total_rewards), preview=True, verbose=False)
         
         print(f"\n✅ Episode {episode} Complete!")
         print(f"Total Reward: {total_reward}")
         print(f"Duration: {episode_duration:.1f} seconds")
         print("="*50)
     
-    # Save Q-table and generate visualizations
-    agent.save_q_table("data/q_table.pkl")
-    plot_rewards(total_rewards, chart_path)
+    # Flush buffered logs and generate visualizations
+    if replayer is not None:
+        replayer.stop()
+        if agent.checkpoint() and metrics:  # include what was replayed since the last episode
+            metrics.increment("checkpoint_compactions")
+        if metrics:
+            metrics.increment("replayed_transitions", replayer.replayed)
+        print(f"🔁 Replayed {replayer.replayed:,} stored transitions")
+    task_logger.close()
+    renderer.submit(plot_rewards, chart_path, list(total_rewards))
+    renderer.close()
     
     # Final summary
     print(f"\n🎉 Training Complete!")
@@ -133,5 +217,53 @@ def main():
     print(f"Logs saved in /data directory")
     print(f"Learning curve saved as {chart_path}")
     
+def main(argv=None):
+    """Main function to run the RL agent with enhanced logging and feedback"""
+    parser = argparse.ArgumentParser(description="Train the RL agent from user feedback")
+    parser.add_argument("--feedback", choices=["interactive", "scripted", "oracle"], default="interactive")
+    parser.add_argument("--script", help="feedback script for --feedback scripted (one 👍/👎 per line)")
+    parser.add_argument("--episodes", type=int, default=3)
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate --episodes with the oracle (or script) as fast as possible, without prompts")
+    parser.add_argument("--q-path", default="",
+                        help="with --headless: load and save this Q-table (default: fresh table, nothing saved)")
+    parser.add_argument("--log", action="store_true",
+                        help="with --headless: append to the task/episode logs and save the learning curve")
+    parser.add_argument("--actors", type=int, default=0,
+                        help="with --headless: actor processes acting on a shared snapshot while this process learns")
+    parser.add_argument("--agent", choices=["table", "hashed"], default="table",
+                        help="with --headless: exact Q-table or the fixed-memory hashed linear agent")
+    parser.add_argument("--replay", choices=["uniform", "prioritized"],
+                        help="keep learning from stored answers in the background")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="time the hot paths and export counters/histograms here (.json, else Prometheus text)")
+    parser.add_argument("--profile", metavar="PATH", help="run under cProfile and dump stats here")
+    parser.add_argument("--trace-memory", action="store_true", help="report allocations with tracemalloc")
+    args = parser.parse_args(argv)
+
+    if args.feedback == "scripted" and not args.script:
+        parser.error("--feedback scripted needs --script")
+    if args.actors and (not args.headless or args.feedback == "scripted"):
+        parser.error("--actors needs --headless with oracle feedback")
+    if args.agent == "hashed" and (not args.headless or args.actors):
+        parser.error("--agent hashed needs --headless without --actors")
+    if args.metrics:
+        instrumentation.enable()
+    with ExitStack() as stack:
+        if args.profile:
+            stack.enter_context(instrumentation.profile(args.profile))
+        if args.trace_memory:
+            stack.enter_context(instrumentation.trace_memory())
+        if args.headless:
+            provider = make_feedback_provider("oracle" if args.feedback == "interactive" else args.feedback, args.script)
+            status = run_headless(args.episodes, provider, args.actors, args.q_path, args.log, args.agent)
+        else:
+            status = run_training(args.episodes, make_feedback_provider(args.feedback, args.script), args.replay)
+    if args.metrics:
+        instrumentation.metrics.export(args.metrics)
+        print(f"⏱️  Hot-path timings (exported to {args.metrics}):")
+        print(instrumentation.metrics.summary())
+    return status
+
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+from agent.q_table import QTable
+
+INTENT_COLUMN = "Parsed Intent"
+ACTION_COLUMN = "Action Taken"
+REWARD_COLUMN = "Reward Assigned"
+
+def iter_log_chunks(log_path, chunksize=200_000):
+    """Stream (intents, actions, rewards) array chunks from a task log CSV"""
+    import pandas as pd
+
+    reader = pd.read_csv(
+        log_path,
+        usecols=[INTENT_COLUMN, ACTION_COLUMN, REWARD_COLUMN],
+        dtype={INTENT_COLUMN: str, ACTION_COLUMN: str},
+        keep_default_na=False,
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        rewards = pd.to_numeric(chunk[REWARD_COLUMN], errors="coerce").to_numpy(dtype=np.float64)
+        yield chunk[INTENT_COLUMN].to_numpy(), chunk[ACTION_COLUMN].to_numpy(), rewards
+
+def _intern_chunk(agent, intents, actions, rewards):
+    """Factorize a chunk and map it onto agent ids, dropping unusable rows"""
+    import pandas as pd
+
+    intent_codes, intent_uniques = pd.factorize(intents)
+    action_codes, action_uniques = pd.factorize(actions)
+    state_lookup = agent.q.state_ids(list(intent_uniques))
+    action_lookup = np.array([agent.q.action_index.get(a, -1) for a in action_uniques], dtype=np.int64)
+
+    keep = (intent_codes >= 0) & (action_codes >= 0) & ~np.isnan(rewards)
+    aids = action_lookup[action_codes[keep]]
+    known = aids >= 0
+    sids = state_lookup[intent_codes[keep]][known]
+    return sids, aids[known], rewards[keep][known]
+
+def replay_log(agent, log_path, epochs=1, chunksize=200_000, batch_size=4096, verbose=True):
+    """Train ``agent`` from a logged task CSV for a number of epochs.
+
+    Rows are streamed in chunks, so memory stays bounded by ``chunksize``.
+    Each logged step becomes the transition (intent, action, reward, intent),
+    the same one the interactive loops apply, and is fed through
+    ``update_batch_ids`` in mini-batches of ``batch_size`` with
+    ``duplicates="sequential"``: every row counts and rows apply in log
+    order, so the table matches what live training learned. Rows whose
+    action is unknown to the agent or whose reward is missing are skipped.
+    """
+    stats = {"epochs": [], "transitions": 0, "skipped": 0, "seconds": 0.0}
+
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        applied = skipped = 0
+        for intents, actions, rewards in iter_log_chunks(log_path, chunksize):
+            sids, aids, chunk_rewards = _intern_chunk(agent, intents, actions, rewards)
+            skipped += len(intents) - len(sids)
+            for lo in range(0, len(sids), batch_size):
+                hi = lo + batch_size
+                agent.update_batch_ids(sids[lo:hi], aids[lo:hi], chunk_rewards[lo:hi], sids[lo:hi],
+                                       duplicates="sequential")
+            applied += len(sids)
+
+        elapsed = time.perf_counter() - start
+        rate = applied / elapsed if elapsed > 0 else float("inf")
+        stats["epochs"].append({"epoch": epoch, "transitions": applied, "seconds": elapsed, "per_sec": rate})
+        stats["transitions"] += applied
+        stats["skipped"] += skipped
+        stats["seconds"] += elapsed
+        if verbose:
+            print(f"🔁 Epoch {epoch}/{epochs}: {applied:,} transitions "
+                  f"({skipped:,} skipped) in {elapsed:.2f}s → {rate:,.0f} transitions/sec")
+
+    stats["per_sec"] = stats["transitions"] / stats["seconds"] if stats["seconds"] > 0 else float("inf")
+    return stats
+
+def main(argv=None):
+    """Headless replay: rebuild a Q-table from data/task_log.csv"""
+    parser = argparse.ArgumentParser(description="Rebuild the Q-table by replaying a logged task CSV")
+    parser.add_argument("--log", default=os.path.join("data", "task_log.csv"), help="task log CSV to replay")
+    parser.add_argument("--output", default=os.path.join("data", "q_table.qsnap"), help="where to save the Q-table")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=200_000, help="CSV rows read per chunk")
+    parser.add_argument("--batch-size", type=int, default=4096, help="transitions per batched update")
+    parser.add_argument("--alpha", type=float, default=0.2)
+    parser.add_argument("--gamma", type=float, default=0.9)
+    parser.add_argument("--resume", action="store_true", help="start from the existing table at --output")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.log):
+        print(f"⚠️  Task log not found: {args.log}")
+        return 1
+
+    agent = QLearningAgent(actions=DEFAULT_ACTIONS, alpha=args.alpha, gamma=args.gamma, q_path=args.output)
+    if not args.resume:
+        agent.q = QTable(DEFAULT_ACTIONS)
+
+    print(f"📚 Replaying {args.log} for {args.epochs} epoch(s)")
+    stats = replay_log(agent, args.log, args.epochs, args.chunksize, args.batch_size)
+    agent.save_q_table(args.output)
+
+    print(f"\n✅ Replay complete: {stats['transitions']:,} transitions in {stats['seconds']:.2f}s "
+          f"({stats['per_sec']:,.0f} transitions/sec)")
+    print(f"🧠 {len(agent.q)} states learned, Q-table saved to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
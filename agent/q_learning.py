@@ -1,39 +1,139 @@
 import os
 import pickle
-import random
+
+import numpy as np
+
+from agent.q_table import QTable
+from agent.snapshot import append_delta, delta_path, is_snapshot, load_snapshot, replay_deltas, save_snapshot
+
+DEFAULT_ACTIONS = ["open", "mute", "play", "unmute", "close", "screenshot", "set_dnd"]
 
 class QLearningAgent:
-    def __init__(self, actions, alpha=0.2, gamma=0.9, epsilon=0.2, q_path="data/q_table.pkl"):
+    def __init__(self, actions, alpha=0.2, gamma=0.9, epsilon=0.2, q_path="data/q_table.qsnap", seed=None):
         self.actions = actions
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
         self.q_path = q_path
-        self.q = {}
+        self.rng = np.random.default_rng(seed)
+        self.q = QTable(actions)
         self.load_q_table(q_path)
 
     def _ensure_state(self, state):
-        if state not in self.q:
-            self.q[state] = {a: 0.0 for a in self.actions}
+        return self.q.state_id(state)
 
     def select_action(self, state):
-        self._ensure_state(state)
-        if random.random() < self.epsilon:
-            return random.choice(self.actions)
-        return max(self.q[state], key=self.q[state].get)
+        sid = self._ensure_state(state)
+        if self.rng.random() < self.epsilon:
+            return self.actions[self.rng.integers(len(self.actions))]
+        return self.q.actions[self.q.best_action_id(sid)]
 
     def update_q_table(self, state, action, reward, next_state):
-        self._ensure_state(state)
-        self._ensure_state(next_state)
-        old = self.q[state][action]
-        next_max = max(self.q[next_state].values()) if self.q[next_state] else 0.0
-        new = old + self.alpha * (reward + self.gamma * next_max - old)
-        self.q[state][action] = new
+        sid = self._ensure_state(state)
+        next_sid = self._ensure_state(next_state)
+        aid = self.q.action_id(action)
+        values = self.q.values
+        old = values[sid, aid]
+        next_max = values[next_sid].max() if self.q.n_actions else 0.0
+        values[sid, aid] = old + self.alpha * (reward + self.gamma * next_max - old)
+        self.q.mark_dirty(sid)
+
+    def select_actions(self, states):
+        """Epsilon-greedy actions for a batch of states.
+
+        Exploration coins and random action picks come from a single
+        vectorized draw on ``self.rng``; greedy picks are a row-wise argmax.
+        """
+        sids = self.q.state_ids(states)
+        draws = self.rng.random((2, len(sids)))
+        chosen = np.asarray(self.q.actions, dtype=object)[np.argmax(self.q.values[sids], axis=1)]
+        explore = draws[0] < self.epsilon
+        random_ids = (draws[1][explore] * len(self.actions)).astype(np.int64)
+        chosen[explore] = np.asarray(self.actions, dtype=object)[random_ids]
+        return chosen.tolist()
+
+    def update_batch(self, states, actions, rewards, next_states, duplicates="mean"):
+        """Apply a batch of Q-learning updates.
+
+        With ``duplicates="mean"`` (the default) the batch is one vectorized
+        step: every TD target is bootstrapped from the table as it was
+        before the batch, and the TD errors of duplicate (state, action)
+        pairs are averaged, so such a cell moves *once*, by ``alpha`` times
+        the mean. This is NOT N sequential updates: 1000 identical +2
+        answers move a cell as far as one does. It suits replay
+        mini-batches, where averaging keeps repeated samples stable. When
+        each pair appears once and no transition bootstraps from a state
+        updated in the same batch (e.g. ``next_state == state``), it equals
+        calling ``update_q_table`` per transition.
+
+        ``duplicates="sequential"`` applies the transitions one after
+        another in order, exactly like a loop of ``update_q_table``, for
+        callers whose rows are real answers that must each count (log
+        replay, the feedback server). Returns the per-transition TD errors.
+        """
+        sids = self.q.state_ids(states)
+        next_sids = self.q.state_ids(next_states)
+        aids = self.q.action_ids(actions)
+        return self.update_batch_ids(sids, aids, np.asarray(rewards, dtype=np.float64), next_sids,
+                                     duplicates=duplicates)
+
+    def update_batch_ids(self, sids, aids, rewards, next_sids, weights=None, duplicates="mean"):
+        """``update_batch`` on already-interned state and action id arrays.
+
+        ``weights`` optionally scales each transition's TD error (e.g.
+        importance-sampling weights of prioritized replay); the returned TD
+        errors are unweighted.
+        """
+        if duplicates == "sequential":
+            return self._update_sequential(sids, aids, rewards, next_sids, weights)
+        if duplicates != "mean":
+            raise ValueError(f"duplicates must be 'mean' or 'sequential', not {duplicates!r}")
+        values = self.q.values
+        n_actions = values.shape[1]
+        next_max = values[next_sids].max(axis=1) if n_actions else np.zeros(len(sids))
+        td = rewards + self.gamma * next_max - values[sids, aids]
+        cells, inverse, counts = np.unique(sids * n_actions + aids, return_inverse=True, return_counts=True)
+        step = td if weights is None else td * weights
+        mean_td = np.bincount(inverse, weights=step, minlength=len(cells)) / counts
+        rows = cells // n_actions
+        values[rows, cells % n_actions] += self.alpha * mean_td
+        self.q.mark_rows_dirty(rows.tolist())
+        return td
+
+    def _update_sequential(self, sids, aids, rewards, next_sids, weights=None):
+        """Transitions applied in order on Python copies of the touched rows, then written back"""
+        values = self.q.values
+        rows = {}
+        td = np.empty(len(sids))
+        weights = [1.0] * len(sids) if weights is None else np.asarray(weights, dtype=np.float64).tolist()
+        for i, (sid, aid, reward, next_sid, weight) in enumerate(
+                zip(np.asarray(sids).tolist(), np.asarray(aids).tolist(), np.asarray(rewards).tolist(),
+                    np.asarray(next_sids).tolist(), weights)):
+            row = rows.get(sid)
+            if row is None:
+                row = rows[sid] = values[sid].tolist()
+            next_row = rows.get(next_sid)
+            if next_row is None:
+                next_row = rows[next_sid] = values[next_sid].tolist()
+            error = reward + self.gamma * (max(next_row) if next_row else 0.0) - row[aid]
+            row[aid] += self.alpha * weight * error
+            td[i] = error
+        updated = list(dict.fromkeys(np.asarray(sids).tolist()))
+        if updated:
+            values[updated] = np.array([rows[sid] for sid in updated], dtype=values.dtype)
+            self.q.mark_rows_dirty(updated)
+        return td
 
     def top_actions(self, state, k=2):
         """Get top k actions for a given state, sorted by Q-value"""
-        self._ensure_state(state)
-        return sorted(self.q[state].items(), key=lambda kv: kv[1], reverse=True)[:k]
+        sid = self._ensure_state(state)
+        row = self.q.values[sid]
+        if k <= 2 and self.q.n_actions:
+            best, next_best, _, _ = self.q.summary(sid)
+            ids = [best, next_best][:min(k, self.q.n_actions)]
+        else:
+            ids = self.q.top_action_ids(sid, k)
+        return [(self.q.actions[aid], float(row[aid])) for aid in ids]
     
     def get_next_best_action(self, state):
         """Get the next best action suggestion (second highest Q-value)"""
@@ -43,30 +143,94 @@ class QLearningAgent:
         elif len(top_actions) == 1:
             return top_actions[0][0]  # Only one action available
         else:
-            return random.choice(self.actions)  # Fallback to random
+            return self.actions[self.rng.integers(len(self.actions))]  # Fallback to random
     
     def get_action_confidence(self, state, action):
         """Get confidence score for a specific state-action pair"""
-        self._ensure_state(state)
-        max_q = max(self.q[state].values()) if self.q[state] else 0
-        min_q = min(self.q[state].values()) if self.q[state] else 0
-        action_q = self.q[state].get(action, 0)
+        sid = self._ensure_state(state)
+        if not self.q.n_actions:
+            return 0.5
+        _, _, min_q, max_q = self.q.summary(sid)
+        aid = self.q.action_index.get(action)
+        action_q = float(self.q.values[sid, aid]) if aid is not None else 0
         
         if max_q == min_q:
             return 0.5  # Neutral confidence when all actions have same Q-value
         
         # Normalize confidence between 0 and 1
-        confidence = (action_q - min_q) / (max_q - min_q) if max_q != min_q else 0.5
+        confidence = (action_q - min_q) / (max_q - min_q)
         return round(confidence, 2)
 
+    def query_states(self, states, k=2, actions=None):
+        """Best, next-best and top-k actions plus confidence for many states in one vectorized pass.
+
+        Returns a dict of per-state lists: ``best``, ``next_best``, ``top``
+        (``k`` (action, q) pairs, best first) and ``confidence`` of
+        ``actions[i]`` in ``states[i]`` (of the best action when ``actions``
+        is None), each matching the single-state methods.
+        """
+        sids = self.q.state_ids(states)
+        values = self.q.values[sids]
+        ids = self.q.top_k_ids(sids, max(k, 2))
+        names = np.asarray(self.q.actions, dtype=object)
+        best = ids[:, 0]
+        next_best = ids[:, 1] if ids.shape[1] > 1 else best
+        chosen = best if actions is None else np.fromiter(
+            (self.q.action_index.get(a, -1) for a in actions), dtype=np.int64, count=len(sids))
+        rows = np.arange(len(sids))
+        action_q = np.where(chosen >= 0, values[rows, chosen], 0.0)
+        min_q, max_q = values.min(axis=1), values.max(axis=1)
+        span = np.where(max_q > min_q, max_q - min_q, 1.0)
+        confidence = np.where(max_q > min_q, (action_q - min_q) / span, 0.5)
+        top = ids[:, :k]
+        top_q = np.take_along_axis(values, top, axis=1)
+        return {
+            "best": names[best].tolist(),
+            "next_best": names[next_best].tolist(),
+            "top": [list(zip(names[t].tolist(), q.tolist())) for t, q in zip(top, top_q)],
+            "confidence": [round(c, 2) for c in confidence.tolist()],
+        }
+
     def save_q_table(self, path=None):
+        """Atomically write the full table as a memory-mappable snapshot"""
+        path = path or self.q_path
+        save_snapshot(self.q, path)
+        if os.path.exists(delta_path(path)):
+            os.remove(delta_path(path))
+        self.q.dirty.clear()
+
+    def checkpoint(self, path=None, compact_ratio=0.5):
+        """Persist only the rows updated since the last checkpoint.
+
+        Dirty rows are appended to the snapshot's write-ahead delta log and
+        fsynced, so the cost scales with the number of updated states, not
+        the table size. Once the log outgrows ``compact_ratio`` times the
+        snapshot, it is compacted into a fresh full snapshot. Returns True
+        when this checkpoint compacted the log.
+        """
         path = path or self.q_path
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "wb") as f:
-            pickle.dump(self.q, f)
+        if not is_snapshot(path):
+            self.save_q_table(path)
+            return False
+        if self.q.dirty:
+            append_delta(self.q, sorted(self.q.dirty), delta_path(path))
+            self.q.dirty.clear()
+            if os.path.getsize(delta_path(path)) > compact_ratio * os.path.getsize(path):
+                self.save_q_table(path)
+                return True
+        return False
 
     def load_q_table(self, path=None):
+        """Load a snapshot plus its delta log, or a legacy pickle (migrating it to a snapshot)"""
         path = path or self.q_path
-        if os.path.exists(path):
-            with open(path, "rb") as f:
-                self.q = pickle.load(f)
+        if is_snapshot(path):
+            self.q = load_snapshot(path, self.actions)
+            replay_deltas(self.q, delta_path(path))
+            return
+        legacy_path = path if os.path.exists(path) else os.path.splitext(path)[0] + ".pkl"
+        if os.path.exists(legacy_path):
+            with open(legacy_path, "rb") as f:
+                self.q = QTable.from_dict(pickle.load(f), self.actions)
+            if legacy_path != path:
+                print(f"🔄 Migrating legacy Q-table {legacy_path} to snapshot {path}")
+                self.save_q_table(path)
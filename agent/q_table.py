@@ -0,0 +1,176 @@
+import numpy as np
+
+# below this many actions a full stable argsort of each row beats partition + tie fix-up
+PARTIAL_SORT_MIN_ACTIONS = 48
+
+
+class QTable:
+    """Q-values in a growable 2-D NumPy array, indexed by interned state/action ids"""
+
+    def __init__(self, actions, capacity=64, dtype=np.float64):
+        self.actions = []
+        self.action_index = {}
+        self.states = []
+        self.state_index = {}
+        self.values = np.zeros((max(int(capacity), 1), 0), dtype=dtype)
+        self.dirty = set()  # state ids written since the last checkpoint
+        self._summaries = {}  # state id -> (best id, next-best id, min q, max q), dropped when the row is written
+        for action in actions:
+            self.add_action(action)
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, state):
+        return state in self.state_index
+
+    def __iter__(self):
+        return iter(self.states)
+
+    def __getitem__(self, state):
+        """Return a {action: q_value} dict for a known state (a copy, not a view)"""
+        row = self.values[self.state_index[state]]
+        return dict(zip(self.actions, row.tolist()))
+
+    @property
+    def n_actions(self):
+        return len(self.actions)
+
+    @property
+    def active(self):
+        """View of the rows that belong to interned states"""
+        return self.values[:len(self.states)]
+
+    def add_action(self, action):
+        """Intern a new action, appending a zero-filled column"""
+        if action in self.action_index:
+            return self.action_index[action]
+        self.action_index[action] = len(self.actions)
+        self.actions.append(action)
+        column = np.zeros((self.values.shape[0], 1), dtype=self.values.dtype)
+        self.values = np.hstack([self.values, column])
+        self._summaries.clear()
+        return self.action_index[action]
+
+    def action_id(self, action):
+        return self.action_index[action]
+
+    def action_ids(self, actions):
+        """Map a sequence of known actions to their ids as an int array"""
+        return np.fromiter((self.action_index[a] for a in actions), dtype=np.int64, count=len(actions))
+
+    def state_id(self, state):
+        """Intern a state, growing the value array geometrically when full"""
+        sid = self.state_index.get(state)
+        if sid is None:
+            sid = len(self.states)
+            if sid >= self.values.shape[0]:
+                self._grow(sid + 1)
+            self.state_index[state] = sid
+            self.states.append(state)
+        return sid
+
+    def state_ids(self, states):
+        """Intern a sequence of states and return their ids as an int array"""
+        return np.fromiter((self.state_id(s) for s in states), dtype=np.int64, count=len(states))
+
+    def _grow(self, min_rows):
+        capacity = self.values.shape[0]
+        while capacity < min_rows:
+            capacity *= 2
+        grown = np.zeros((capacity, self.values.shape[1]), dtype=self.values.dtype)
+        grown[:self.values.shape[0]] = self.values
+        self.values = grown
+
+    def get(self, state, action, default=0.0):
+        sid = self.state_index.get(state)
+        aid = self.action_index.get(action)
+        if sid is None or aid is None:
+            return default
+        return float(self.values[sid, aid])
+
+    def set(self, state, action, value):
+        sid = self.state_id(state)
+        self.values[sid, self.action_id(action)] = value
+        self.mark_dirty(sid)
+
+    def mark_dirty(self, sid):
+        """Record that a row was written: checkpoint it next time and drop its cached summary"""
+        self.dirty.add(sid)
+        self._summaries.pop(sid, None)
+
+    def mark_rows_dirty(self, rows):
+        """``mark_dirty`` for a sequence of state ids"""
+        self.dirty.update(rows)
+        self.invalidate(rows)
+
+    def invalidate(self, sids=None):
+        """Drop the cached summaries of ``sids`` (all of them if None) after writing rows directly"""
+        if sids is None:
+            self._summaries.clear()
+        else:
+            for sid in sids:
+                self._summaries.pop(sid, None)
+
+    def best_action_id(self, sid):
+        """Greedy action id for a state row (first maximum wins, like dict max)"""
+        return int(np.argmax(self.values[sid]))
+
+    def top_action_ids(self, sid, k):
+        """Ids of the k highest-valued actions, ties kept in action order"""
+        order = np.argsort(-self.values[sid], kind="stable")
+        return order[:k]
+
+    def top_k_ids(self, sids, k):
+        """(len(sids), k) array of each row's k highest-valued action ids, best first.
+
+        Ties are kept in action order, exactly as ``top_action_ids``. With
+        many actions each row's k-th largest value comes from a partial sort
+        (``np.partition``), so only the k survivors are fully sorted; short
+        rows are simply argsorted.
+        """
+        values = self.values[np.asarray(sids, dtype=np.int64)]
+        m, n = values.shape
+        k = min(k, n)
+        if n < PARTIAL_SORT_MIN_ACTIONS:
+            return np.argsort(-values, axis=1, kind="stable")[:, :k]
+        if k < n:
+            kth = -np.partition(-values, k - 1, axis=1)[:, k - 1:k]
+            above = values > kth
+            ties = values == kth
+            keep = above | (ties & (np.cumsum(ties, axis=1) <= k - above.sum(axis=1, keepdims=True)))
+            ids = np.nonzero(keep)[1].reshape(m, k)
+        else:
+            ids = np.broadcast_to(np.arange(n), (m, n))
+        order = np.argsort(-np.take_along_axis(values, ids, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(ids, order, axis=1)
+
+    def summary(self, sid):
+        """(best id, next-best id, min q, max q) of a row, cached until the row is written.
+
+        With a single action the next-best id is the best id.
+        """
+        cached = self._summaries.get(sid)
+        if cached is None:
+            row = self.values[sid]
+            best, *rest = self.top_action_ids(sid, 2).tolist()
+            cached = self._summaries[sid] = (best, rest[0] if rest else best, float(row.min()), float(row.max()))
+        return cached
+
+    def to_dict(self):
+        """Export as the legacy nested {state: {action: q_value}} dict"""
+        rows = self.active.tolist()
+        return {state: dict(zip(self.actions, row)) for state, row in zip(self.states, rows)}
+
+    @classmethod
+    def from_dict(cls, q, actions=()):
+        """Build a table from a nested {state: {action: q_value}} dict"""
+        table = cls(actions, capacity=len(q) or 64)
+        for row in q.values():
+            for action in row:
+                table.add_action(action)
+        for state, row in q.items():
+            sid = table.state_id(state)
+            for action, value in row.items():
+                table.values[sid, table.action_index[action]] = value
+        return table
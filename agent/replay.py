@@ -0,0 +1,257 @@
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+
+from agent.feedback import OracleFeedback, compute_reward
+from agent.intent_parser import TaskIntentIndex
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+from agent.simulation import optimal_accuracy
+from agent.task_source import TASK_FILE, load_tasks
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of (state id, action id, reward, next state id) transitions.
+
+    Preallocated NumPy columns, so memory is set by ``capacity`` and adding
+    never allocates; once full, the oldest transition is overwritten. Ids
+    are those of the agent's ``QTable`` and stay valid for its lifetime.
+    """
+
+    def __init__(self, capacity=100_000, seed=None):
+        self.capacity = int(capacity)
+        self.sids = np.zeros(self.capacity, dtype=np.int64)
+        self.aids = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float64)
+        self.next_sids = np.zeros(self.capacity, dtype=np.int64)
+        self.position = 0  # slot the next transition goes to
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, sid, aid, reward, next_sid):
+        """Store one transition; returns its slot"""
+        return int(self.add_batch([sid], [aid], [reward], [next_sid])[0])
+
+    def add_batch(self, sids, aids, rewards, next_sids):
+        """Store transitions in order, wrapping around; returns their slots"""
+        slots = (self.position + np.arange(len(sids))) % self.capacity
+        self.sids[slots], self.aids[slots], self.rewards[slots], self.next_sids[slots] = sids, aids, rewards, next_sids
+        self.position = int(slots[-1] + 1) % self.capacity if len(slots) else self.position
+        self.size = min(self.size + len(slots), self.capacity)
+        return slots
+
+    def sample(self, batch_size):
+        """(slots, sids, aids, rewards, next_sids, weights) of a uniform sample; weights is None"""
+        slots = self.rng.integers(0, self.size, batch_size)
+        return slots, self.sids[slots], self.aids[slots], self.rewards[slots], self.next_sids[slots], None
+
+    def update_priorities(self, slots, td_errors):
+        """No-op for uniform sampling"""
+
+
+class SumTree:
+    """Binary tree of priority sums over ``capacity`` leaves, stored in one array.
+
+    ``tree[1]`` is the total and leaf ``i`` lives at ``tree[size + i]``.
+    Updating priorities and finding the leaf under a cumulative value both
+    walk one root-to-leaf path, O(log n), vectorized over many leaves at once.
+    """
+
+    def __init__(self, capacity):
+        self.size = 1 << max(int(capacity) - 1, 1).bit_length()
+        self.tree = np.zeros(2 * self.size)
+
+    @property
+    def total(self):
+        return float(self.tree[1])
+
+    def __getitem__(self, leaves):
+        return self.tree[self.size + np.asarray(leaves)]
+
+    def update(self, leaves, priorities):
+        if not len(leaves):
+            return
+        nodes = np.unique(self.size + np.asarray(leaves, dtype=np.int64))
+        self.tree[self.size + np.asarray(leaves, dtype=np.int64)] = priorities
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """Leaf index holding each cumulative priority in ``values`` (each in ``[0, total)``)"""
+        if not len(values):
+            return np.zeros(0, dtype=np.int64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        while nodes[0] < self.size:
+            left = self.tree[2 * nodes]
+            right = values >= left
+            values -= left * right
+            nodes = 2 * nodes + right
+        return nodes - self.size
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """``ReplayBuffer`` that samples transitions in proportion to ``priority ** alpha``.
+
+    Priorities are the last absolute TD error plus ``epsilon``; new
+    transitions get the current maximum so each is replayed at least
+    once soon. Samples are stratified over the sum-tree and carry
+    importance-sampling weights ``(N * P) ** -beta`` normalized to 1.
+    """
+
+    def __init__(self, capacity=100_000, alpha=0.6, beta=0.4, epsilon=1e-3, seed=None):
+        super().__init__(capacity, seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+        self.tree = SumTree(self.capacity)
+        self.max_priority = 1.0
+
+    def add_batch(self, sids, aids, rewards, next_sids):
+        slots = super().add_batch(sids, aids, rewards, next_sids)
+        self.tree.update(slots, np.full(len(slots), self.max_priority ** self.alpha))
+        return slots
+
+    def sample(self, batch_size):
+        total = self.tree.total
+        bounds = np.linspace(0.0, total, batch_size + 1)
+        slots = self.tree.find(np.minimum(self.rng.uniform(bounds[:-1], bounds[1:]), np.nextafter(total, 0)))
+        slots = np.minimum(slots, self.size - 1)  # rounding can step past the last filled leaf
+        probabilities = self.tree[slots] / total
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        return slots, self.sids[slots], self.aids[slots], self.rewards[slots], self.next_sids[slots], weights
+
+    def update_priorities(self, slots, td_errors):
+        if not len(slots):
+            return
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(slots, priorities ** self.alpha)
+
+
+class Replayer:
+    """Learns from every transition again and again, from a bounded replay buffer.
+
+    ``observe`` applies a fresh transition exactly like ``update_q_table``
+    and stores it. The action named in a 👎 correction is not stored: it
+    was never taken, so no reward was ever applied to it. ``replay`` applies mini-batches sampled from the buffer
+    through the agent's vectorized ``update_batch_ids`` (feeding TD errors
+    back as priorities). ``start`` runs ``replay`` on a background thread,
+    e.g. while the CLI waits for the next human answer; a lock keeps it and
+    ``observe`` from writing the table at the same time.
+    """
+
+    def __init__(self, agent, buffer=None, batch_size=32):
+        self.agent = agent
+        self.buffer = buffer if buffer is not None else ReplayBuffer()
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.replayed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def observe(self, state, action, reward, next_state):
+        with self.lock:
+            self.agent.update_q_table(state, action, reward, next_state)
+            q = self.agent.q
+            self.buffer.add(q.state_id(state), q.action_id(action), reward, q.state_id(next_state))
+
+    def replay(self, batches=1):
+        """Apply ``batches`` sampled mini-batches; returns the number of transitions replayed"""
+        applied = 0
+        for _ in range(batches):
+            with self.lock:
+                if not len(self.buffer):
+                    break
+                slots, sids, aids, rewards, next_sids, weights = self.buffer.sample(self.batch_size)
+                td = self.agent.update_batch_ids(sids, aids, rewards, next_sids, weights)
+                self.buffer.update_priorities(slots, td)
+            applied += len(slots)
+        self.replayed += applied
+        return applied
+
+    def start(self, interval=0.05, batches=1):
+        """Replay ``batches`` mini-batches every ``interval`` seconds on a daemon thread"""
+        def run():
+            while not self._stop.wait(interval):
+                self.replay(batches)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="replayer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+def labels_to_converge(tasks, replay=None, batches_per_label=4, batch_size=32, noise=0.0, max_labels=5_000, seed=0):
+    """Human labels the agent needs before its greedy policy is optimal on ``tasks``.
+
+    Tasks are labelled one at a time by the oracle, cycling through the
+    list; after each label ``batches_per_label`` mini-batches are replayed
+    from a ``replay`` buffer ("uniform" or "prioritized"), or none when
+    ``replay`` is None. Returns (labels, transitions applied), labels being
+    None if ``max_labels`` did not suffice.
+    """
+    agent = QLearningAgent(DEFAULT_ACTIONS, q_path="", seed=seed)
+    random.seed(seed)
+    provider = OracleFeedback(DEFAULT_ACTIONS, noise=noise, seed=seed)
+    index = TaskIntentIndex(tasks, agent.q)
+    labels = [provider.label(task) for task in tasks]
+    labeled = np.array([label is not None for label in labels])
+    label_ids = np.array([agent.q.action_id(label) if label else -1 for label in labels])
+    target = optimal_accuracy(index.intents, labels)
+    buffer = {"uniform": ReplayBuffer, "prioritized": PrioritizedReplayBuffer}[replay](10_000, seed=seed) \
+        if replay else None
+    replayer = Replayer(agent, buffer, batch_size) if buffer is not None else None
+
+    for n in range(1, max_labels + 1):
+        task, intent = tasks[(n - 1) % len(tasks)], index.intents[(n - 1) % len(tasks)]
+        action = agent.select_action(intent)
+        feedback, correction = provider(task, intent, action)
+        reward, _, _ = compute_reward(feedback, correction)
+        if replayer is not None:
+            replayer.observe(intent, action, reward, intent)
+            replayer.replay(batches_per_label)
+        else:
+            agent.update_q_table(intent, action, reward, intent)
+        greedy = np.argmax(agent.q.values[index.state_ids], axis=1)
+        if np.mean(~labeled | (greedy == label_ids)) >= target - 1e-9:
+            return n, n + (replayer.replayed if replayer else 0)
+    return None, max_labels + (replayer.replayed if replayer else 0)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Human labels needed to converge, with and without experience replay")
+    parser.add_argument("--tasks", default=TASK_FILE)
+    parser.add_argument("--batches", type=int, default=4, help="replayed mini-batches per human label")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--noise", type=float, default=0.0, help="oracle's chance of a flipped answer")
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    tasks = load_tasks(args.tasks)
+    modes = [("none", None), ("uniform", "uniform"), ("prioritized", "prioritized")]
+    print(f"{'replay':<22} {'labels to converge (per seed)':<32} {'mean':>6} {'updates':>9} {'seconds':>8}")
+    for name, replay in modes:
+        start = time.perf_counter()
+        runs = [labels_to_converge(tasks, replay, args.batches, args.batch_size, args.noise, seed=seed)
+                for seed in range(args.seeds)]
+        elapsed = time.perf_counter() - start
+        labels = [n for n, _ in runs]
+        done = [n for n in labels if n is not None]
+        mean = f"{np.mean(done):.0f}" if len(done) == len(labels) else "-"
+        print(f"{name:<22} {' '.join(str(n or '∞') for n in labels):<32} {mean:>6} "
+              f"{np.mean([u for _, u in runs]):>9,.0f} {elapsed:>8.2f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
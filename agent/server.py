@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+from contextlib import suppress
+
+from agent.feedback import compute_reward
+from agent.intent_parser import parse_intent
+from agent.logger import TaskLogger
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class FeedbackServer:
+    """Local asyncio HTTP service in front of a ``QLearningAgent``.
+
+    Endpoints (JSON in, JSON out, HTTP/1.1 keep-alive):
+
+    - ``POST /select``   ``{"task": "Mute audio"}`` or ``{"intent": "mute"}``
+      returns the action, next-best action and confidence.
+    - ``POST /feedback`` ``{"intent", "action", "feedback": "👍"|"👎", "correction"?, "task_id"?}``
+      is acknowledged immediately (202) and queued.
+    - ``GET /stats``     counters for the running service.
+
+    Queued feedback is micro-batched: the batcher waits for the first item,
+    then collects more for up to ``max_delay`` seconds or ``max_batch``
+    items and applies them with one sequential ``update_batch`` call (every
+    answer counts, in arrival order) plus buffered log writes. Everything runs on the event loop thread, so the agent needs no
+    locking.
+    """
+
+    def __init__(self, agent, task_logger=None, max_batch=256, max_delay=0.005, checkpoint_interval=30.0):
+        self.agent = agent
+        self.task_logger = task_logger
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.checkpoint_interval = checkpoint_interval
+        self.queue = asyncio.Queue()
+        self.stats = {"selects": 0, "feedback": 0, "batches": 0, "updates": 0, "failed": 0}
+        self._feedback_seq = 0
+
+    async def dispatch(self, method, target, body):
+        path = target.split("?", 1)[0]
+        if path == "/stats":
+            return 200, dict(self.stats, queued=self.queue.qsize(), states=len(self.agent.q))
+        if path not in ("/select", "/feedback"):
+            return 404, {"error": f"unknown endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "body must be JSON"}
+        if not isinstance(request, dict):
+            return 400, {"error": "body must be a JSON object"}
+        if path == "/select":
+            return self.select(request)
+        return self.submit_feedback(request)
+
+    def select(self, request):
+        if not _optional_strings(request, "intent", "task"):
+            return 400, {"error": "'task' and 'intent' must be strings"}
+        intent = request.get("intent") or parse_intent(request.get("task") or "")
+        if not intent:
+            return 400, {"error": "need 'task' or 'intent'"}
+        action = self.agent.select_action(intent)
+        self.stats["selects"] += 1
+        return 200, {
+            "intent": intent,
+            "action": action,
+            "next_best": self.agent.get_next_best_action(intent),
+            "confidence": self.agent.get_action_confidence(intent, action),
+        }
+
+    def submit_feedback(self, request):
+        intent, action, feedback = request.get("intent"), request.get("action"), request.get("feedback")
+        if not _optional_strings(request, "intent", "action", "feedback", "correction", "task", "task_id"):
+            return 400, {"error": "'intent', 'action', 'feedback', 'correction', 'task' and 'task_id' must be strings"}
+        if not intent or action not in self.agent.q.action_index or feedback not in ("👍", "👎"):
+            return 400, {"error": "need 'intent', a known 'action' and 'feedback' of 👍 or 👎"}
+        reward, feedback_text, suggestion = compute_reward(feedback, request.get("correction"))
+        self._feedback_seq += 1
+        task_id = request.get("task_id") or f"api-{self._feedback_seq}"
+        self.queue.put_nowait((task_id, intent, action, reward, feedback_text, suggestion))
+        self.stats["feedback"] += 1
+        return 202, {"queued": True, "reward": reward}
+
+    async def run_batcher(self):
+        loop = asyncio.get_running_loop()
+        last_checkpoint = loop.time()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            try:
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            finally:
+                self.apply_safely(batch)  # also on cancellation, so collected feedback is never dropped
+            if self.checkpoint_interval and loop.time() - last_checkpoint >= self.checkpoint_interval:
+                self.agent.checkpoint()
+                last_checkpoint = loop.time()
+
+    def apply(self, batch):
+        _, intents, actions, rewards, _, _ = zip(*batch)
+        self.agent.update_batch(intents, actions, rewards, intents, duplicates="sequential")
+        if self.task_logger is not None:
+            for task_id, intent, action, reward, feedback_text, suggestion in batch:
+                self.task_logger.log_episode(task_id, intent, action, reward, feedback_text, suggestion)
+        self.stats["batches"] += 1
+        self.stats["updates"] += len(batch)
+
+    def apply_safely(self, batch):
+        """``apply`` that never kills the batcher: a failing batch is retried item by item and bad items dropped"""
+        try:
+            self.apply(batch)
+            return
+        except Exception:
+            if len(batch) == 1:
+                self.stats["failed"] += 1
+                print(f"⚠️  Dropped feedback {batch[0]!r}", file=sys.stderr)
+                traceback.print_exc()
+                return
+        for item in batch:
+            self.apply_safely([item])
+
+    def drain(self):
+        """Apply whatever is still queued (used at shutdown)"""
+        batch = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            self.apply_safely(batch)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                    body = await reader.readexactly(int(headers.get("content-length") or 0))
+                    status, payload = await self.dispatch(method, target, body)
+                except ValueError:
+                    status, payload = 400, {"error": "malformed request"}
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+def _optional_strings(request, *fields):
+    """True when each of ``fields`` is absent, null or a string"""
+    return all(isinstance(request.get(field), (str, type(None))) for field in fields)
+
+async def serve(agent, task_logger=None, host="127.0.0.1", port=8765, unix_path=None, ready=None, stop=None,
+                **batch_options):
+    """Run the feedback server until ``stop`` is set (or the task is cancelled), then flush updates and logs"""
+    server = FeedbackServer(agent, task_logger, **batch_options)
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle_connection, path=unix_path)
+    else:
+        listener = await asyncio.start_server(server.handle_connection, host, port)
+    batcher = asyncio.create_task(server.run_batcher())
+    if ready is not None:
+        ready.set()
+    stop = stop or asyncio.Event()
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        # Let the batcher apply the batch it holds before draining the queue and checkpointing
+        batcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await batcher
+        server.drain()
+        agent.checkpoint()
+        if task_logger is not None:
+            task_logger.flush()
+
+async def _serve_until_signalled(agent, task_logger, host, port, unix_path, **batch_options):
+    """``serve`` with SIGINT/SIGTERM turned into a clean stop, so shutdown is never interrupted"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # e.g. Windows event loops
+            pass
+    await serve(agent, task_logger, host, port, unix_path, stop=stop, **batch_options)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local feedback-ingestion server for the RL agent")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="serve on this Unix socket path instead of TCP")
+    parser.add_argument("--q-path", default=os.path.join("data", "q_table.qsnap"))
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    parser.add_argument("--no-log", action="store_true", help="do not append feedback to the task log")
+    args = parser.parse_args(argv)
+
+    agent = QLearningAgent(actions=DEFAULT_ACTIONS, q_path=args.q_path)
+    task_logger = None if args.no_log else TaskLogger(os.path.join("data", "task_log.csv"),
+                                                      os.path.join("data", "episode_log.txt"))
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"🛰️  Feedback server listening on {where} (Ctrl+C to stop)")
+    started = time.time()
+    try:
+        asyncio.run(_serve_until_signalled(agent, task_logger, args.host, args.port, args.unix,
+                                           max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if task_logger is not None:
+            task_logger.close()
+    print(f"👋 Server stopped after {time.time() - started:.0f}s, Q-table checkpointed to {args.q_path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
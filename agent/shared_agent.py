@@ -0,0 +1,164 @@
+import argparse
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+import numpy as np
+
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+
+
+class SharedQLearningAgent(QLearningAgent):
+    """Thread-safe ``QLearningAgent`` meant to be shared by every session of a process.
+
+    Rows are guarded by ``n_stripes`` locks chosen by state id, so sessions
+    working on different intents select actions and apply feedback in
+    parallel, while two updates to the same row serialize and neither is
+    lost. Interning a new state takes a separate lock; growing the value
+    array (which reallocates it) takes every stripe too, and saving or
+    checkpointing takes the intern lock and then every stripe.
+    """
+
+    def __init__(self, actions, n_stripes=64, **kwargs):
+        self._stripes = [threading.RLock() for _ in range(n_stripes)]
+        self._intern_lock = threading.RLock()  # re-entered when checkpoint() compacts via save_q_table()
+        super().__init__(actions, **kwargs)
+
+    @contextmanager
+    def _locked(self, *sids):
+        """Hold the stripes for ``sids`` (all stripes if none given), in a fixed order"""
+        n = len(self._stripes)
+        stripes = sorted({sid % n for sid in sids}) if sids else range(n)
+        with ExitStack() as stack:
+            for i in stripes:
+                stack.enter_context(self._stripes[i])
+            yield
+
+    def _ensure_state(self, state):
+        sid = self.q.state_index.get(state)
+        if sid is not None:
+            return sid
+        with self._intern_lock:
+            if state not in self.q.state_index and len(self.q.states) >= self.q.values.shape[0]:
+                with self._locked():
+                    return self.q.state_id(state)
+            return self.q.state_id(state)
+
+    def select_action(self, state):
+        sid = self._ensure_state(state)
+        if self.rng.random() < self.epsilon:
+            return self.actions[self.rng.integers(len(self.actions))]
+        with self._locked(sid):
+            return self.q.actions[self.q.best_action_id(sid)]
+
+    def update_q_table(self, state, action, reward, next_state):
+        sid = self._ensure_state(state)
+        next_sid = self._ensure_state(next_state)
+        aid = self.q.action_id(action)
+        with self._locked(sid, next_sid):
+            values = self.q.values
+            old = values[sid, aid]
+            next_max = values[next_sid].max() if self.q.n_actions else 0.0
+            values[sid, aid] = old + self.alpha * (reward + self.gamma * next_max - old)
+            self.q.mark_dirty(sid)
+
+    def select_actions(self, states):
+        for state in states:
+            self._ensure_state(state)
+        with self._locked(*self.q.state_ids(states).tolist()):
+            return super().select_actions(states)
+
+    def update_batch_ids(self, sids, aids, rewards, next_sids, weights=None, duplicates="mean"):
+        with self._locked(*np.concatenate([sids, next_sids]).tolist()):
+            return super().update_batch_ids(sids, aids, rewards, next_sids, weights, duplicates)
+
+    def update_batch(self, states, actions, rewards, next_states, duplicates="mean"):
+        for state in list(states) + list(next_states):
+            self._ensure_state(state)
+        return super().update_batch(states, actions, rewards, next_states, duplicates)
+
+    def top_actions(self, state, k=2):
+        sid = self._ensure_state(state)
+        with self._locked(sid):
+            return super().top_actions(state, k)
+
+    def get_action_confidence(self, state, action):
+        sid = self._ensure_state(state)
+        with self._locked(sid):
+            return super().get_action_confidence(state, action)
+
+    def query_states(self, states, k=2, actions=None):
+        for state in states:
+            self._ensure_state(state)
+        with self._locked(*self.q.state_ids(states).tolist()):
+            return super().query_states(states, k, actions)
+
+    @contextmanager
+    def _frozen(self):
+        """Hold the intern lock, then every stripe (the order ``_ensure_state`` uses), so no row or state changes"""
+        with self._intern_lock, self._locked():
+            yield
+
+    def save_q_table(self, path=None):
+        with self._frozen():
+            super().save_q_table(path)
+
+    def checkpoint(self, path=None, compact_ratio=0.5):
+        with self._frozen():
+            return super().checkpoint(path, compact_ratio)
+
+def load_test(agent, sessions=(1, 2, 4, 8, 16), ops_per_session=20_000, n_intents=1000):
+    """Throughput of concurrent select+update sessions against one shared agent.
+
+    Every session also bumps one shared hot row with ``alpha=1, gamma=1``
+    and reward 1, which makes that Q-value an exact update counter, so
+    lost updates show up as a shortfall.
+    """
+    intents = [f"intent{i}" for i in range(n_intents)]
+    results = []
+    for n in sessions:
+        hot = f"__counter_{n}__"
+        hot_agent = SharedQLearningAgent(["count"], alpha=1.0, gamma=1.0, epsilon=0.0, q_path="")
+        barrier = threading.Barrier(n + 1)
+
+        def session(seed):
+            rng = random.Random(seed)
+            barrier.wait()
+            for _ in range(ops_per_session):
+                intent = rng.choice(intents)
+                action = agent.select_action(intent)
+                agent.update_q_table(intent, action, rng.choice((2, -2, -1)), intent)
+                hot_agent.update_q_table(hot, "count", 1, hot)
+
+        threads = [threading.Thread(target=session, args=(seed,)) for seed in range(n)]
+        for t in threads:
+            t.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        expected = n * ops_per_session
+        counted = int(hot_agent.q.get(hot, "count"))
+        results.append({"sessions": n, "ops": expected, "seconds": elapsed,
+                        "ops_per_sec": expected / elapsed, "lost_updates": expected - counted})
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test a shared SharedQLearningAgent")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--ops", type=int, default=20_000, help="select+update pairs per session")
+    parser.add_argument("--intents", type=int, default=1000)
+    parser.add_argument("--stripes", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    agent = SharedQLearningAgent(DEFAULT_ACTIONS, n_stripes=args.stripes, q_path="")
+    print(f"{'sessions':>8} {'ops':>10} {'seconds':>8} {'ops/sec':>12} {'lost':>6}")
+    for r in load_test(agent, args.sessions, args.ops, args.intents):
+        print(f"{r['sessions']:>8} {r['ops']:>10,} {r['seconds']:>8.2f} {r['ops_per_sec']:>12,.0f} {r['lost_updates']:>6}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
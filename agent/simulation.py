@@ -0,0 +1,157 @@
+import argparse
+import os
+import random
+import time
+from collections import Counter
+
+import numpy as np
+
+from agent.intent_parser import TaskIntentIndex
+from agent.feedback import OracleFeedback, ScriptedFeedback, compute_reward
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+from agent.task_source import TASK_FILE, load_tasks
+
+def optimal_accuracy(intents, labels):
+    """Best greedy accuracy any policy over intents can reach (tasks sharing an intent may disagree)"""
+    votes = {}
+    for intent, label in zip(intents, labels):
+        if label is not None:
+            votes.setdefault(intent, Counter())[label] += 1
+    reachable = sum(counts.most_common(1)[0][1] for counts in votes.values())
+    unlabeled = labels.count(None)
+    return (reachable + unlabeled) / len(labels)
+
+def run_simulation(agent, tasks, provider, episodes=1000, task_logger=None, seed=None, on_episode=None,
+                   states="intent"):
+    """Run ``episodes`` passes over ``tasks`` with no I/O beyond optional logging.
+
+    Each step is the CLI loop minus the prompts: select, ask ``provider``,
+    reward, update. After every episode the greedy policy is scored against
+    the oracle's labels (when ``provider`` has them). Returns per-episode
+    rewards and greedy accuracy plus throughput and convergence figures.
+    The agent's states are parsed intents, or with ``states="task"`` the
+    raw task texts (for ``HashedQLearningAgent``, which scores them via
+    ``q_matrix``).
+    """
+    if seed is not None:
+        random.seed(seed)
+    table = getattr(agent, "q", None)  # None for agents without an exact table (HashedQLearningAgent)
+    index = TaskIntentIndex(tasks, table)
+    intents = index.intents
+    observed = list(tasks) if states == "task" else intents
+    labels = [provider.label(task) for task in tasks] if hasattr(provider, "label") else None
+    if labels is not None:
+        labeled = np.array([label is not None for label in labels])
+        action_id = table.action_id if table is not None else agent.action_index.__getitem__
+        label_ids = np.array([action_id(label) if label else -1 for label in labels])
+        target = optimal_accuracy(observed, labels)
+        if table is not None and states == "intent":
+            sids = index.state_ids
+
+            def greedy_ids():
+                return np.argmax(table.values[sids], axis=1)
+        else:
+            unique = list(dict.fromkeys(observed))
+            row_of = {state: row for row, state in enumerate(unique)}
+            rows = np.fromiter((row_of[state] for state in observed), dtype=np.int64, count=len(observed))
+
+            def greedy_ids():
+                return np.argmax(agent.q_matrix(unique), axis=1)[rows]
+
+    rewards = np.zeros(episodes)
+    accuracy = np.full(episodes, np.nan)
+    start = time.perf_counter()
+    for episode in range(episodes):
+        total = 0
+        for task_index, (task, intent, state) in enumerate(zip(tasks, intents, observed), 1):
+            action = agent.select_action(state)
+            feedback, correction = provider(task, intent, action)
+            reward, feedback_text, suggestion = compute_reward(feedback, correction)
+            agent.update_q_table(state, action, reward, state)
+            if task_logger is not None:
+                task_logger.log_episode(f"{episode + 1}-{task_index}", intent, action, reward, feedback_text, suggestion)
+            total += reward
+        rewards[episode] = total
+        if task_logger is not None:
+            task_logger.log_total_reward(episode + 1, total)
+        if labels is not None:
+            accuracy[episode] = np.mean(~labeled | (greedy_ids() == label_ids))
+        if on_episode is not None:
+            on_episode(episode + 1, total)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "episodes": episodes,
+        "tasks": len(tasks),
+        "seconds": elapsed,
+        "episodes_per_sec": episodes / elapsed if elapsed else float("inf"),
+        "rewards": rewards,
+        "accuracy": accuracy,
+        "converged_episode": None,
+    }
+    if labels is not None:
+        result["optimal_accuracy"] = target
+        reached = accuracy >= target - 1e-9
+        if reached[-1]:
+            # first episode from which the greedy policy stays optimal
+            below = np.flatnonzero(~reached)
+            result["converged_episode"] = int(below[-1]) + 2 if below.size else 1
+    return result
+
+def print_report(result):
+    """Print throughput, reward and convergence figures from ``run_simulation``"""
+    rewards = result["rewards"]
+    tail = rewards[-max(1, len(rewards) // 10):]
+    print(f"⚡ {result['episodes']:,} episodes x {result['tasks']} tasks in {result['seconds']:.2f}s "
+          f"({result['episodes_per_sec']:,.0f} episodes/sec)")
+    print(f"🏆 Reward per episode: first {rewards[0]:.0f}, last-10% mean {tail.mean():.1f}")
+    if "optimal_accuracy" in result:
+        print(f"🎯 Greedy accuracy {result['accuracy'][-1]:.1%} (best reachable {result['optimal_accuracy']:.1%})")
+        if result["converged_episode"]:
+            print(f"📉 Converged at episode {result['converged_episode']}")
+        else:
+            print("📉 Greedy policy has not converged")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless simulated-user training runs")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--tasks", default=TASK_FILE)
+    parser.add_argument("--feedback", choices=["oracle", "scripted"], default="oracle")
+    parser.add_argument("--script", help="feedback script for --feedback scripted")
+    parser.add_argument("--noise", type=float, default=0.0, help="oracle's chance of a flipped answer")
+    parser.add_argument("--alpha", type=float, default=0.2)
+    parser.add_argument("--gamma", type=float, default=0.9)
+    parser.add_argument("--epsilon", type=float, default=0.2)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--q-path", default="", help="load/save this Q-table (default: start fresh, save nothing)")
+    parser.add_argument("--log", action="store_true", help="append every step to data/task_log.csv")
+    args = parser.parse_args(argv)
+
+    tasks = load_tasks(args.tasks)
+    agent = QLearningAgent(DEFAULT_ACTIONS, alpha=args.alpha, gamma=args.gamma, epsilon=args.epsilon,
+                           q_path=args.q_path, seed=args.seed)
+    if args.feedback == "scripted":
+        if not args.script:
+            parser.error("--feedback scripted needs --script")
+        provider = ScriptedFeedback(args.script)
+    else:
+        provider = OracleFeedback(DEFAULT_ACTIONS, noise=args.noise, seed=args.seed)
+
+    task_logger = None
+    if args.log:
+        from agent.logger import TaskLogger
+
+        task_logger = TaskLogger(os.path.join("data", "task_log.csv"), os.path.join("data", "episode_log.txt"))
+    try:
+        result = run_simulation(agent, tasks, provider, args.episodes, task_logger, seed=args.seed)
+    finally:
+        if task_logger is not None:
+            task_logger.close()
+    if args.q_path:
+        agent.save_q_table()
+
+    print_report(result)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from agent.q_table import QTable
+
+MAGIC = b"RLQSNAP\x00"
+VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sIQ")  # magic, version, header length
+DELTA_MAGIC = b"QWAL"
+_FRAME = struct.Struct("<4sQI")  # magic, payload length, crc32 of payload
+_FRAME_HEADER = struct.Struct("<I")  # JSON header length inside a payload
+
+def is_snapshot(path):
+    """True if ``path`` starts with the snapshot magic (as opposed to a legacy pickle)"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def save_snapshot(table, path):
+    """Atomically write ``table`` as a versioned snapshot.
+
+    Layout: a fixed preamble, a JSON state/action index, zero padding to a
+    64-byte boundary and the raw C-ordered value array. The file is written
+    to a temporary name, fsynced and renamed over ``path``, so concurrent
+    readers see either the old or the new snapshot, never a partial one.
+    """
+    values = np.ascontiguousarray(table.active)
+    header = json.dumps({
+        "actions": table.actions,
+        "states": table.states,
+        "dtype": values.dtype.str,
+        "shape": list(values.shape),
+    }).encode("utf-8")
+    data_offset = -(-(_PREAMBLE.size + len(header)) // ALIGNMENT) * ALIGNMENT
+    padding = data_offset - _PREAMBLE.size - len(header)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            f.write(b"\0" * padding)
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def load_snapshot(path, actions=()):
+    """Load a snapshot with its value array memory-mapped copy-on-write.
+
+    Mapping the array is O(1) regardless of table size; pages are read on
+    first touch and updates stay private to the process (the file is never
+    modified in place). Only the state index is parsed eagerly.
+    """
+    with open(path, "rb") as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Q-table snapshot")
+        if version > VERSION:
+            raise ValueError(f"{path} has snapshot version {version}, newest supported is {VERSION}")
+        header = json.loads(f.read(header_len))
+    data_offset = -(-(_PREAMBLE.size + header_len) // ALIGNMENT) * ALIGNMENT
+    rows, cols = header["shape"]
+
+    table = QTable(header["actions"], capacity=1)
+    table.states = list(header["states"])
+    table.state_index = {state: i for i, state in enumerate(table.states)}
+    if rows and cols:
+        values = np.memmap(path, dtype=np.dtype(header["dtype"]), mode="c", offset=data_offset, shape=(rows, cols))
+        # plain ndarray view of the same mapping: np.memmap's Python-level __getitem__ taxes every row access
+        table.values = values.view(np.ndarray)
+    else:
+        table.values = np.zeros((max(rows, 1), cols), dtype=np.dtype(header["dtype"]))
+    for action in actions:
+        table.add_action(action)
+    return table
+
+def delta_path(path):
+    """Write-ahead delta log that belongs to the snapshot at ``path``"""
+    return path + ".wal"
+
+def append_delta(table, state_ids, path):
+    """Append the current rows of ``state_ids`` as one checksummed, fsynced frame"""
+    rows = np.ascontiguousarray(table.values[state_ids], dtype=np.float64)
+    header = json.dumps({"actions": table.actions, "states": [table.states[i] for i in state_ids]}).encode("utf-8")
+    payload = _FRAME_HEADER.pack(len(header)) + header + rows.tobytes()
+    with open(path, "ab") as f:
+        f.write(_FRAME.pack(DELTA_MAGIC, len(payload), zlib.crc32(payload)) + payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+def replay_deltas(table, path):
+    """Apply every complete frame of a delta log to ``table``; returns rows applied.
+
+    A torn frame at the end (a crash mid-append) fails its length or CRC
+    check and is truncated away, so later appends start on a clean boundary.
+    """
+    if not os.path.exists(path):
+        return 0
+    applied = 0
+    good_end = 0
+    with open(path, "rb") as f:
+        while True:
+            frame = f.read(_FRAME.size)
+            if len(frame) < _FRAME.size:
+                break
+            magic, length, crc = _FRAME.unpack(frame)
+            payload = f.read(length)
+            if magic != DELTA_MAGIC or len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            header_len, = _FRAME_HEADER.unpack_from(payload)
+            header = json.loads(payload[_FRAME_HEADER.size:_FRAME_HEADER.size + header_len])
+            action_ids = [table.add_action(a) for a in header["actions"]]
+            rows = np.frombuffer(payload, dtype=np.float64, offset=_FRAME_HEADER.size + header_len)
+            rows = rows.reshape(len(header["states"]), len(action_ids))
+            state_ids = [table.state_id(state) for state in header["states"]]
+            table.values[np.ix_(state_ids, action_ids)] = rows
+            table.invalidate(state_ids)
+            applied += len(state_ids)
+            good_end = f.tell()
+    if os.path.getsize(path) > good_end:
+        os.truncate(path, good_end)
+    return applied
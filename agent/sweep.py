@@ -0,0 +1,161 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from agent.feedback import OracleFeedback
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+from agent.simulation import run_simulation
+from agent.task_source import TASK_FILE, load_tasks
+
+PARAMS = ("alpha", "gamma", "epsilon")
+SWEEP_RESULTS_PATH = os.path.join("data", "sweep_results.csv")
+# Two-sided 95% Student-t critical values for 1..30 degrees of freedom
+T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+       2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def grid(alpha=(0.1, 0.2, 0.5), gamma=(0.5, 0.9), epsilon=(0.05, 0.2)):
+    """Every combination of the given values"""
+    return [dict(zip(PARAMS, values)) for values in itertools.product(alpha, gamma, epsilon)]
+
+def random_configs(n, alpha=(0.01, 1.0), gamma=(0.0, 0.99), epsilon=(0.0, 0.5), seed=None):
+    """``n`` configurations drawn uniformly from the given (low, high) ranges"""
+    rng = random.Random(seed)
+    ranges = dict(zip(PARAMS, (alpha, gamma, epsilon)))
+    return [{name: round(rng.uniform(*ranges[name]), 3) for name in PARAMS} for _ in range(n)]
+
+def run_trial(config, seed, tasks, episodes, noise=0.0):
+    """One seeded simulation of ``config`` with a fresh in-memory agent (runs in a worker process)"""
+    agent = QLearningAgent(DEFAULT_ACTIONS, q_path="", seed=seed, **config)
+    provider = OracleFeedback(DEFAULT_ACTIONS, noise=noise, seed=seed)
+    result = run_simulation(agent, tasks, provider, episodes, seed=seed)
+    return {
+        "config": config,
+        "seed": seed,
+        "rewards": result["rewards"],
+        "accuracy": result["accuracy"],
+        "converged_episode": result["converged_episode"],
+        "seconds": result["seconds"],
+    }
+
+def _run_trial_args(args):
+    return run_trial(*args)
+
+def t_critical(df):
+    """Two-sided 95% Student-t critical value for ``df`` degrees of freedom.
+
+    Uses scipy when it is installed; otherwise the ``T95`` table, and past
+    30 degrees of freedom the Cornish-Fisher expansion around 1.96 (within
+    0.001 there).
+    """
+    try:
+        from scipy.stats import t
+    except ImportError:
+        if df <= len(T95):
+            return T95[df - 1]
+        z = 1.959964
+        return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+    return float(t.ppf(0.975, df))
+
+def summarize(trials):
+    """Per-configuration mean curves with 95% confidence half-widths, best final reward first"""
+    groups = {}
+    for trial in trials:
+        groups.setdefault(tuple(trial["config"][name] for name in PARAMS), []).append(trial)
+    summaries = []
+    for key, group in groups.items():
+        summary = dict(zip(PARAMS, key), seeds=len(group))
+        for name in ("rewards", "accuracy"):
+            curves = np.vstack([trial[name] for trial in group])
+            mean = curves.mean(axis=0)
+            summary[f"{name.rstrip('s')}_mean"] = mean
+            if len(group) > 1:
+                spread = curves.std(axis=0, ddof=1)
+                summary[f"{name.rstrip('s')}_ci"] = t_critical(len(group) - 1) * spread / np.sqrt(len(group))
+            else:
+                summary[f"{name.rstrip('s')}_ci"] = np.zeros_like(mean)
+        tail = max(1, len(summary["reward_mean"]) // 10)
+        converged = [t["converged_episode"] for t in group]
+        summary["final_reward"] = float(summary["reward_mean"][-tail:].mean())
+        summary["final_accuracy"] = float(summary["accuracy_mean"][-1])
+        summary["converged"] = sum(c is not None for c in converged)
+        summary["converged_episode"] = (float(np.median([c for c in converged if c is not None]))
+                                        if summary["converged"] else None)
+        summaries.append(summary)
+    summaries.sort(key=lambda s: (-s["final_reward"], s["converged_episode"] or float("inf")))
+    return summaries
+
+def run_sweep(configs, seeds, tasks, episodes=300, noise=0.0, workers=None):
+    """Run every (config, seed) trial across a process pool and summarize per configuration"""
+    jobs = [(config, seed, tasks, episodes, noise) for config in configs for seed in seeds]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        trials = list(map(_run_trial_args, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            trials = list(pool.map(_run_trial_args, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    return summarize(trials)
+
+def write_results(summaries, path=SWEEP_RESULTS_PATH):
+    """Results table as CSV, one row per configuration"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    columns = list(PARAMS) + ["seeds", "final_reward", "final_accuracy", "converged", "converged_episode"]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for summary in summaries:
+            writer.writerow([summary[name] for name in columns])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter / multi-seed sweep against the simulated user")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    for name in PARAMS:
+        parser.add_argument(f"--{name}", type=float, nargs="+",
+                            help="values to try (grid), or the range their min and max span (random)")
+    parser.add_argument("--samples", type=int, default=20, help="configurations for --search random")
+    parser.add_argument("--search-seed", type=int, default=0, help="seed for drawing --search random configurations")
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--episodes", type=int, default=300)
+    parser.add_argument("--noise", type=float, default=0.0, help="simulated user's chance of a flipped answer")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--tasks", default=TASK_FILE)
+    parser.add_argument("--output", default=SWEEP_RESULTS_PATH)
+    parser.add_argument("--chart", default=os.path.join("data", "sweep.png"))
+    args = parser.parse_args(argv)
+
+    given = {name: getattr(args, name) for name in PARAMS if getattr(args, name)}
+    if args.search == "grid":
+        configs = grid(**given)
+    else:
+        configs = random_configs(args.samples, seed=args.search_seed,
+                                 **{name: (min(values), max(values)) for name, values in given.items()})
+    tasks = load_tasks(args.tasks)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"🧪 {len(configs)} configurations x {args.seeds} seeds x {args.episodes} episodes on {workers} workers")
+
+    start = time.perf_counter()
+    summaries = run_sweep(configs, range(args.seeds), tasks, args.episodes, args.noise, workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'alpha':>6} {'gamma':>6} {'epsilon':>7} {'reward':>8} {'accuracy':>9} {'converged':>10} {'episode':>8}")
+    for s in summaries:
+        episode = f"{s['converged_episode']:.0f}" if s["converged_episode"] is not None else "-"
+        print(f"{s['alpha']:>6g} {s['gamma']:>6g} {s['epsilon']:>7g} {s['final_reward']:>8.1f} "
+              f"{s['final_accuracy']:>9.1%} {s['converged']:>4}/{s['seeds']:<5} {episode:>8}")
+    print(f"⏱️  {len(configs) * args.seeds} trials in {elapsed:.1f}s")
+
+    write_results(summaries, args.output)
+    print(f"💾 Saved sweep results to: {args.output}")
+    from agent.visualizer import plot_sweep
+
+    plot_sweep(summaries, args.chart)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
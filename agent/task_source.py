@@ -0,0 +1,216 @@
+import argparse
+import glob
+import gzip
+import os
+import re
+import threading
+import time
+from array import array
+from itertools import islice
+
+import numpy as np
+
+TASK_FILE = os.path.join("data", "task_log.txt")
+SEPARATOR = " - "
+_ROTATED = re.compile(r"\.(\d+)(\.gz)?$")
+
+def split_task_line(line):
+    """(timestamp, task) for a ``HH:MM AM - task`` line, or None if it holds no task.
+
+    Only the first separator splits, so tasks that contain " - " themselves
+    ("Open Q3 - final.pptx") stay whole.
+    """
+    timestamp, sep, task = line.strip().partition(SEPARATOR)
+    task = task.strip()
+    if not sep or not task:
+        return None
+    return timestamp.strip(), task
+
+def rotated_paths(path):
+    """``path`` preceded by its rotated siblings (``path.1``, ``path.2.gz``, ...), oldest first"""
+    rotated = [p for p in glob.glob(glob.escape(path) + ".*") if _ROTATED.search(p[len(path):])]
+    rotated.sort(key=lambda p: -int(_ROTATED.search(p[len(path):]).group(1)))
+    return rotated + ([path] if os.path.exists(path) else [])
+
+def _open(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+class TaskOffsetIndex:
+    """Byte offset of every task line of one file, persisted next to it.
+
+    Built in one streaming pass and saved as ``<path>.idx.npz``; when the
+    file has only grown since (same inode, not shorter than the indexed
+    end), ``refresh`` scans just the appended bytes. Any other change
+    rebuilds the index. An unterminated last line is indexed but rescanned
+    on the next refresh, in case it was still being written. Refreshes are
+    serialized by a lock, so one index can be shared across threads.
+    """
+
+    def __init__(self, path, index_path=None):
+        self.path = path
+        self.index_path = index_path or path + ".idx.npz"
+        self.offsets = np.zeros(0, dtype=np.uint64)
+        self.end = 0
+        self.inode = None
+        self._lock = threading.Lock()
+        self._load()
+        self.refresh()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _load(self):
+        try:
+            with np.load(self.index_path) as saved:
+                self.offsets = saved["offsets"]
+                self.inode, self.end = (int(v) for v in saved["signature"])
+        except (OSError, KeyError, ValueError):
+            pass
+
+    def _save(self):
+        tmp = f"{self.index_path}.tmp-{os.getpid()}-{threading.get_ident()}.npz"
+        np.savez(tmp, offsets=self.offsets, signature=np.array([self.inode, self.end], dtype=np.int64))
+        os.replace(tmp, self.index_path)
+
+    def refresh(self):
+        """Index lines appended since the last refresh; returns the number of tasks added"""
+        with self._lock:
+            st = os.stat(self.path)
+            offsets, end, inode = self.offsets, self.end, self.inode
+            if st.st_ino != inode or st.st_size < end:
+                offsets, end, inode = np.zeros(0, dtype=np.uint64), 0, st.st_ino
+            elif st.st_size == end:
+                return 0
+            before = int(np.searchsorted(offsets, end))
+            grown = array("Q", offsets[:before].tobytes())
+            position = end
+            with open(self.path, "rb") as f:
+                f.seek(position)
+                for line in f:
+                    if split_task_line(line.decode("utf-8", "replace")):
+                        grown.append(position)
+                    position += len(line)
+                    if line.endswith(b"\n"):
+                        end = position
+            # Published together, so readers never see a half-updated index
+            self.offsets, self.end, self.inode = np.frombuffer(grown, dtype=np.uint64), end, inode
+            self._save()
+            return len(self.offsets) - before
+
+    def task(self, k):
+        """(timestamp, task) of the ``k``-th task line, read with a single seek"""
+        with open(self.path, "rb") as f:
+            f.seek(int(self.offsets[k]))
+            return split_task_line(f.readline().decode("utf-8", "replace"))
+
+
+class TaskSource:
+    """Tasks from one or more task files, parsed lazily in file order.
+
+    ``paths`` may be a path, a glob pattern or a list of either; pass
+    ``rotated_paths(path)`` to read a rotated series oldest first (``.gz``
+    members are decompressed on the fly). Iterating yields
+    ``(timestamp, task)`` one line at a time, so memory does not grow with
+    the files. With ``index=True`` each uncompressed file also gets a
+    ``TaskOffsetIndex``, which makes ``len`` and ``source[k]`` cheap.
+    """
+
+    def __init__(self, paths, index=False):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.paths = []
+        for pattern in paths:
+            self.paths.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+        self.indexes = None
+        self._lock = threading.Lock()
+        if index:
+            if any(path.endswith(".gz") for path in self.paths):
+                raise ValueError("random access needs uncompressed task files")
+            self.indexes = [TaskOffsetIndex(path) for path in self.paths]
+
+    def __iter__(self):
+        for path in self.paths:
+            with _open(path) as f:
+                for line in f:
+                    entry = split_task_line(line.decode("utf-8", "replace"))
+                    if entry:
+                        yield entry
+
+    def tasks(self, start=0):
+        """Task texts only, from task number ``start`` on (indexed sources seek straight to it)"""
+        if self.indexes is None:
+            for _, task in islice(self, start, None):
+                yield task
+            return
+        for path, index in zip(self.paths, self.indexes):
+            if start >= len(index):
+                start -= len(index)
+                continue
+            remaining = len(index) - start
+            with open(path, "rb") as f:
+                f.seek(int(index.offsets[start]))
+                for line in f:
+                    entry = split_task_line(line.decode("utf-8", "replace"))
+                    if entry:
+                        yield entry[1]
+                        remaining -= 1
+                        if not remaining:
+                            break
+            start = 0
+
+    def refresh(self):
+        """Pick up tasks appended to indexed files (safe to call from several threads)"""
+        with self._lock:
+            return sum(index.refresh() for index in self.indexes or ())
+
+    def __len__(self):
+        if self.indexes is None:
+            return sum(1 for _ in self)
+        return sum(len(index) for index in self.indexes)
+
+    def __getitem__(self, k):
+        """(timestamp, task) of task number ``k`` (0-based) across all files"""
+        if self.indexes is None:
+            raise TypeError("TaskSource needs index=True for random access")
+        if k < 0:
+            k += len(self)
+        for index in self.indexes:
+            if 0 <= k < len(index):
+                return index.task(k)
+            k -= len(index)
+        raise IndexError("task number out of range")
+
+def load_tasks(paths=TASK_FILE):
+    """All task texts as a list, for callers that iterate the same small task set many times"""
+    return list(TaskSource(paths).tasks())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index a task file and time sequential vs random access")
+    parser.add_argument("paths", nargs="*", default=[TASK_FILE])
+    parser.add_argument("--rotated", action="store_true", help="include rotated siblings of each path")
+    args = parser.parse_args(argv)
+
+    paths = [p for path in args.paths for p in (rotated_paths(path) if args.rotated else [path])]
+    start = time.perf_counter()
+    count = sum(1 for _ in TaskSource(paths))
+    scan = time.perf_counter() - start
+    print(f"📋 {count:,} tasks in {len(paths)} file(s), streamed in {scan:.2f}s")
+
+    if any(path.endswith(".gz") for path in paths):
+        return 0
+    start = time.perf_counter()
+    source = TaskSource(paths, index=True)
+    print(f"🗂️  Offset index ready in {time.perf_counter() - start:.2f}s")
+    if len(source):
+        rng = np.random.default_rng(0)
+        picks = rng.integers(0, len(source), 1000)
+        start = time.perf_counter()
+        for k in picks:
+            source[int(k)]
+        print(f"🎯 Random access: {(time.perf_counter() - start) / len(picks) * 1e6:.0f} µs per task "
+              f"(last task: {source[-1][1]!r})")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
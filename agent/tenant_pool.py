@@ -0,0 +1,267 @@
+import argparse
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from urllib.parse import quote
+
+import numpy as np
+
+from agent.q_learning import DEFAULT_ACTIONS
+from agent.q_table import QTable
+from agent.snapshot import is_snapshot, load_snapshot, save_snapshot
+
+TENANT_DIR = os.path.join("data", "tenants")
+
+
+class TenantPool:
+    """Per-user Q-tables stored as one ``(slot, state, action)`` array.
+
+    States and actions are interned once for all users, so a user's
+    Q-value for (state, action) is ``values[slot, state_id, action_id]``
+    and a batch mixing many users is one fancy-indexing operation. At most
+    ``max_resident`` users hold a slot; touching another user evicts the
+    least recently used one to ``directory`` (one snapshot per user with
+    only the rows it has learned, readable by ``QLearningAgent``) and
+    loads the newcomer from there, so memory is bounded by
+    ``max_resident x states x actions`` whatever the user count.
+
+    Not thread-safe: drive it from one thread, e.g. the server's event loop.
+    """
+
+    def __init__(self, actions=DEFAULT_ACTIONS, max_resident=256, directory=TENANT_DIR, alpha=0.2, gamma=0.9,
+                 epsilon=0.2, state_capacity=64, seed=None):
+        self.actions = list(actions)
+        self.action_index = {action: i for i, action in enumerate(self.actions)}
+        self.states = []
+        self.state_index = {}
+        self.max_resident = max_resident
+        self.directory = directory
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self.values = np.zeros((min(max_resident, 16), max(int(state_capacity), 1), len(self.actions)))
+        self.resident = OrderedDict()  # user -> slot, least recently used first
+        self.free = list(range(self.values.shape[0] - 1, -1, -1))
+        self.dirty = set()  # slots updated since they were loaded or saved
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self.resident)
+
+    def __contains__(self, user):
+        return user in self.resident
+
+    def tenant_path(self, user):
+        return os.path.join(self.directory, quote(str(user), safe="") + ".qsnap")
+
+    def state_id(self, state):
+        """Intern a state for every user, growing the state axis geometrically when full"""
+        sid = self.state_index.get(state)
+        if sid is None:
+            sid = len(self.states)
+            if sid >= self.values.shape[1]:
+                self.values = self._resized(self.values.shape[0], 2 * self.values.shape[1])
+            self.state_index[state] = sid
+            self.states.append(state)
+        return sid
+
+    def state_ids(self, states):
+        return np.fromiter((self.state_id(s) for s in states), dtype=np.int64, count=len(states))
+
+    def action_ids(self, actions):
+        return np.fromiter((self.action_index[a] for a in actions), dtype=np.int64, count=len(actions))
+
+    def _resized(self, slots, states):
+        grown = np.zeros((slots, states, len(self.actions)), dtype=self.values.dtype)
+        grown[:self.values.shape[0], :self.values.shape[1]] = self.values
+        return grown
+
+    def slot(self, user):
+        """Slot of ``user``, loading it (and evicting the coldest user) if it is not resident"""
+        slot = self.resident.get(user)
+        if slot is not None:
+            self.resident.move_to_end(user)
+            self.stats["hits"] += 1
+            return slot
+        if not self.free:
+            if self.values.shape[0] < self.max_resident:
+                slots = self.values.shape[0]
+                self.values = self._resized(min(2 * slots, self.max_resident), self.values.shape[1])
+                self.free.extend(range(self.values.shape[0] - 1, slots - 1, -1))
+            else:
+                self.evict(next(iter(self.resident)))
+        slot = self.free.pop()
+        self._load(user, slot)
+        self.resident[user] = slot
+        self.stats["loads"] += 1
+        return slot
+
+    def slots(self, users):
+        """Slots for a batch of users; every distinct user in the batch must fit at once"""
+        distinct = dict.fromkeys(users)
+        if len(distinct) > self.max_resident:
+            raise ValueError(f"batch touches {len(distinct)} users but only {self.max_resident} can be resident")
+        for user in distinct:
+            distinct[user] = self.slot(user)
+        return np.fromiter((distinct[u] for u in users), dtype=np.int64, count=len(users))
+
+    def _load(self, user, slot):
+        path = self.tenant_path(user)
+        if is_snapshot(path):
+            table = load_snapshot(path)
+        elif os.path.exists(os.path.splitext(path)[0] + ".pkl"):  # legacy per-user pickle
+            with open(os.path.splitext(path)[0] + ".pkl", "rb") as f:
+                table = QTable.from_dict(pickle.load(f))
+        else:
+            return
+        known = [i for i, action in enumerate(table.actions) if action in self.action_index]
+        sids = self.state_ids(table.states)
+        aids = self.action_ids([table.actions[i] for i in known])
+        self.values[slot][np.ix_(sids, aids)] = table.active[:, known]
+
+    def _save(self, user, slot):
+        rows = np.flatnonzero(self.values[slot, :len(self.states)].any(axis=1))
+        table = QTable(self.actions, capacity=1)
+        table.states = [self.states[i] for i in rows]
+        table.values = self.values[slot, rows]
+        save_snapshot(table, self.tenant_path(user))
+        self.dirty.discard(slot)
+
+    def evict(self, user):
+        """Write ``user`` back to disk if it changed and free its slot"""
+        slot = self.resident.pop(user)
+        if slot in self.dirty:
+            self._save(user, slot)
+        self.values[slot] = 0.0
+        self.free.append(slot)
+        self.stats["evictions"] += 1
+
+    def flush(self):
+        """Save every resident user updated since it was loaded or last saved"""
+        for user, slot in self.resident.items():
+            if slot in self.dirty:
+                self._save(user, slot)
+
+    def close(self):
+        self.flush()
+
+    def q_values(self, user, state):
+        """{action: q_value} of one user's state (a copy)"""
+        row = self.values[self.slot(user), self.state_id(state)]
+        return dict(zip(self.actions, row.tolist()))
+
+    def _chunks(self, users):
+        """(start, stop) ranges of ``users`` that each touch at most ``max_resident`` distinct users"""
+        start, seen = 0, set()
+        for i, user in enumerate(users):
+            if user not in seen and len(seen) == self.max_resident:
+                yield start, i
+                start, seen = i, set()
+            seen.add(user)
+        yield start, len(users)
+
+    def select_actions(self, users, states):
+        """Epsilon-greedy actions for a batch of (user, state) pairs, drawn like ``QLearningAgent.select_actions``"""
+        chosen = []
+        for lo, hi in self._chunks(users):
+            slots = self.slots(users[lo:hi])
+            sids = self.state_ids(states[lo:hi])
+            draws = self.rng.random((2, len(sids)))
+            greedy = np.argmax(self.values[slots, sids], axis=1)
+            explore = draws[0] < self.epsilon
+            greedy[explore] = (draws[1][explore] * len(self.actions)).astype(np.int64)
+            chosen.extend(self.actions[aid] for aid in greedy.tolist())
+        return chosen
+
+    def update_batch(self, users, states, actions, rewards, next_states):
+        """Q-learning updates for a batch of transitions across users in one vectorized step.
+
+        Same semantics as ``QLearningAgent.update_batch``: targets bootstrap
+        from the values before the batch and duplicate (user, state, action)
+        cells move once by the mean TD error. A batch touching more than
+        ``max_resident`` users is applied in consecutive chunks that fit.
+        Returns the TD errors.
+        """
+        rewards = np.asarray(rewards, dtype=np.float64)
+        td = [self._update_chunk(users[lo:hi], states[lo:hi], actions[lo:hi], rewards[lo:hi], next_states[lo:hi])
+              for lo, hi in self._chunks(users)]
+        return np.concatenate(td)
+
+    def _update_chunk(self, users, states, actions, rewards, next_states):
+        slots = self.slots(users)
+        sids = self.state_ids(states)
+        next_sids = self.state_ids(next_states)
+        aids = self.action_ids(actions)
+        values = self.values
+        td = rewards + self.gamma * values[slots, next_sids].max(axis=1) - values[slots, sids, aids]
+        cells, inverse, counts = np.unique(np.ravel_multi_index((slots, sids, aids), values.shape),
+                                           return_inverse=True, return_counts=True)
+        mean_td = np.bincount(inverse, weights=td, minlength=len(cells)) / counts
+        values.reshape(-1)[cells] += self.alpha * mean_td
+        self.dirty.update(np.unique(slots).tolist())
+        return td
+
+    def select_action(self, user, state):
+        slot = self.slot(user)
+        sid = self.state_id(state)
+        if random.random() < self.epsilon:
+            return random.choice(self.actions)
+        return self.actions[int(np.argmax(self.values[slot, sid]))]
+
+    def update_q_table(self, user, state, action, reward, next_state):
+        slot = self.slot(user)
+        sid = self.state_id(state)
+        next_sid = self.state_id(next_state)
+        aid = self.action_index[action]
+        old = self.values[slot, sid, aid]
+        self.values[slot, sid, aid] = old + self.alpha * (reward + self.gamma * self.values[slot, next_sid].max() - old)
+        self.dirty.add(slot)
+
+def simulate(pool, users=10_000, intents=200, batches=200, batch_size=512, skew=1.2, seed=0):
+    """Zipf-skewed select+update batches over ``users``; returns throughput and cache statistics"""
+    rng = np.random.default_rng(seed)
+    names = [f"intent{i}" for i in range(intents)]
+    started = time.perf_counter()
+    for _ in range(batches):
+        batch_users = ((rng.zipf(skew, batch_size) - 1) % users).tolist()
+        states = [names[i] for i in rng.integers(0, intents, batch_size)]
+        actions = pool.select_actions(batch_users, states)
+        pool.update_batch(batch_users, states, actions, rng.choice([2, -1, -2], batch_size), states)
+    elapsed = time.perf_counter() - started
+    lookups = pool.stats["hits"] + pool.stats["loads"]
+    return {"transitions": batches * batch_size, "seconds": elapsed,
+            "per_sec": batches * batch_size / elapsed, "hit_rate": pool.stats["hits"] / lookups if lookups else 0.0,
+            "loads": pool.stats["loads"], "evictions": pool.stats["evictions"], "resident_mb": pool.values.nbytes / 1e6}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many users sharing one TenantPool")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--max-resident", type=int, default=256)
+    parser.add_argument("--intents", type=int, default=200)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--skew", type=float, default=1.2, help="Zipf exponent of user activity")
+    parser.add_argument("--directory", help="where evicted users are written (default: a temporary directory)")
+    args = parser.parse_args(argv)
+
+    directory = args.directory or tempfile.mkdtemp(prefix="rl-tenants-")
+    try:
+        pool = TenantPool(DEFAULT_ACTIONS, max_resident=args.max_resident, directory=directory, seed=0)
+        r = simulate(pool, args.users, args.intents, args.batches, args.batch_size, args.skew)
+        pool.close()
+        print(f"👥 {r['transitions']:,} transitions over {args.users:,} users in {r['seconds']:.2f}s "
+              f"({r['per_sec']:,.0f}/s)")
+        print(f"🗂️  {args.max_resident} resident slots ({r['resident_mb']:.1f} MB), hit rate {r['hit_rate']:.1%}, "
+              f"{r['loads']:,} loads, {r['evictions']:,} evictions")
+    finally:
+        if not args.directory:
+            shutil.rmtree(directory, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
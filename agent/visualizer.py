@@ -1,98 +1,272 @@
+import argparse
 import os
-import matplotlib.pyplot as plt
+import threading
+import time
 import numpy as np
 from datetime import datetime
 
-def plot_rewards(rewards, output_path="data/learning_curve.png"):
-    """Enhanced reward plotting with better visualization"""
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+PREVIEW_DPI = 72
+FULL_DPI = 300
+MAX_PLOT_POINTS = 2000
+MAX_BARS = 200
+MAX_TICKS = 30
+
+def decimate_minmax(values, max_points=MAX_PLOT_POINTS):
+    """(x, y) of at most ``max_points`` samples keeping each bucket's min and max, in order.
+
+    Unlike plain striding this keeps every spike visible: the series is cut
+    into at most ``max_points // 2`` equal buckets and each contributes its
+    minimum and maximum.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.size
+    if n <= max_points:
+        return np.arange(1, n + 1), values
+    width = -(-n // max(1, max_points // 2))
+    buckets = -(-n // width)
+    blocks = np.full(buckets * width, np.nan)
+    blocks[:n] = values
+    blocks = blocks.reshape(buckets, width)
+    lo, hi = np.nanargmin(blocks, axis=1), np.nanargmax(blocks, axis=1)
+    # both extremes of every bucket, left to right
+    x = (np.arange(buckets) * width)[:, None] + np.sort(np.column_stack([lo, hi]), axis=1)
+    x = x.ravel()
+    return x + 1, values[x]
+
+def new_figure(**kwargs):
+    """Standalone ``Figure`` on the non-interactive Agg canvas.
+
+    matplotlib is imported here rather than at module load, so entry points
+    that never draw a chart do not pay for it, and no GUI backend or pyplot
+    state is ever touched.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+def plot_rewards(rewards, output_path="data/learning_curve.png", preview=False, dpi=None, max_points=MAX_PLOT_POINTS,
+                 verbose=True):
+    """Enhanced reward plotting with better visualization.
+
+    Long histories are min-max decimated to ``max_points`` before drawing
+    and the per-episode bars become a histogram, so cost no longer grows
+    with the number of episodes. ``preview`` renders at ``PREVIEW_DPI``.
+    Uses a standalone ``Figure`` (no pyplot state), so it is safe to call
+    from a background thread. Returns the render time in seconds.
+    """
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    rewards = np.asarray(rewards, dtype=np.float64)
+    n = rewards.size
+    dpi = dpi or (PREVIEW_DPI if preview else FULL_DPI)
     
     # Create figure with subplots
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+    fig = new_figure(figsize=(12, 10))
+    ax1, ax2 = fig.subplots(2, 1)
     
-    # Main learning curve
-    episodes = range(1, len(rewards) + 1)
-    ax1.plot(episodes, rewards, marker="o", linewidth=2, markersize=8, color='#2E86AB')
-    ax1.fill_between(episodes, rewards, alpha=0.3, color='#2E86AB')
+    # Main learning curve (decimated once it outgrows the point budget)
+    episodes, curve = decimate_minmax(rewards, max_points)
+    if n <= MAX_TICKS:
+        ax1.plot(episodes, curve, marker="o", linewidth=2, markersize=8, color='#2E86AB')
+        ax1.set_xticks(episodes)
+    else:
+        ax1.plot(episodes, curve, linewidth=1, color='#2E86AB')
+    if n <= max_points:
+        ax1.fill_between(episodes, curve, alpha=0.3, color='#2E86AB')
     ax1.set_title("🤖 RL Agent Learning Curve", fontsize=16, fontweight='bold')
     ax1.set_xlabel("Episode Number", fontsize=12)
     ax1.set_ylabel("Total Reward", fontsize=12)
     ax1.grid(True, alpha=0.3)
-    ax1.set_xticks(episodes)
     
-    # Add trend line if more than 2 episodes
-    if len(rewards) > 2:
-        z = np.polyfit(episodes, rewards, 1)
-        p = np.poly1d(z)
-        ax1.plot(episodes, p(episodes), "--", alpha=0.8, color='red', label=f'Trend (slope: {z[0]:.1f})')
+    # Add trend line if more than 2 episodes (fitted on the full series)
+    if n > 2:
+        all_episodes = np.arange(1, n + 1)
+        z = np.polyfit(all_episodes, rewards, 1)
+        ax1.plot(all_episodes[[0, -1]], np.poly1d(z)(all_episodes[[0, -1]]), "--", alpha=0.8, color='red',
+                 label=f'Trend (slope: {z[0]:.1f})')
         ax1.legend()
     
-    # Reward distribution/statistics
-    ax2.bar(episodes, rewards, color=['green' if r > 0 else 'red' if r < 0 else 'gray' for r in rewards], alpha=0.7)
-    ax2.axhline(y=0, color='black', linestyle='-', alpha=0.5)
-    ax2.set_title("📊 Episode Reward Distribution", fontsize=14, fontweight='bold')
-    ax2.set_xlabel("Episode Number", fontsize=12)
-    ax2.set_ylabel("Reward", fontsize=12)
+    # Reward distribution/statistics: one bar per episode while that is readable, else a histogram
+    if n <= MAX_BARS:
+        colors = np.where(rewards > 0, 'green', np.where(rewards < 0, 'red', 'gray'))
+        ax2.bar(np.arange(1, n + 1), rewards, color=colors, alpha=0.7)
+        ax2.axhline(y=0, color='black', linestyle='-', alpha=0.5)
+        ax2.set_title("📊 Episode Reward Distribution", fontsize=14, fontweight='bold')
+        ax2.set_xlabel("Episode Number", fontsize=12)
+        ax2.set_ylabel("Reward", fontsize=12)
+        if n <= MAX_TICKS:
+            ax2.set_xticks(np.arange(1, n + 1))
+    else:
+        ax2.hist(rewards, bins=50, color='#2E86AB', alpha=0.7)
+        ax2.set_title("📊 Episode Reward Distribution", fontsize=14, fontweight='bold')
+        ax2.set_xlabel("Total Reward", fontsize=12)
+        ax2.set_ylabel("Episodes", fontsize=12)
     ax2.grid(True, alpha=0.3)
-    ax2.set_xticks(episodes)
     
     # Add statistics text
-    if rewards:
-        avg_reward = np.mean(rewards)
-        max_reward = max(rewards)
-        min_reward = min(rewards)
-        
-        stats_text = f"📈 Stats:\nAvg: {avg_reward:.1f}\nMax: {max_reward}\nMin: {min_reward}"
+    if n:
+        stats_text = f"📈 Stats:\nAvg: {rewards.mean():.1f}\nMax: {rewards.max():g}\nMin: {rewards.min():g}"
         ax2.text(0.02, 0.98, stats_text, transform=ax2.transAxes, 
                 verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
     
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    print(f"💾 Saved enhanced reward chart to: {output_path}")
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    elapsed = time.perf_counter() - started
+    if verbose:
+        print(f"💾 Saved enhanced reward chart to: {output_path} ({n:,} episodes, {elapsed:.2f}s at {dpi} dpi)")
+    return elapsed
+
+
+class BackgroundRenderer:
+    """Runs chart functions on one worker thread so training never waits on matplotlib.
+
+    Requests are keyed by output path; a queued request that has been
+    superseded by a newer one for the same file is skipped.
+    """
+
+    def __init__(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-render")
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, output_path, *args, **kwargs):
+        """Queue ``func(*args, output_path=output_path, **kwargs)``; returns a Future"""
+        token = object()
+        with self._lock:
+            self._latest[output_path] = token
+
+        def run():
+            with self._lock:
+                if self._latest.get(output_path) is not token:
+                    return None
+            try:
+                return func(*args, output_path=output_path, **kwargs)
+            except Exception as e:
+                print(f"⚠️ Error rendering {output_path}: {e}")
 
-def create_performance_dashboard(task_log_path, output_path="data/dashboard.png"):
-    """Create a comprehensive performance dashboard"""
+        return self._pool.submit(run)
+
+    def close(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+def benchmark_plot_rewards(lengths=(100, 1_000, 10_000, 100_000), preview=True, output_dir="data"):
+    """Render time of ``plot_rewards`` for random-walk histories of each length"""
+    rng = np.random.default_rng(0)
+    timings = []
+    for n in lengths:
+        rewards = np.cumsum(rng.normal(0.05, 2, n))
+        timings.append((n, plot_rewards(rewards, os.path.join(output_dir, "bench_learning_curve.png"), preview=preview)))
+    os.remove(os.path.join(output_dir, "bench_learning_curve.png"))
+    return timings
+
+def create_performance_dashboard(task_log_path, output_path="data/dashboard.png", columnar_dir=None, workers=1,
+                                 max_intents=30):
+    """Create a comprehensive performance dashboard.
+
+    Panel data comes from a single streaming pass (``agent.log_stats``), so
+    memory stays bounded for multi-GB logs; ``workers > 1`` aggregates byte
+    ranges of the CSV in parallel processes. Once the log has been rotated
+    (``agent.log_archive``), its compacted summary and archived segments are
+    merged in, so only the live segment is scanned in full. A columnar log
+    at ``columnar_dir`` replaces the CSV scan while its watermark shows it
+    in step with the CSV.
+    """
     try:
-        import pandas as pd
+        from agent.columnar_log import open_reader
+        from agent.log_archive import aggregate_archived, aggregate_columnar_archived, has_archive
+        from agent.log_stats import aggregate_log
         
-        # Read task log data
-        df = pd.read_csv(task_log_path)
+        # Aggregate from the columnar log when it is in step with the CSV, else stream the CSV
+        reader = open_reader(columnar_dir) if columnar_dir else None
+        stats = aggregate_columnar_archived(task_log_path, reader) if reader is not None else None
+        if stats is None and has_archive(task_log_path):
+            stats = aggregate_archived(task_log_path, workers=workers)
+        elif stats is None:
+            stats = aggregate_log(task_log_path, workers=workers)
         
         # Create dashboard with multiple subplots
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
+        fig = new_figure(figsize=(15, 12))
+        (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
         
-        # 1. Reward over time
-        ax1.plot(range(len(df)), df['Reward Assigned'], marker='o')
+        # 1. Reward over time (bucket means once the log outgrows the point budget)
+        positions, rewards = stats.rewards.points()
+        ax1.plot(positions, rewards, marker='o' if stats.rewards.width == 1 else None)
         ax1.set_title('🎯 Reward Progression')
         ax1.set_xlabel('Task Number')
-        ax1.set_ylabel('Reward')
+        ax1.set_ylabel('Reward' if stats.rewards.width == 1 else f'Mean Reward (per {stats.rewards.width} tasks)')
         ax1.grid(True, alpha=0.3)
         
         # 2. Action frequency
-        action_counts = df['Action Taken'].value_counts()
-        ax2.pie(action_counts.values, labels=action_counts.index, autopct='%1.1f%%')
+        action_counts = stats.action_counts.most_common()
+        ax2.pie([count for _, count in action_counts], labels=[action for action, _ in action_counts], autopct='%1.1f%%')
         ax2.set_title('🔄 Action Distribution')
         
         # 3. Feedback distribution
-        feedback_counts = df['User Feedback'].value_counts()
-        colors = ['green' if '👍' in fb else 'red' if '👎' in fb else 'gray' for fb in feedback_counts.index]
-        ax3.bar(feedback_counts.index, feedback_counts.values, color=colors, alpha=0.7)
+        feedback_counts = stats.feedback_counts.most_common()
+        labels = [fb for fb, _ in feedback_counts]
+        colors = ['green' if '👍' in fb else 'red' if '👎' in fb else 'gray' for fb in labels]
+        ax3.bar(labels, [count for _, count in feedback_counts], color=colors, alpha=0.7)
         ax3.set_title('📝 Feedback Distribution')
         ax3.set_ylabel('Count')
         
-        # 4. Learning curve by intent
-        intent_rewards = df.groupby('Parsed Intent')['Reward Assigned'].mean()
-        ax4.barh(intent_rewards.index, intent_rewards.values)
+        # 4. Learning curve by intent (most frequent intents when there are many)
+        means = stats.intent_mean_rewards()
+        intent_rewards = sorted((intent, means[intent]) for intent, _ in stats.intent_count.most_common(max_intents))
+        ax4.barh([intent for intent, _ in intent_rewards], [mean for _, mean in intent_rewards])
         ax4.set_title('🧠 Average Reward by Intent')
         ax4.set_xlabel('Average Reward')
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(output_path, dpi=300, bbox_inches='tight')
         print(f"📊 Saved performance dashboard to: {output_path}")
         
-    except ImportError:
-        print("⚠️ pandas not available for dashboard creation")
     except Exception as e:
         print(f"⚠️ Error creating dashboard: {e}")
+
+def plot_sweep(summaries, output_path="data/sweep.png", top=6):
+    """Mean learning curves with confidence bands for the best ``top`` sweep configurations"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    
+    fig = new_figure(figsize=(12, 10))
+    ax1, ax2 = fig.subplots(2, 1, sharex=True)
+    for summary in summaries[:top]:
+        label = f"α={summary['alpha']:g} γ={summary['gamma']:g} ε={summary['epsilon']:g}"
+        episodes = np.arange(1, len(summary["reward_mean"]) + 1)
+        for ax, key in ((ax1, "reward"), (ax2, "accuracy")):
+            mean, band = summary[f"{key}_mean"], summary[f"{key}_ci"]
+            line, = ax.plot(episodes, mean, linewidth=2, label=label)
+            ax.fill_between(episodes, mean - band, mean + band, alpha=0.2, color=line.get_color())
+    
+    n_seeds = summaries[0]["seeds"] if summaries else 0
+    ax1.set_title(f"🧪 Hyperparameter Sweep: mean reward ± 95% CI ({n_seeds} seeds)", fontsize=14, fontweight='bold')
+    ax1.set_ylabel("Total Reward", fontsize=12)
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(fontsize=9)
+    ax2.set_title("🎯 Greedy Policy Accuracy", fontsize=14, fontweight='bold')
+    ax2.set_xlabel("Episode Number", fontsize=12)
+    ax2.set_ylabel("Accuracy", fontsize=12)
+    ax2.grid(True, alpha=0.3)
+    
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=150, bbox_inches='tight')
+    print(f"🧪 Saved sweep chart to: {output_path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time plot_rewards against training-history length")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--full", action="store_true", help=f"render at {FULL_DPI} dpi instead of the preview DPI")
+    args = parser.parse_args(argv)
+
+    timings = benchmark_plot_rewards(args.lengths, preview=not args.full)
+    print(f"{'episodes':>10} {'render':>9}")
+    for n, seconds in timings:
+        print(f"{n:>10,} {seconds:>8.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
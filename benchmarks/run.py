@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.suite import BENCHMARKS, HIGHER_IS_BETTER
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+HISTORY_PATH = os.path.join(RESULTS_DIR, "history.jsonl")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+
+
+def environment():
+    """Where a run happened, so results from different machines are not compared blindly"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def run_suite(names=None, quick=False, verbose=True):
+    """Run the selected benchmarks; returns one history record"""
+    record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "quick": quick, "env": environment(), "results": {}}
+    for name, func in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        start = time.perf_counter()
+        for metric, (value, unit) in func(quick).items():
+            record["results"][f"{name}.{metric}"] = {"value": value, "unit": unit}
+        if verbose:
+            print(f"✅ {name} ({time.perf_counter() - start:.1f}s)")
+    return record
+
+def append_history(record, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def median_record(records):
+    """One record holding the per-metric median of ``records`` (a steadier baseline than any single run)"""
+    merged = dict(records[-1], results={})
+    for metric, result in records[-1]["results"].items():
+        values = [r["results"][metric]["value"] for r in records if metric in r["results"]]
+        merged["results"][metric] = {"value": float(np.median(values)), "unit": result["unit"]}
+    merged["runs"] = len(records)
+    return merged
+
+def compare(current, baseline, threshold=0.10):
+    """(metric, baseline, current, change, regressed) for every metric both runs share.
+
+    ``change`` is signed so that positive always means faster; a metric
+    regresses when it is more than ``threshold`` slower than the baseline.
+    """
+    rows = []
+    for metric, now in current["results"].items():
+        before = baseline["results"].get(metric)
+        if before is None or not before["value"]:
+            continue
+        ratio = now["value"] / before["value"]
+        change = ratio - 1 if now["unit"] in HIGHER_IS_BETTER else 1 / ratio - 1
+        rows.append((metric, before, now, change, change < -threshold))
+    return rows
+
+def format_value(result):
+    value, unit = result["value"], result["unit"]
+    if unit == "s":
+        return f"{value * 1e3:,.2f} ms" if value < 1 else f"{value:,.2f} s"
+    return f"{value:,.0f} {unit}"
+
+def print_record(record):
+    for metric, result in record["results"].items():
+        print(f"   {metric:<52} {format_value(result):>18}")
+
+def print_comparison(rows, threshold):
+    for metric, before, now, change, regressed in rows:
+        flag = "❌ REGRESSION" if regressed else ("🚀" if change > threshold else "")
+        print(f"   {metric:<52} {format_value(before):>16} -> {format_value(now):>16} {change:>+7.1%} {flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the RL agent benchmark suite and track regressions")
+    parser.add_argument("command", choices=["run", "compare", "baseline", "history"])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes (skips the 1e5/1e6-state runs)")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    parser.add_argument("--runs", type=int, default=3, help="'baseline' takes the median of this many latest runs")
+    args = parser.parse_args(argv)
+
+    if args.command == "history":
+        for record in load_history(args.history):
+            print(f"{record['time']}  {record['env']['commit'] or '-':>9}  {len(record['results'])} metrics"
+                  f"{'  (quick)' if record['quick'] else ''}")
+        return 0
+
+    if args.command == "baseline":
+        history = load_history(args.history)
+        if not history:
+            print(f"⚠️  No runs in {args.history}; use 'run' first")
+            return 1
+        runs = [r for r in history if r["quick"] == history[-1]["quick"]][-args.runs:]
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(median_record(runs), f, indent=2)
+        print(f"📌 Baseline set to the median of {len(runs)} run(s) up to {history[-1]['time']} ({args.baseline})")
+        return 0
+
+    record = run_suite(args.only, args.quick)
+    append_history(record, args.history)
+    print(f"💾 Appended results to {args.history}")
+    if args.command == "run":
+        print_record(record)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; use 'baseline' to store one")
+        print_record(record)
+        return 1
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("quick") != record["quick"]:
+        print("⚠️  Baseline and current run use different sizes (--quick); only shared metrics are compared")
+    rows = compare(record, baseline, args.threshold)
+    print_comparison(rows, args.threshold)
+    regressions = sum(regressed for *_, regressed in rows)
+    print(f"{'❌' if regressions else '✅'} {regressions} regression(s) beyond {args.threshold:.0%} "
+          f"against baseline from {baseline['time']}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
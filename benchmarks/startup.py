@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+import numpy as np
+
+# entry point label -> statement a fresh interpreter runs to import it
+ENTRY_POINTS = {
+    "agent.main": "import agent.main",
+    "demo.py": "import demo",
+}
+# plotting/analytics stacks that must only load once a chart or table is produced
+HEAVY_MODULES = ("matplotlib", "pandas", "pyarrow", "streamlit")
+DEFAULT_BUDGET_MS = 250
+
+_CHILD = """
+import sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+import json
+print(json.dumps({{"seconds": seconds, "heavy": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_start(statement, runs=5):
+    """Median import time of ``statement`` in fresh interpreters, plus the heavy modules it pulled in"""
+    timings, heavy = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _CHILD.format(statement=statement, heavy=HEAVY_MODULES)],
+                             cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        heavy.update(result["heavy"])
+    return float(np.median(timings)), sorted(heavy)
+
+def slowest_imports(statement, top=5):
+    """(module, cumulative seconds) of the costliest imports made directly by the entry point, from ``-X importtime``"""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, capture_output=True,
+                         text=True, check=True).stderr
+    entry = statement.split()[-1]
+    imports, children = [], []
+    # children are printed before their parent, one indent level deeper
+    for match in _IMPORTTIME.finditer(err):
+        _, cumulative, indent, module = match.groups()
+        if not indent:
+            if module.split(".")[0] == entry.split(".")[0]:
+                imports.extend(children)
+            children = []
+        elif len(indent) == 2:
+            children.append((module, int(cumulative) / 1e6))
+    imports.sort(key=lambda item: -item[1])
+    return imports[:top]
+
+def check(entry_points=ENTRY_POINTS, budget_ms=DEFAULT_BUDGET_MS, runs=5, verbose=False):
+    """Cold-start report per entry point; True when all are within budget and import no heavy module"""
+    ok = True
+    for label, statement in entry_points.items():
+        seconds, heavy = cold_start(statement, runs)
+        passed = seconds * 1000 <= budget_ms and not heavy
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} {label:<12} {seconds * 1000:>7.1f} ms cold import (budget {budget_ms} ms)"
+              + (f"  loads {', '.join(heavy)}" if heavy else ""))
+        if verbose or not passed:
+            for module, cumulative in slowest_imports(statement):
+                print(f"      {module:<28} {cumulative * 1000:>7.1f} ms")
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check cold-start import time of the CLI and demo entry points")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per entry point (median is reported)")
+    parser.add_argument("--verbose", action="store_true", help="list the slowest top-level imports")
+    args = parser.parse_args(argv)
+    return 0 if check(budget_ms=args.budget_ms, runs=args.runs, verbose=args.verbose) else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+
+STATE_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+QUICK_STATE_SIZES = (100, 1_000, 10_000)
+
+# name -> function(quick) returning {metric: (value, unit)}; filled by @benchmark
+BENCHMARKS = {}
+# units where a larger value is better; every other unit is a duration
+HIGHER_IS_BETTER = {"ops/s", "rows/s"}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def best_of(func, repeat=5):
+    """Fastest of ``repeat`` timed calls, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def populated_agent(n_states, seed=0):
+    """In-memory agent with ``n_states`` interned states and random Q-values"""
+    agent = QLearningAgent(DEFAULT_ACTIONS, q_path="", seed=seed)
+    states = [f"intent{i}" for i in range(n_states)]
+    agent.q.state_ids(states)
+    agent.q.values[:n_states] = np.random.default_rng(seed).normal(size=(n_states, len(DEFAULT_ACTIONS)))
+    return agent, states
+
+@benchmark("agent_ops")
+def agent_ops(quick=False):
+    """select/update/top-k/confidence calls (and bulk equivalents) per second at each table size"""
+    results = {}
+    calls = 5_000 if quick else 20_000
+    for n in QUICK_STATE_SIZES if quick else STATE_SIZES:
+        agent, states = populated_agent(n)
+        rng = np.random.default_rng(1)
+        picks = [states[i] for i in rng.integers(0, n, calls)]
+        actions = [DEFAULT_ACTIONS[i] for i in rng.integers(0, len(DEFAULT_ACTIONS), calls)]
+        rewards = rng.choice([2, -1, -2], calls).tolist()
+        ops = {
+            "select_action": lambda: [agent.select_action(s) for s in picks],
+            "update_q_table": lambda: [agent.update_q_table(s, a, r, s) for s, a, r in zip(picks, actions, rewards)],
+            "top_actions": lambda: [agent.top_actions(s, 2) for s in picks],
+            "get_action_confidence": lambda: [agent.get_action_confidence(s, a) for s, a in zip(picks, actions)],
+            "update_batch": lambda: agent.update_batch(picks, actions, rewards, picks),
+            "query_states": lambda: agent.query_states(picks, actions=actions),
+        }
+        for op, func in ops.items():
+            results[f"{op}[{n}]"] = (calls / best_of(func), "ops/s")
+    return results
+
+@benchmark("q_table_io")
+def q_table_io(quick=False):
+    """Snapshot save/load and a 100-row delta checkpoint at each table size"""
+    results = {}
+    directory = tempfile.mkdtemp(prefix="rl-bench-")
+    try:
+        for n in QUICK_STATE_SIZES if quick else STATE_SIZES:
+            agent, states = populated_agent(n)
+            path = os.path.join(directory, f"q_{n}.qsnap")
+            results[f"save[{n}]"] = (best_of(lambda: agent.save_q_table(path)), "s")
+            results[f"load[{n}]"] = (best_of(lambda: QLearningAgent(DEFAULT_ACTIONS, q_path=path)), "s")
+            agent.q_path = path
+
+            def delta():
+                for state in states[:100]:
+                    agent.update_q_table(state, "open", 1, state)
+                agent.checkpoint(compact_ratio=float("inf"))
+
+            results[f"checkpoint_100_rows[{n}]"] = (best_of(delta), "s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+@benchmark("task_logging")
+def task_logging(quick=False):
+    """Buffered ``TaskLogger.log_episode`` rows per second, including the final flush"""
+    from agent.logger import TaskLogger
+
+    rows = 20_000 if quick else 100_000
+    directory = tempfile.mkdtemp(prefix="rl-bench-")
+    try:
+        def run():
+            with TaskLogger(os.path.join(directory, "task_log.csv"), os.path.join(directory, "episode_log.txt")) as log:
+                for i in range(rows):
+                    log.log_episode(f"1-{i}", "open", "open", 2, "👍 Correct", "")
+
+        return {f"log_episode[{rows}]": (rows / best_of(run), "rows/s")}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def write_synthetic_log(path, rows, seed=0):
+    """Task-log CSV with ``rows`` realistic rows"""
+    from agent.logger import TASK_LOG_HEADER
+
+    rng = np.random.default_rng(seed)
+    intents = np.array(["open", "mute", "play", "unmute", "close", "screenshot", "set_dnd", "check", "take"])
+    rewards = rng.choice([2, -1, -2], rows)
+    with open(path, "w") as f:
+        f.write(",".join(TASK_LOG_HEADER) + "\n")
+        for i, intent, action, reward in zip(range(rows), rng.choice(intents, rows),
+                                             rng.choice(DEFAULT_ACTIONS, rows), rewards):
+            feedback = "👍 Correct" if reward > 0 else "👎 Incorrect"
+            f.write(f"1-{i},{intent},{action},{reward},2025-01-01T09:00:00,0.5,{feedback},\n")
+
+@benchmark("dashboard_aggregation")
+def dashboard_aggregation(quick=False):
+    """Single-pass CSV aggregation behind the dashboard"""
+    from agent.log_stats import aggregate_log
+
+    rows = 50_000 if quick else 500_000
+    directory = tempfile.mkdtemp(prefix="rl-bench-")
+    try:
+        path = os.path.join(directory, "task_log.csv")
+        write_synthetic_log(path, rows)
+        return {f"aggregate_log[{rows}]": (rows / best_of(lambda: aggregate_log(path)), "rows/s")}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+@benchmark("plot_rewards")
+def plot_rewards_render(quick=False):
+    """Learning-curve render time by history length (preview DPI)"""
+    from agent.visualizer import plot_rewards
+
+    results = {}
+    directory = tempfile.mkdtemp(prefix="rl-bench-")
+    try:
+        warnings.filterwarnings("ignore", message="Glyph .* missing from font")  # emoji titles, irrelevant here
+        rng = np.random.default_rng(0)
+        for n in (100, 10_000) if quick else (100, 10_000, 100_000):
+            rewards = np.cumsum(rng.normal(0.05, 2, n))
+            path = os.path.join(directory, "curve.png")
+            results[f"render[{n}]"] = (best_of(lambda: plot_rewards(rewards, path, preview=True, verbose=False),
+                                               repeat=2), "s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+@benchmark("startup")
+def startup(quick=False):
+    """Cold-start import time of the CLI and demo entry points (fresh interpreters)"""
+    from benchmarks.startup import ENTRY_POINTS, cold_start
+
+    return {f"import[{label}]": (cold_start(statement, 3 if quick else 5)[0], "s")
+            for label, statement in ENTRY_POINTS.items()}
@@ -9,6 +9,7 @@ import sys
 sys.path.append('.')
 
 from agent.q_learning import QLearningAgent
+from agent.intent_parser import parse_intent
 from agent.visualizer import plot_rewards
 
 def demo_agent_capabilities():
@@ -31,7 +32,7 @@ def demo_agent_capabilities():
     print("-" * 40)
     
     for i, task in enumerate(demo_tasks, 1):
-        parsed_intent = task.lower().split()[0]
+        parsed_intent = parse_intent(task)
         
         # Get agent's action and alternatives
         action = agent.select_action(parsed_intent)
@@ -1,17 +1,18 @@
 import streamlit as st
 import pandas as pd
 import os
-import time
-from datetime import datetime
-import matplotlib.pyplot as plt
-import pickle
 
 # Import our modules
 import sys
 sys.path.append('.')
-from agent.q_learning import QLearningAgent
-from agent.logger import log_episode, log_total_reward
-from agent.visualizer import plot_rewards, create_performance_dashboard
+from agent.q_learning import DEFAULT_ACTIONS
+from agent.intent_parser import TaskIntentIndex
+from agent.feedback import compute_reward
+from agent.task_source import TASK_FILE, TaskSource
+from agent.shared_agent import SharedQLearningAgent
+from agent.logger import TaskLogger
+from agent.columnar_log import COLUMNAR_LOG_DIR, open_reader
+from agent.log_archive import ArchivedLogCache
 
 # Configure Streamlit page
 st.set_page_config(
@@ -45,12 +46,35 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_task_logger():
+    """Buffered task/episode logger shared by every session in this process (mirrors into the columnar log)"""
+    return TaskLogger(os.path.join("data", "task_log.csv"), os.path.join("data", "episode_log.txt"))
+
+@st.cache_resource
+def get_log_cache():
+    """Incremental task-log aggregates, merged with the archived summary, shared by every session in this process"""
+    return ArchivedLogCache(os.path.join("data", "task_log.csv"))
+
+@st.cache_resource
+def get_task_source():
+    """Indexed task file shared by every session: tasks are read by number, never all at once"""
+    return TaskSource(TASK_FILE, index=True)
+
+@st.cache_resource
+def get_intent_index():
+    """Every task's intent, parsed once and shared by every session; synced as the task file grows"""
+    return TaskIntentIndex(keep_tasks=False)
+
+@st.cache_resource
+def get_shared_agent():
+    """One thread-safe agent shared by every session, so no session overwrites another's learning"""
+    return SharedQLearningAgent(actions=DEFAULT_ACTIONS)
+
 def initialize_session_state():
     """Initialize session state variables"""
     if 'agent' not in st.session_state:
-        st.session_state.agent = QLearningAgent(
-            actions=["open", "mute", "play", "unmute", "close", "screenshot", "set_dnd"]
-        )
+        st.session_state.agent = get_shared_agent()
     if 'current_task_index' not in st.session_state:
         st.session_state.current_task_index = 0
     if 'current_episode' not in st.session_state:
@@ -59,27 +83,24 @@ def initialize_session_state():
         st.session_state.episode_reward = 0
     if 'total_rewards' not in st.session_state:
         st.session_state.total_rewards = []
-    if 'task_list' not in st.session_state:
-        load_tasks()
+    st.session_state.task_count = load_tasks()
 
 def load_tasks():
-    """Load tasks from file"""
-    task_file_path = os.path.join("data", "task_log.txt")
+    """Refresh the task-file index (only appended lines are scanned) and return the task count"""
     try:
-        with open(task_file_path, "r") as f:
-            st.session_state.task_list = [
-                line.strip().split(" - ")[1] for line in f.readlines() 
-                if " - " in line
-            ]
+        source = get_task_source()
+        source.refresh()
+        get_intent_index().sync(source)
+        return len(source)
     except FileNotFoundError:
-        st.error(f"Task file not found: {task_file_path}")
-        st.session_state.task_list = []
+        st.error(f"Task file not found: {TASK_FILE}")
+        return 0
 
 def display_current_task():
     """Display the current task and get agent's action"""
-    if st.session_state.current_task_index < len(st.session_state.task_list):
-        task = st.session_state.task_list[st.session_state.current_task_index]
-        parsed_intent = task.lower().split()[0]
+    if st.session_state.current_task_index < st.session_state.task_count:
+        _, task = get_task_source()[st.session_state.current_task_index]
+        parsed_intent = get_intent_index()[st.session_state.current_task_index]
         
         # Get agent's action
         action = st.session_state.agent.select_action(parsed_intent)
@@ -105,26 +126,16 @@ def handle_feedback(task, parsed_intent, action, feedback_type, correction=None)
     """Handle user feedback and update the agent"""
     task_id = f"{st.session_state.current_episode}-{st.session_state.current_task_index + 1}"
     
-    # Calculate reward based on feedback
-    if feedback_type == "👍":
-        reward = 2
-        feedback_text = "👍 Correct"
-        suggestion = ""
-    else:  # feedback_type == "👎"
-        reward = -2
-        feedback_text = "👎 Incorrect"
-        suggestion = correction or "No suggestion provided"
-        # Bonus reward for providing correction
-        if correction:
-            reward += 1
-            st.success("🎆 Bonus +1 reward for providing correction!")
+    # Same reward formula as the CLI and the feedback server
+    reward, feedback_text, suggestion = compute_reward(feedback_type, correction)
+    if feedback_type == "👎" and correction:
+        st.success("🎆 Bonus +1 reward for providing correction!")
     
     # Update Q-table
     st.session_state.agent.update_q_table(parsed_intent, action, reward, parsed_intent)
     
     # Log the episode
-    log_episode(
-        log_path=os.path.join("data", "task_log.csv"),
+    get_task_logger().log_episode(
         task_id=task_id,
         intent=parsed_intent,
         action=action,
@@ -140,16 +151,15 @@ def handle_feedback(task, parsed_intent, action, feedback_type, correction=None)
     st.session_state.current_task_index += 1
     
     # Check if episode is complete
-    if st.session_state.current_task_index >= len(st.session_state.task_list):
+    if st.session_state.current_task_index >= st.session_state.task_count:
         complete_episode()
 
 def complete_episode():
     """Complete the current episode and start a new one"""
     # Log episode reward
-    log_total_reward(
+    get_task_logger().log_total_reward(
         st.session_state.current_episode, 
-        st.session_state.episode_reward, 
-        os.path.join("data", "episode_log.txt")
+        st.session_state.episode_reward
     )
     
     # Store episode reward
@@ -164,8 +174,8 @@ def complete_episode():
     st.session_state.current_task_index = 0
     st.session_state.episode_reward = 0
     
-    # Save Q-table
-    st.session_state.agent.save_q_table("data/q_table.pkl")
+    # Checkpoint the states updated this episode
+    st.session_state.agent.checkpoint()
 
 def main():
     """Main Streamlit application"""
@@ -195,8 +205,15 @@ def main():
             st.experimental_rerun()
         
         if st.button("💾 Save Q-Table"):
-            st.session_state.agent.save_q_table("data/q_table.pkl")
+            st.session_state.agent.save_q_table()
             st.success("Q-table saved!")
+        
+        if st.session_state.task_count:
+            jump_to = st.number_input("Task number", min_value=1, max_value=st.session_state.task_count,
+                                      value=min(st.session_state.current_task_index + 1, st.session_state.task_count))
+            if st.button("⏭️ Jump to Task"):
+                st.session_state.current_task_index = int(jump_to) - 1
+                st.experimental_rerun()
     
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -231,26 +248,38 @@ def main():
     with col2:
         st.header("📈 Progress")
         
-        # Show learning curve if we have data
+        # Show learning curve if we have data (native chart, no matplotlib figure per rerun)
         if st.session_state.total_rewards:
-            fig, ax = plt.subplots(figsize=(8, 6))
-            episodes = range(1, len(st.session_state.total_rewards) + 1)
-            ax.plot(episodes, st.session_state.total_rewards, marker='o', linewidth=2)
-            ax.set_title("Learning Curve")
-            ax.set_xlabel("Episode")
-            ax.set_ylabel("Total Reward")
-            ax.grid(True, alpha=0.3)
-            st.pyplot(fig)
+            st.subheader("Learning Curve")
+            st.line_chart(pd.DataFrame(
+                {"Total Reward": st.session_state.total_rewards},
+                index=pd.RangeIndex(1, len(st.session_state.total_rewards) + 1, name="Episode")
+            ))
+        
+        # Parse only rows appended since the last rerun
+        get_task_logger().flush()
+        log_cache = get_log_cache()
+        log_cache.refresh()
+        stats = log_cache.aggregate
         
         # Show recent task log
         st.header("📝 Recent Activity")
-        try:
-            df = pd.read_csv("data/task_log.csv")
-            if not df.empty:
-                # Show last 5 entries
-                st.dataframe(df.tail(5), use_container_width=True)
-        except FileNotFoundError:
+        # The columnar copy is only used while its watermark shows it in step with the CSV
+        reader = open_reader(COLUMNAR_LOG_DIR)
+        df = reader.tail(5) if reader is not None and reader.in_step_with(log_cache.path) else log_cache.recent_frame()
+        if df.empty:
             st.info("No task log available yet.")
+        else:
+            # Show last 5 entries
+            st.dataframe(df, use_container_width=True)
+        
+        # Running aggregates over the whole log
+        if stats.rows:
+            st.header("📊 Log Summary")
+            st.caption(f"{stats.rows} logged tasks")
+            st.bar_chart(pd.Series(stats.intent_mean_rewards(), name="Average Reward"))
+            st.bar_chart(pd.Series(dict(stats.action_counts), name="Action Count"))
+            st.bar_chart(pd.Series(dict(stats.feedback_counts), name="Feedback Count"))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from agent.columnar_log import ColumnarLogSink, columnar_dir_for, open_reader
+from agent.log_archive import aggregate_archived, aggregate_columnar_archived, maintain
+from agent.logger import TASK_LOG_HEADER, BufferedCSVWriter
+
+STARTED = datetime(2026, 1, 1)
+
+
+def panels(aggregate):
+    positions, rewards = aggregate.rewards.points()
+    return (aggregate.rows, aggregate.intent_mean_rewards(), dict(aggregate.action_counts),
+            dict(aggregate.feedback_counts), list(positions), list(rewards))
+
+
+def write_day(path, day, rows=2500, sinks=True):
+    sinks = [ColumnarLogSink(columnar_dir_for(path), segment_rows=1000)] if sinks else []
+    with BufferedCSVWriter(path, TASK_LOG_HEADER, max_rows=300, flush_interval=0, sinks=sinks) as writer:
+        for i in range(rows):
+            stamp = (STARTED + timedelta(days=day, seconds=i)).isoformat()
+            writer.write([i, f"intent{i % 13}", f"action{i % 5}", (i * 7) % 5 - 2, stamp, 0.5, "👍", ""])
+
+
+def test_columnar_copy_follows_rotation_and_retention(tmp_path):
+    path = str(tmp_path / "task_log.csv")
+    write_day(path, 0)
+    for day in range(1, 8):
+        maintain(path, max_bytes=1, keep=timedelta(days=3), now=STARTED + timedelta(days=day, hours=1))
+        write_day(path, day)
+        reader = open_reader(columnar_dir_for(path))
+        assert reader.in_step_with(path)
+        assert panels(aggregate_columnar_archived(path, reader)) == panels(aggregate_archived(path))
+    # the segments of days 0-2 were pruned from the archive, and from the columnar copy with them
+    assert reader.base_row == 3 * 2500
+    assert len(reader) == 5 * 2500
+
+
+def test_rows_written_without_the_sink_fall_back_to_the_csv(tmp_path):
+    path = str(tmp_path / "task_log.csv")
+    write_day(path, 0)
+    write_day(path, 1, rows=1, sinks=False)
+    reader = open_reader(columnar_dir_for(path))
+    assert not reader.in_step_with(path)
+    assert aggregate_columnar_archived(path, reader) is None
@@ -0,0 +1,45 @@
+import csv
+
+import numpy as np
+
+from agent.logger import TASK_LOG_HEADER
+from agent.offline_trainer import replay_log
+from agent.q_learning import QLearningAgent, DEFAULT_ACTIONS
+
+
+def write_log(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TASK_LOG_HEADER)
+        for i, (intent, action, reward) in enumerate(rows):
+            writer.writerow([f"1-{i}", intent, action, reward, "2024-01-01 09:00:00", 0.5, "", ""])
+
+
+def sequential_agent(rows):
+    agent = QLearningAgent(DEFAULT_ACTIONS, q_path="")
+    for intent, action, reward in rows:
+        agent.update_q_table(intent, action, reward, intent)
+    return agent
+
+
+def test_identical_rows_count_one_by_one(tmp_path):
+    rows = [("open", "open", 2)] * 1000
+    write_log(tmp_path / "log.csv", rows)
+    agent = QLearningAgent(DEFAULT_ACTIONS, q_path="")
+    replay_log(agent, str(tmp_path / "log.csv"), verbose=False)
+    assert agent.q.get("open", "open") == sequential_agent(rows).q.get("open", "open")
+    assert agent.q.get("open", "open") > 19
+
+
+def test_replay_matches_sequential_loop(tmp_path):
+    rng = np.random.default_rng(0)
+    intents = ["open", "mute", "play", "close"]
+    rows = [(str(rng.choice(intents)), str(rng.choice(DEFAULT_ACTIONS)), int(rng.choice([2, -1, -2])))
+            for _ in range(5000)]
+    write_log(tmp_path / "log.csv", rows)
+    agent = QLearningAgent(DEFAULT_ACTIONS, q_path="")
+    replay_log(agent, str(tmp_path / "log.csv"), epochs=2, chunksize=1500, batch_size=256, verbose=False)
+    expected = sequential_agent(rows + rows)
+    for intent in intents:
+        for action in DEFAULT_ACTIONS:
+            assert np.isclose(agent.q.get(intent, action), expected.q.get(intent, action))
@@ -0,0 +1,19 @@
+import numpy as np
+
+from agent.replay import PrioritizedReplayBuffer, SumTree
+
+
+def test_sum_tree_accepts_empty_batches():
+    tree = SumTree(8)
+    tree.update([3], [2.0])
+    tree.update([], [])
+    assert tree.total == 2.0
+    assert tree.find([]).size == 0
+
+
+def test_prioritized_buffer_accepts_empty_batches():
+    buffer = PrioritizedReplayBuffer(8, seed=0)
+    empty = np.zeros(0, dtype=np.int64)
+    buffer.add_batch(empty, empty, np.zeros(0), empty)
+    buffer.update_priorities(empty, np.zeros(0))
+    assert len(buffer) == 0
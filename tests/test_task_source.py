@@ -0,0 +1,45 @@
+import sys
+import threading
+import time
+
+import numpy as np
+
+from agent.task_source import TaskSource
+
+
+def test_concurrent_refresh_keeps_every_line_once(tmp_path):
+    chunks, per_chunk = 200, 50
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for trial in range(3):
+            path = tmp_path / f"tasks{trial}.txt"
+            path.write_text("")
+            source = TaskSource(str(path), index=True)
+            done = threading.Event()
+
+            def append():
+                with open(path, "a") as f:
+                    for i in range(chunks):
+                        f.write("".join(f"09:00 AM - Open file{i * per_chunk + j}\n" for j in range(per_chunk)))
+                        f.flush()
+                        time.sleep(0.0002)
+                done.set()
+
+            def refresh():
+                while not done.is_set():
+                    source.refresh()
+
+            threads = [threading.Thread(target=append)] + [threading.Thread(target=refresh) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            source.refresh()
+
+            lines = chunks * per_chunk
+            assert len(source) == lines
+            assert np.all(np.diff(source.indexes[0].offsets.astype(np.int64)) > 0)
+            assert [source[k][1] for k in range(0, lines, 97)] == [f"Open file{k}" for k in range(0, lines, 97)]
+    finally:
+        sys.setswitchinterval(switch_interval)